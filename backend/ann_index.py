@@ -0,0 +1,228 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+
+
+class IVFIndex:
+    """
+    Approximate nearest-neighbor index using an inverted file (IVF) layout.
+
+    Document vectors are clustered with spherical k-means into n_lists coarse
+    cells. A search scores the query against the cell centroids, then scores
+    only the documents in the n_probe closest cells exactly. Raising n_probe
+    trades latency for recall; n_probe == n_lists is an exact search.
+
+    Works on the same normalized float32 matrix as QueryProcessor, which may be
+    a memory-mapped snapshot; the index itself only stores centroids and the
+    cell membership of each row.
+    """
+
+    def __init__(
+        self,
+        matrix: np.ndarray,
+        centroids: np.ndarray,
+        order: np.ndarray,
+        offsets: np.ndarray,
+        n_probe: int = 8,
+    ) -> None:
+        """
+        Initialize index from its trained components.
+
+        Args:
+            matrix: Normalized document matrix the index was built from
+            centroids: Array of shape (n_lists, dim) with unit-length rows
+            order: Row indices of matrix grouped by cell
+            offsets: Array of n_lists + 1 positions into order; cell i holds
+                     order[offsets[i]:offsets[i + 1]]
+            n_probe: Number of cells scanned per query
+        """
+        self.matrix = matrix
+        self.centroids = centroids
+        self.order = order
+        self.offsets = offsets
+        self.n_probe = n_probe
+
+    @property
+    def n_lists(self) -> int:
+        """Number of coarse cells."""
+        return self.centroids.shape[0]
+
+    @classmethod
+    def build(
+        cls,
+        matrix: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        iterations: int = 20,
+        sample_size: int = 256,
+        seed: int = 42,
+    ) -> "IVFIndex":
+        """
+        Train centroids with spherical k-means and assign every row to a cell.
+
+        Centroids are trained on a random sample of at most sample_size rows
+        per cell, then all rows are assigned in chunks to bound memory.
+
+        Args:
+            matrix: Normalized document matrix
+            n_lists: Number of cells; defaults to roughly sqrt(number of rows)
+            n_probe: Number of cells scanned per query
+            iterations: Number of k-means iterations
+            sample_size: Training rows per cell
+            seed: Random seed for reproducible training
+
+        Returns:
+            Trained IVFIndex over matrix
+        """
+        num_rows = matrix.shape[0]
+        if n_lists is None:
+            n_lists = int(np.sqrt(num_rows))
+        n_lists = max(1, min(n_lists, num_rows))
+
+        rng = np.random.default_rng(seed)
+        sample_rows = min(num_rows, n_lists * sample_size)
+        sample = np.asarray(
+            matrix[np.sort(rng.choice(num_rows, sample_rows, replace=False))],
+            dtype=np.float32,
+        )
+        centroids = sample[rng.choice(sample_rows, n_lists, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Keep the previous centroid for cells that lost all their members
+            empty = norms[:, 0] == 0
+            sums[empty] = centroids[empty]
+            norms[empty] = 1.0
+            centroids = sums / norms
+
+        labels = cls.assign(matrix, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.searchsorted(labels[order], np.arange(n_lists + 1))
+        return cls(matrix, centroids, order, offsets, n_probe=n_probe)
+
+    @staticmethod
+    def assign(
+        matrix: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536
+    ) -> np.ndarray:
+        """
+        Assign each matrix row to its most similar centroid.
+
+        Args:
+            matrix: Normalized document matrix
+            centroids: Normalized centroid matrix
+            chunk_size: Rows scored per step
+
+        Returns:
+            Array of cell labels, one per row
+        """
+        labels = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], chunk_size):
+            chunk = matrix[start : start + chunk_size]
+            labels[start : start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+        return labels
+
+    def search(
+        self, query_vector: np.ndarray, top_k: int, n_probe: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find approximate top matches for a normalized query vector.
+
+        Args:
+            query_vector: Unit-length query vector
+            top_k: Number of results to return
+            n_probe: Cells to scan for this query; defaults to the index setting
+
+        Returns:
+            Tuple of (row indices, cosine similarity scores) sorted by
+            descending score; may hold fewer than top_k rows if the probed
+            cells are small
+        """
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        centroid_scores = self.centroids @ query_vector
+        if n_probe < self.n_lists:
+            probed = np.argpartition(-centroid_scores, n_probe - 1)[:n_probe]
+        else:
+            probed = np.arange(self.n_lists)
+
+        candidates = np.concatenate(
+            [self.order[self.offsets[cell] : self.offsets[cell + 1]] for cell in probed]
+        )
+        candidates.sort()
+        scores = np.asarray(self.matrix[candidates]) @ query_vector
+
+        if top_k < len(candidates):
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            best = np.arange(len(candidates))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return candidates[best], scores[best]
+
+    def save(self, path: Path, fingerprint: Dict[str, Any]) -> None:
+        """
+        Persist the index next to the embedding snapshot.
+
+        Args:
+            path: Directory to write ivf.npz and ivf.json into
+            fingerprint: Fingerprint of the matrix the index was built from
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        meta_path = path / "ivf.json"
+        if meta_path.exists():
+            meta_path.unlink()
+
+        data_tmp = path / "ivf.npz.tmp"
+        with open(data_tmp, "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        os.replace(data_tmp, path / "ivf.npz")
+
+        meta_tmp = path / "ivf.json.tmp"
+        with open(meta_tmp, "w") as f:
+            json.dump({"fingerprint": fingerprint, "n_lists": self.n_lists}, f)
+        os.replace(meta_tmp, meta_path)
+
+    @classmethod
+    def load(
+        cls,
+        path: Path,
+        fingerprint: Dict[str, Any],
+        matrix: np.ndarray,
+        n_probe: int = 8,
+    ) -> Optional["IVFIndex"]:
+        """
+        Load a persisted index if it was built from the same matrix.
+
+        Args:
+            path: Directory holding ivf.npz and ivf.json
+            fingerprint: Fingerprint of the current matrix
+            matrix: Current normalized document matrix
+            n_probe: Number of cells scanned per query
+
+        Returns:
+            Loaded IVFIndex, or None if missing or stale
+        """
+        meta_path = Path(path) / "ivf.json"
+        if not meta_path.exists():
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != fingerprint:
+            return None
+
+        with np.load(Path(path) / "ivf.npz") as data:
+            index = cls(
+                matrix,
+                data["centroids"],
+                data["order"],
+                data["offsets"],
+                n_probe=n_probe,
+            )
+        if index.offsets[-1] != matrix.shape[0]:
+            return None
+        return index
@@ -1,15 +1,36 @@
 from waitress import serve
-from flask import Flask, request, jsonify, send_from_directory, redirect
+from flask import Flask, Response, g, request, jsonify, send_from_directory, redirect
 from flask_cors import CORS
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
+from datetime import datetime, timezone
+import cProfile
+import hmac
 import os
+import threading
+from functools import partial
 
 from email_processor import EmailProcessor
-from document_store import DocumentStore
-from query_processor import QueryProcessor
+from document_store import DocumentStore, loader_lock
+from query_processor import QueryProcessor, QueryCache, SEARCH_MODES
 from visualization_processor import VisualizationProcessor
-from documents import Document
+from documents import Document, Email
+from encoder import encoders, MODEL_NAME
+from ann_index import IVFIndex
+from corpus import Corpus
+from quantization import QuantizedMatrix, PRECISIONS
+from embedding_cache import EmbeddingCache
+from metrics import metrics, span, StageTimer
+from profiling import (
+    PROFILE_HEADER,
+    PROFILE_PARAM,
+    SUMMARY_HEADER,
+    SUMMARY_PARAM,
+    save_profile,
+    start_profiler,
+    stop_profiler,
+    summarize_profile,
+)
 
 # Environment-based configuration
 ENVIRONMENT = os.getenv('FLASK_ENV', 'development')
@@ -17,11 +38,45 @@ IS_DEVELOPMENT = ENVIRONMENT == 'development'
 
 # Default configuration
 DEFAULT_CONFIG = {
-    "MBOX_PATH": Path("../data/mbox-enron-white-s-all.mbox"),
-    "STORE_PATH": Path("../data/processed_doc_cache.db"),
+    "MBOX_PATH": Path(os.getenv('MBOX_PATH', "../data/mbox-enron-white-s-all.mbox")),
+    "STORE_PATH": Path(os.getenv('STORE_PATH', "../data/processed_doc_cache.db")),
+    "EMBEDDING_CACHE_PATH": os.getenv('EMBEDDING_CACHE_PATH', '../data/embedding_cache.db'),  # '' disables
+    "EMBEDDING_CACHE_SIZE": int(os.getenv('EMBEDDING_CACHE_SIZE', 500000)),
+    "INGEST_WORKERS": int(os.getenv('INGEST_WORKERS', 0)),
+    "SEARCH_ENGINE": os.getenv('SEARCH_ENGINE', 'exact'),  # 'exact' or 'ivf'
+    "IVF_LISTS": int(os.getenv('IVF_LISTS', 0)),  # 0 picks sqrt(corpus size)
+    "IVF_PROBES": int(os.getenv('IVF_PROBES', 8)),
+    "SCORING_PRECISION": os.getenv('SCORING_PRECISION', 'float32'),  # or 'int8', 'float16'
+    "RERANK_CANDIDATES": int(os.getenv('RERANK_CANDIDATES', 200)),
+    "QUERY_CACHE_SIZE": int(os.getenv('QUERY_CACHE_SIZE', 1024)),
+    "QUERY_CACHE_TTL": float(os.getenv('QUERY_CACHE_TTL', 3600)),
+    "SEARCH_TOP_K": int(os.getenv('SEARCH_TOP_K', 100)),
+    "SEARCH_MAX_TOP_K": int(os.getenv('SEARCH_MAX_TOP_K', 1000)),
+    "SEARCH_MODE": os.getenv('SEARCH_MODE', 'semantic'),  # see SEARCH_MODES
+    "SEARCH_MAX_BATCH": int(os.getenv('SEARCH_MAX_BATCH', 256)),
+    "SEARCH_BATCH_TOP_K": int(os.getenv('SEARCH_BATCH_TOP_K', 10)),
+    "LEXICAL_CANDIDATES": int(os.getenv('LEXICAL_CANDIDATES', 1000)),
+    "SNIPPET_LENGTH": int(os.getenv('SNIPPET_LENGTH', 200)),
+    "BACKGROUND_LOAD": os.getenv('BACKGROUND_LOAD', '1') == '1',
+    "FIELD_WEIGHTING": os.getenv('FIELD_WEIGHTING', '1') == '1',  # per-query field weights
+    "PROFILE_TOKEN": os.getenv('PROFILE_TOKEN', ''),  # '' disables request profiling
+    "PROFILE_DIR": os.getenv('PROFILE_DIR', '../data/profiles'),
+    "PROFILE_INGEST": os.getenv('PROFILE_INGEST', '0') == '1',
     "STATIC_FOLDER": Path("dist") if not IS_DEVELOPMENT else None
 }
 
+# Fields a search result may include; id, rank and score are always returned
+RESULT_FIELDS = ("subject", "from", "date", "to", "cc", "bcc", "snippet", "body")
+DEFAULT_RESULT_FIELDS = ("subject", "from", "date", "to", "cc", "snippet")
+
+# Metadata filters a search may apply; see Corpus.ADDRESS_FILTERS
+DATE_FILTERS = ("date_from", "date_to")
+ADDRESS_FILTERS = tuple(Corpus.ADDRESS_FILTERS)
+
+# Fields a search may weight individually, in per-field matrix order
+WEIGHTED_FIELDS = tuple(Email.DEFAULT_FIELD_WEIGHTS)
+
+
 class SearchicaApp:
     """
     Flask application for semantic email search and visualization.
@@ -29,11 +84,15 @@ class SearchicaApp:
     Provides a REST API for searching and visualizing email content using
     semantic similarity. Handles document processing, search queries, and
     visualization preparation.
+
+    The corpus is loaded (and ingested if needed) in a background thread so the
+    server can answer health checks immediately; search endpoints report "not
+    ready" until the finished index is swapped in.
     """
 
     def __init__(self, config: Optional[Dict[str, Any]] = None) -> None:
         """
-        Initialize application with configuration.
+        Initialize application with configuration and start loading the corpus.
 
         Args:
             config: Optional configuration dictionary to override defaults
@@ -48,27 +107,108 @@ class SearchicaApp:
         else:
             self.app = Flask(__name__, static_folder=str(self.config["STATIC_FOLDER"]))
         
-        # Initialize document processing
-        self.doc_list = self.init_documents(
-            self.config["MBOX_PATH"],
-            self.config["STORE_PATH"],
-            force_reprocess=False
-        )
+        # Search state, set together by load() before ready is signalled
+        self.doc_store: Optional[DocumentStore] = None
+        self.query_processor: Optional[QueryProcessor] = None
+        self.corpus: Optional[Corpus] = None
+        self.projection: Any = None
+        self.ready = threading.Event()
+        self.load_state: Dict[str, Any] = {"phase": "starting"}
 
-        # Initialize query processor
-        self.query_processor = QueryProcessor(self.doc_list)
+        # Load the encoder in the background while the corpus loads
+        encoders.warmup()
+        Document.embedding_cache = self.init_embedding_cache()
 
         # Register routes
+        self.register_instrumentation()
         self.register_routes()
 
+        if self.config["BACKGROUND_LOAD"]:
+            threading.Thread(target=self.load, name="corpus-loader", daemon=True).start()
+        else:
+            self.load()
+
+    def load(self) -> None:
+        """
+        Load the corpus and build the search index, then mark the app ready.
+
+        Progress and failures are recorded in load_state for /api/status.
+        With several server worker processes, the first one to take the
+        store's loader lock ingests and writes the snapshots; the others wait
+        for it and then map the finished snapshots.
+        """
+        try:
+            self.load_state = {"phase": "waiting"}
+            with loader_lock(str(self.config["STORE_PATH"])):
+                self.load_state = {"phase": "ingesting"}
+                doc_store = self.init_documents(
+                    self.config["MBOX_PATH"],
+                    self.config["STORE_PATH"],
+                    force_reprocess=False
+                )
+
+                self.load_state = {"phase": "indexing"}
+                query_processor = self.init_query_processor(doc_store)
+                projection = self.init_projection(doc_store, query_processor)
+
+            self.doc_store = doc_store
+            self.query_processor = query_processor
+            self.corpus = query_processor.corpus
+            self.projection = projection
+            self.load_state = {"phase": "ready", "documents": len(self.corpus)}
+            self.ready.set()
+        except Exception as e:
+            print(f"Error loading corpus: {str(e)}")
+            self.load_state = {"phase": "failed", "error": str(e)}
+
+    def update_ingest_progress(self, position: int, total: int) -> None:
+        """
+        Record mbox ingestion progress for /api/status.
+
+        Args:
+            position: Number of mbox messages consumed
+            total: Number of messages in the mbox
+        """
+        self.load_state = {"phase": "ingesting", "processed": position, "total": total}
+
+    def not_ready_response(self) -> Tuple[Any, int, Dict[str, str]]:
+        """
+        Build the response returned by search endpoints while loading.
+
+        Returns:
+            Flask response tuple with a 503 status and Retry-After header
+        """
+        return (
+            jsonify({"error": "Search index is not ready", "loading": self.load_state}),
+            503,
+            {"Retry-After": "5"},
+        )
+
+    def init_embedding_cache(self) -> Optional[EmbeddingCache]:
+        """
+        Open the persistent embedding cache shared by all document stores.
+
+        Returns:
+            EmbeddingCache, or None if EMBEDDING_CACHE_PATH is empty
+        """
+        path = self.config["EMBEDDING_CACHE_PATH"]
+        if not path:
+            return None
+        try:
+            return EmbeddingCache(str(path), max_entries=self.config["EMBEDDING_CACHE_SIZE"])
+        except Exception as e:
+            print(f"Embedding cache unavailable, encoding without it: {str(e)}")
+            return None
+
     def init_documents(
         self, mbox_path: Path, store_path: Path, force_reprocess: bool = False
-    ) -> List[Document]:
+    ) -> DocumentStore:
         """
         Initialize document store and process emails.
 
-        Loads processed documents from cache if available, otherwise processes
-        raw emails from mbox file.
+        Uses processed documents from cache if available and processes only the
+        emails from the mbox file that are not yet stored, resuming an
+        interrupted ingestion where it stopped.
 
         Args:
             mbox_path: Path to mbox file containing emails
@@ -76,22 +216,578 @@ class SearchicaApp:
             force_reprocess: If True, reprocess emails even if cache exists
 
         Returns:
-            List of processed documents
+            Populated document store
         """
         doc_store = DocumentStore(str(store_path))
 
-        if not force_reprocess:
-            emails = doc_store.load_all_documents()
-            if emails:
-                print("Loaded emails from store")
-                return emails
+        if force_reprocess:
+            doc_store.clear_store()
+
+        if not os.path.exists(mbox_path):
+            print("Mbox not found, using documents from store")
+            return doc_store
+
+        processor = EmailProcessor(
+            str(mbox_path),
+            doc_store,
+            workers=self.config["INGEST_WORKERS"],
+            progress_callback=self.update_ingest_progress,
+            profile_dir=(
+                self.config["PROFILE_DIR"] if self.config["PROFILE_INGEST"] else None
+            ),
+        )
+        if not processor.needs_processing():
+            print("Loaded emails from store")
+            return doc_store
 
         print("Starting processing emails from mbox")
-        doc_store.clear_store()
-        processor = EmailProcessor(str(mbox_path), doc_store)
-        emails = processor.process_mbox()
+        processor.process_mbox()
         print("Finished processing emails from mbox")
-        return emails
+        if Document.embedding_cache is not None:
+            print(f"Embedding cache: {Document.embedding_cache.stats()}")
+        return doc_store
+
+    def init_query_processor(self, doc_store: DocumentStore) -> QueryProcessor:
+        """
+        Build the search index, memory-mapping the store snapshot when current.
+
+        If the snapshot's fingerprint (model, field weights and store contents)
+        matches, the combined-vector matrix, document IDs and metadata columns
+        are mapped from disk. Otherwise they are rebuilt from the store and a
+        fresh snapshot is written and mapped. Either way the index lives in
+        shared file-backed pages rather than process memory, and full
+        documents are fetched from the store when results are rendered.
+        With FIELD_WEIGHTING enabled the per-field matrices are loaded or
+        built the same way, as is the quantized matrix when SCORING_PRECISION
+        is int8 or float16.
+
+        Args:
+            doc_store: Populated document store
+
+        Returns:
+            QueryProcessor over all stored documents
+        """
+        fingerprint = doc_store.snapshot_fingerprint(
+            MODEL_NAME, Email.DEFAULT_FIELD_WEIGHTS
+        )
+        query_cache = QueryCache(
+            max_size=self.config["QUERY_CACHE_SIZE"],
+            ttl=self.config["QUERY_CACHE_TTL"],
+        )
+        corpus = Corpus.from_snapshot(doc_store, fingerprint)
+        if corpus is not None:
+            print("Loaded search index from snapshot")
+        else:
+            corpus = Corpus.from_store(doc_store, Email.DEFAULT_FIELD_WEIGHTS)
+            if len(corpus):
+                corpus.write_snapshot(doc_store, fingerprint)
+                print("Wrote search index snapshot")
+                # Map the snapshot just written so the heap copy can be freed
+                corpus = Corpus.from_snapshot(doc_store, fingerprint) or corpus
+
+        if self.config["FIELD_WEIGHTING"] and len(corpus):
+            corpus.field_matrices = self.init_field_matrices(
+                doc_store, len(corpus), fingerprint
+            )
+            corpus.field_names = WEIGHTED_FIELDS
+
+        quantized = None
+        if self.config["SCORING_PRECISION"] in PRECISIONS and len(corpus):
+            quantized = self.init_quantized(doc_store, corpus.matrix, fingerprint)
+
+        query_processor = QueryProcessor(
+            corpus,
+            query_cache=query_cache,
+            lexical_candidates=self.config["LEXICAL_CANDIDATES"],
+            quantized=quantized,
+            rerank_candidates=self.config["RERANK_CANDIDATES"],
+        )
+        if self.config["SEARCH_ENGINE"] == "ivf" and len(corpus):
+            query_processor.index = self.init_ivf_index(
+                doc_store, query_processor.doc_matrix, fingerprint
+            )
+        return query_processor
+
+    def init_quantized(
+        self, doc_store: DocumentStore, doc_matrix: Any, fingerprint: Dict[str, Any]
+    ) -> QuantizedMatrix:
+        """
+        Map the quantized scoring matrix from the snapshot, or build it.
+
+        Args:
+            doc_store: Document store whose snapshot directory holds the matrix
+            doc_matrix: Normalized combined-vector matrix
+            fingerprint: Snapshot fingerprint of doc_matrix
+
+        Returns:
+            QuantizedMatrix at the SCORING_PRECISION setting
+        """
+        precision = self.config["SCORING_PRECISION"]
+        # int8 codes need their per-row scales; float16 codes stand alone
+        names = ("codes", "scales") if precision == "int8" else ("codes",)
+        arrays = [
+            doc_store.load_snapshot_array(f"{precision}_{name}", fingerprint)
+            for name in names
+        ]
+        if all(array is not None and len(array) == len(doc_matrix) for array in arrays):
+            print(f"Loaded {precision} scoring matrix from snapshot")
+            return QuantizedMatrix(*arrays)
+
+        def allocate(name: str, shape: Tuple[int, ...], dtype: type) -> Any:
+            return doc_store.open_snapshot_array(f"{precision}_{name}", shape, dtype)
+
+        quantized = QuantizedMatrix.quantize(doc_matrix, precision, allocate=allocate)
+        for name in names:
+            getattr(quantized, name).flush()
+            doc_store.finish_snapshot_array(f"{precision}_{name}", fingerprint)
+        print(f"Wrote {precision} scoring matrix snapshot")
+        return QuantizedMatrix(
+            *[
+                doc_store.load_snapshot_array(f"{precision}_{name}", fingerprint)
+                for name in names
+            ]
+        )
+
+    def init_field_matrices(
+        self, doc_store: DocumentStore, count: int, fingerprint: Dict[str, Any]
+    ) -> Any:
+        """
+        Map the per-field matrices from the snapshot, or build them.
+
+        The matrices are written straight into a memory-mapped snapshot file
+        while streaming the stored vectors, so building them never holds more
+        than one copy on disk and none in memory.
+
+        Args:
+            doc_store: Document store whose snapshot directory holds the matrices
+            count: Number of documents in the corpus
+            fingerprint: Snapshot fingerprint of the corpus
+
+        Returns:
+            Array of shape (count, len(WEIGHTED_FIELDS), dim)
+        """
+        field_matrices = doc_store.load_snapshot_array("field_vectors", fingerprint)
+        if field_matrices is not None and len(field_matrices) == count:
+            print("Loaded per-field matrices from snapshot")
+            return field_matrices
+
+        field_matrices = Corpus.build_field_matrices(
+            (vectors for _, _, vectors in doc_store.iter_vectors()),
+            WEIGHTED_FIELDS,
+            count,
+            allocate=partial(doc_store.open_snapshot_array, "field_vectors"),
+        )
+        field_matrices.flush()
+        doc_store.finish_snapshot_array("field_vectors", fingerprint)
+        print("Wrote per-field matrices snapshot")
+        return doc_store.load_snapshot_array("field_vectors", fingerprint)
+
+    def init_projection(
+        self, doc_store: DocumentStore, query_processor: QueryProcessor
+    ) -> Any:
+        """
+        Load the corpus-wide 2D projection for visualization, or fit it.
+
+        The projection is persisted next to the search snapshot under the same
+        fingerprint, so it is only refitted when the corpus changes.
+
+        Args:
+            doc_store: Document store whose snapshot directory holds the projection
+            query_processor: Query processor holding the search matrix
+
+        Returns:
+            Array of 2D coordinates, one row per document
+        """
+        fingerprint = doc_store.snapshot_fingerprint(
+            MODEL_NAME, Email.DEFAULT_FIELD_WEIGHTS
+        )
+        projection = doc_store.load_snapshot_array("projection", fingerprint)
+        if projection is not None and len(projection) == len(query_processor.corpus):
+            print("Loaded visualization projection")
+            return projection
+
+        projection = VisualizationProcessor.fit_projection(query_processor.doc_matrix)
+        if len(query_processor.corpus):
+            doc_store.write_snapshot_array("projection", projection, fingerprint)
+            print("Fitted visualization projection")
+        return projection
+
+    def init_ivf_index(
+        self, doc_store: DocumentStore, doc_matrix: Any, fingerprint: Dict[str, Any]
+    ) -> IVFIndex:
+        """
+        Load the persisted IVF index for the current matrix, or build it.
+
+        Args:
+            doc_store: Document store whose snapshot directory holds the index
+            doc_matrix: Normalized combined-vector matrix
+            fingerprint: Snapshot fingerprint of doc_matrix
+
+        Returns:
+            IVFIndex configured with the IVF_PROBES setting
+        """
+        index = IVFIndex.load(
+            doc_store.snapshot_path,
+            fingerprint,
+            doc_matrix,
+            n_probe=self.config["IVF_PROBES"],
+        )
+        if index is not None:
+            print("Loaded IVF index")
+            return index
+
+        index = IVFIndex.build(
+            doc_matrix,
+            n_lists=self.config["IVF_LISTS"] or None,
+            n_probe=self.config["IVF_PROBES"],
+        )
+        index.save(doc_store.snapshot_path, fingerprint)
+        print(f"Built IVF index with {index.n_lists} lists")
+        return index
+
+    def format_result(
+        self, doc: Document, fields: List[str], query: str
+    ) -> Dict[str, Any]:
+        """
+        Select the requested fields of a document for a search response.
+
+        Args:
+            doc: Matched document
+            fields: Names from RESULT_FIELDS to include
+            query: Search query, used to position body snippets
+
+        Returns:
+            Dictionary of field names to values
+        """
+        result = {}
+        for field in fields:
+            if field == "from":
+                result["from"] = (doc.data.get("sender") or "").split("<")[0]
+            elif field == "snippet":
+                result["snippet"] = QueryProcessor.snippet(
+                    doc.data.get("body"), query, self.config["SNIPPET_LENGTH"]
+                )
+            else:
+                result[field] = doc.data.get(field)
+        return result
+
+    def parse_search_request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate search parameters from a request body.
+
+        Args:
+            payload: Parsed JSON request body
+
+        Returns:
+            Dictionary with query, top_k, offset, fields, field_weights, mode
+            and filters
+
+        Raises:
+            ValueError: If a parameter has an invalid type or value
+        """
+        query = payload.get("query", "")
+        if not isinstance(query, str):
+            raise ValueError("'query' must be a string")
+
+        top_k = payload.get("top_k", self.config["SEARCH_TOP_K"])
+        offset = payload.get("offset", 0)
+        for name, value in (("top_k", top_k), ("offset", offset)):
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"'{name}' must be a non-negative integer")
+        top_k = min(top_k, self.config["SEARCH_MAX_TOP_K"])
+
+        fields = payload.get("fields", list(DEFAULT_RESULT_FIELDS))
+        if not isinstance(fields, list) or any(f not in RESULT_FIELDS for f in fields):
+            raise ValueError(f"'fields' must be a list of {', '.join(RESULT_FIELDS)}")
+
+        field_weights = self.parse_field_weights(payload.get("field_weights"))
+
+        mode = payload.get("mode", self.config["SEARCH_MODE"])
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"'mode' must be one of {', '.join(SEARCH_MODES)}")
+
+        return {
+            "query": query,
+            "top_k": top_k,
+            "offset": offset,
+            "fields": fields,
+            "field_weights": field_weights,
+            "mode": mode,
+            "filters": self.parse_filters(payload.get("filters")),
+        }
+
+    def parse_field_weights(self, field_weights: Any) -> Optional[Dict[str, float]]:
+        """
+        Validate per-query field weights from a request body.
+
+        Args:
+            field_weights: "field_weights" object of a search request
+
+        Returns:
+            Field weights, or None to use the index weights
+
+        Raises:
+            ValueError: If weighting is disabled or the weights are invalid
+        """
+        if field_weights is None:
+            return None
+        if not self.config["FIELD_WEIGHTING"]:
+            raise ValueError("Per-query field weights are disabled")
+        if not isinstance(field_weights, dict) or any(
+            field not in WEIGHTED_FIELDS
+            or not isinstance(weight, (int, float))
+            or isinstance(weight, bool)
+            or weight < 0
+            for field, weight in field_weights.items()
+        ):
+            raise ValueError(
+                "'field_weights' must map fields from "
+                f"{', '.join(WEIGHTED_FIELDS)} to non-negative numbers"
+            )
+        if sum(field_weights.values()) <= 0:
+            raise ValueError("'field_weights' must include a positive weight")
+        return field_weights
+
+    def parse_batch_request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Validate batch search parameters from a request body.
+
+        Args:
+            payload: Parsed JSON request body
+
+        Returns:
+            Dictionary with queries, top_k, fields, field_weights and filters
+
+        Raises:
+            ValueError: If a parameter has an invalid type or value
+        """
+        queries = payload.get("queries")
+        if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+            raise ValueError("'queries' must be a list of strings")
+        if len(queries) > self.config["SEARCH_MAX_BATCH"]:
+            raise ValueError(
+                f"'queries' may hold at most {self.config['SEARCH_MAX_BATCH']} queries"
+            )
+
+        top_k = payload.get("top_k", self.config["SEARCH_BATCH_TOP_K"])
+        if not isinstance(top_k, int) or isinstance(top_k, bool) or top_k < 0:
+            raise ValueError("'top_k' must be a non-negative integer")
+
+        fields = payload.get("fields", [])
+        if not isinstance(fields, list) or any(f not in RESULT_FIELDS for f in fields):
+            raise ValueError(f"'fields' must be a list of {', '.join(RESULT_FIELDS)}")
+
+        return {
+            "queries": queries,
+            "top_k": min(top_k, self.config["SEARCH_MAX_TOP_K"]),
+            "fields": fields,
+            "field_weights": self.parse_field_weights(payload.get("field_weights")),
+            "filters": self.parse_filters(payload.get("filters")),
+        }
+
+    @staticmethod
+    def parse_filter_date(name: str, value: Any) -> int:
+        """
+        Convert a date filter value to a Unix timestamp.
+
+        Args:
+            name: Filter name, used in error messages
+            value: Unix timestamp, or ISO 8601 date or datetime string
+                   (interpreted as UTC when it has no offset)
+
+        Returns:
+            Seconds since the epoch
+
+        Raises:
+            ValueError: If the value is not a timestamp or ISO 8601 string
+        """
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return int(value)
+        if isinstance(value, str):
+            try:
+                parsed = datetime.fromisoformat(value)
+            except ValueError:
+                pass
+            else:
+                if parsed.tzinfo is None:
+                    parsed = parsed.replace(tzinfo=timezone.utc)
+                return int(parsed.timestamp())
+        raise ValueError(f"'{name}' must be a Unix timestamp or ISO 8601 date")
+
+    def parse_filters(self, filters: Any) -> Optional[Dict[str, Any]]:
+        """
+        Validate search filters and convert them to Corpus.filter_rows arguments.
+
+        Args:
+            filters: "filters" object of a search request, e.g.
+                     {"sender": "a@enron.com", "date_from": "2001-07-01",
+                     "date_to": "2001-10-01"}
+
+        Returns:
+            Keyword arguments for Corpus.filter_rows, or None if no filters
+
+        Raises:
+            ValueError: If a filter is unknown or has an invalid value
+        """
+        if filters is None:
+            return None
+        if not isinstance(filters, dict):
+            raise ValueError("'filters' must be an object")
+
+        unknown = set(filters) - set(DATE_FILTERS) - set(ADDRESS_FILTERS)
+        if unknown:
+            raise ValueError(f"Unknown filters: {', '.join(sorted(unknown))}")
+
+        parsed: Dict[str, Any] = {
+            name: self.parse_filter_date(name, filters[name])
+            for name in DATE_FILTERS
+            if filters.get(name) is not None
+        }
+        addresses = {}
+        for name in ADDRESS_FILTERS:
+            value = filters.get(name)
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else value
+            if not isinstance(values, list) or not all(isinstance(v, str) for v in values):
+                raise ValueError(f"'{name}' must be an address or a list of addresses")
+            addresses[name] = values
+        if addresses:
+            parsed["addresses"] = addresses
+        return parsed or None
+
+    def register_instrumentation(self) -> None:
+        """
+        Time every request for the Server-Timing header and /api/metrics.
+
+        A StageTimer is active while a request is handled, so stages timed
+        with metrics.span (query encoding, scoring, sorting, visualization,
+        serialization) are reported per request in the Server-Timing header
+        and aggregated into per-stage latency histograms.
+
+        Requests carrying the configured PROFILE_TOKEN (see profile_requested)
+        also run under cProfile. The profile is saved to PROFILE_DIR and named
+        in an X-Profile header, or replaces the response body with a text
+        summary when one is asked for. Only one profiler can run at a time;
+        while one is busy, profiled requests are served unprofiled with
+        "X-Profile: busy".
+        """
+
+        @self.app.before_request
+        def start_timer() -> None:
+            g.timer = StageTimer()
+            g.timer_token = g.timer.activate()
+            if self.profile_requested():
+                g.profiler = start_profiler()
+                if g.profiler is None:
+                    g.profile_busy = True
+
+        @self.app.after_request
+        def record_timing(response: Response) -> Response:
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                stop_profiler(profiler)
+                response = self.profile_response(profiler, response)
+            elif g.pop("profile_busy", False):
+                response.headers["X-Profile"] = "busy"
+
+            timer = g.get("timer")
+            if timer is None:
+                return response
+            total = timer.elapsed()
+            response.headers["Server-Timing"] = timer.server_timing(total)
+
+            endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+            metrics.counter(
+                "searchica_requests_total", "HTTP requests by endpoint and status"
+            ).inc(endpoint=endpoint, status=str(response.status_code))
+            metrics.histogram(
+                "searchica_request_seconds", "HTTP request latency by endpoint"
+            ).observe(total, endpoint=endpoint)
+            stage_seconds = metrics.histogram(
+                "searchica_stage_seconds", "Latency of request stages by endpoint"
+            )
+            for stage, seconds in timer.stages.items():
+                stage_seconds.observe(seconds, endpoint=endpoint, stage=stage)
+            return response
+
+        @self.app.teardown_request
+        def stop_timer(exc: Optional[BaseException]) -> None:
+            profiler = g.pop("profiler", None)
+            if profiler is not None:
+                stop_profiler(profiler)
+            token = g.pop("timer_token", None)
+            if token is not None:
+                StageTimer.deactivate(token)
+
+    def profile_requested(self) -> bool:
+        """
+        Check whether the current request asks to be profiled.
+
+        Profiling is off unless PROFILE_TOKEN is configured, and a request
+        opts in by sending that token in the X-Profile-Token header or the
+        profile query parameter.
+
+        Returns:
+            True if the request carries the configured token
+        """
+        token = self.config["PROFILE_TOKEN"]
+        if not token:
+            return False
+        supplied = request.headers.get(PROFILE_HEADER) or request.args.get(PROFILE_PARAM)
+        return supplied is not None and hmac.compare_digest(
+            supplied.encode("utf-8"), token.encode("utf-8")
+        )
+
+    def profile_response(self, profiler: cProfile.Profile, response: Response) -> Response:
+        """
+        Store a request profile and attach it to the response.
+
+        Args:
+            profiler: Finished profiler of the request
+            response: Response produced by the request
+
+        Returns:
+            The response with an X-Profile header naming the saved file, or a
+            plain text profile summary if the request set X-Profile-Summary
+            or the profile_summary query parameter
+        """
+        saved = None
+        if self.config["PROFILE_DIR"]:
+            saved = save_profile(profiler, str(self.config["PROFILE_DIR"]), request.path)
+            print(f"Saved profile of {request.path} to {saved}")
+
+        if request.headers.get(SUMMARY_HEADER) or request.args.get(SUMMARY_PARAM):
+            response = Response(summarize_profile(profiler), mimetype="text/plain")
+        if saved is not None:
+            response.headers["X-Profile"] = saved.name
+        return response
+
+    def update_gauges(self) -> None:
+        """Refresh the gauges exported by /api/metrics from current state."""
+        metrics.gauge("searchica_ready", "1 once the search index is loaded").set(
+            int(self.ready.is_set())
+        )
+        caches = {"embedding": Document.embedding_cache}
+        if self.ready.is_set():
+            metrics.gauge(
+                "searchica_corpus_documents", "Number of searchable documents"
+            ).set(len(self.corpus))
+            index_bytes = metrics.gauge(
+                "searchica_index_bytes", "Size of the search arrays by component"
+            )
+            for component, size in self.query_processor.memory_usage().items():
+                index_bytes.set(size, component=component)
+            caches["query"] = self.query_processor.query_cache
+
+        for cache_name, cache in caches.items():
+            if cache is None:
+                continue
+            stats = cache.stats()
+            for stat in ("hits", "misses", "size", "hit_rate"):
+                metrics.gauge(
+                    f"searchica_cache_{stat}", f"Cache {stat.replace('_', ' ')} by cache"
+                ).set(stats[stat], cache=cache_name)
 
     def register_routes(self) -> None:
         """Register Flask route handlers."""
@@ -101,51 +797,202 @@ class SearchicaApp:
             """
             Home endpoint returning API status.
 
+            Answers as soon as the server is up, including while the corpus
+            is still loading.
+
             Returns:
-                Dictionary with API status information
+                Dictionary with API status information, readiness and
+                corpus loading progress
             """
             return jsonify({"status": "running",
                             "version": "1.0",
                             "api": "searchica",
-                            "environment": ENVIRONMENT})
+                            "environment": ENVIRONMENT,
+                            "ready": self.ready.is_set(),
+                            "loading": self.load_state,
+                            "encoder_ready": encoders.is_ready(),
+                            "embedding_cache": (
+                                Document.embedding_cache.stats()
+                                if Document.embedding_cache is not None
+                                else None
+                            )})
+
+        @self.app.route("/api/metrics")
+        def prometheus_metrics() -> Response:
+            """
+            Metrics endpoint in the Prometheus text exposition format.
+
+            Exports request counts and latency histograms per endpoint and
+            per search stage, corpus size, search array sizes, cache hit
+            rates and ingestion throughput.
+
+            Returns:
+                Plain text response with every metric
+            """
+            self.update_gauges()
+            return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
         @self.app.route("/api/search", methods=["POST"])
         def search() -> Dict[str, Any]:
             """
             Search endpoint handling semantic search queries.
 
-            Expects JSON request with 'query' field.
-            Returns search results and visualization data.
+            Expects JSON request with 'query' field, and optionally:
+            - top_k: Number of results to return (default SEARCH_TOP_K)
+            - offset: Number of leading results to skip, for paging
+            - fields: Result fields to include (see RESULT_FIELDS); bodies are
+              excluded by default in favour of a snippet
+            - field_weights: Weight of each field (see WEIGHTED_FIELDS) for
+              this query, e.g. {"subject": 1, "body": 1}; omitted fields get
+              no weight. Defaults to the weights the index was built with
+            - mode: One of SEARCH_MODES (default SEARCH_MODE); "hybrid" fuses
+              full-text and semantic rankings, "filtered" scores only
+              full-text matches semantically
+            - filters: Metadata filters applied before scoring: date_from
+              (inclusive) and date_to (exclusive) as Unix timestamps or ISO
+              8601 dates, and sender, to, cc or recipient (any of to, cc,
+              bcc) as an address or list of addresses
 
             Returns:
                 Dictionary containing:
-                - plot_data: Visualization data for Plotly
-                - results: List of matched documents with metadata
+                - plot_data: Visualization data for Plotly, covering all
+                  results up to the end of the requested page
+                - results: Page of matched documents with metadata; documents
+                  deleted from the store since the index was loaded are left
+                  out, and the others keep their rank
+                - total: Number of searchable documents
             """
-            query = request.json.get("query", "")
-            results = self.query_processor.search(query)
-
-            viz_processor = VisualizationProcessor(results)
-            plot_data = viz_processor.prepare_visualization_data()
-
-            return jsonify(
-                {
-                    "plot_data": plot_data,
-                    "results": [
-                        {
-                            "id": idx,
-                            "subject": doc.data.get("subject"),
-                            "from": doc.data.get("sender", "").split("<")[0],
-                            "date": doc.data.get("date"),
-                            "body": doc.data.get("body"),
-                            "to": doc.data.get("to"),
-                            "cc": doc.data.get("cc"),
-                            "score": score,
-                        }
-                        for idx, (doc, score) in enumerate(results)
-                    ],
-                }
+            if not self.ready.is_set():
+                return self.not_ready_response()
+
+            try:
+                params = self.parse_search_request(request.get_json(silent=True) or {})
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+            query, offset = params["query"], params["offset"]
+            indices, scores = self.query_processor.search_indices(
+                query,
+                top_k=offset + params["top_k"],
+                field_weights=params["field_weights"],
+                mode=params["mode"],
+                filters=params["filters"],
             )
+            with span("fetch"):
+                documents = self.corpus.get_documents(indices)
+            found = [
+                (rank, idx, doc, float(score))
+                for rank, (idx, doc, score) in enumerate(zip(indices, documents, scores))
+                if doc is not None
+            ]
+
+            with span("visualize"):
+                viz_processor = VisualizationProcessor(
+                    [(doc, score) for _, _, doc, score in found],
+                    embeddings_2d=self.projection[[idx for _, idx, _, _ in found]],
+                )
+                plot_data = viz_processor.prepare_visualization_data()
+
+            with span("format"):
+                page = [
+                    {
+                        "id": self.query_processor.doc_ids[idx],
+                        "rank": rank,
+                        **self.format_result(doc, params["fields"], query),
+                        "score": score,
+                    }
+                    for rank, idx, doc, score in found
+                    if rank >= offset
+                ]
+
+            with span("serialize"):
+                return jsonify(
+                    {
+                        "plot_data": plot_data,
+                        "total": len(self.corpus),
+                        "offset": offset,
+                        "results": page,
+                    }
+                )
+
+        @self.app.route("/api/search/batch", methods=["POST"])
+        def search_batch() -> Dict[str, Any]:
+            """
+            Batch endpoint running many semantic searches in one request.
+
+            Encodes all queries in one model call and scores them with one
+            matrix product per block of queries; no visualization is computed.
+
+            Expects JSON request with 'queries' (list of query strings, at most
+            SEARCH_MAX_BATCH), and optionally:
+            - top_k: Number of results per query (default SEARCH_BATCH_TOP_K)
+            - fields: Result fields to include (see RESULT_FIELDS); none by
+              default, so results carry only IDs and scores
+            - field_weights: Weight of each field, shared by all queries
+            - filters: Metadata filters shared by all queries (see /api/search)
+
+            Returns:
+                Dictionary containing:
+                - results: One entry per query, in request order, with the
+                  query and its ranked matches
+                - total: Number of searchable documents
+            """
+            if not self.ready.is_set():
+                return self.not_ready_response()
+
+            try:
+                params = self.parse_batch_request(request.get_json(silent=True) or {})
+                ranked = self.query_processor.search_many(
+                    params["queries"],
+                    top_k=params["top_k"],
+                    field_weights=params["field_weights"],
+                    filters=params["filters"],
+                )
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 400
+
+            documents: Dict[int, Optional[Document]] = {}
+            if params["fields"]:
+                with span("fetch"):
+                    rows = sorted({int(idx) for indices, _ in ranked for idx in indices})
+                    documents = dict(zip(rows, self.corpus.get_documents(rows)))
+
+            results = []
+            with span("format"):
+                for query, (indices, scores) in zip(params["queries"], ranked):
+                    matches = []
+                    for idx, score in zip(indices.tolist(), scores.tolist()):
+                        match = {"id": self.query_processor.doc_ids[idx]}
+                        if documents.get(idx) is not None:
+                            match.update(
+                                self.format_result(documents[idx], params["fields"], query)
+                            )
+                        match["score"] = score
+                        matches.append(match)
+                    results.append({"query": query, "results": matches})
+
+            with span("serialize"):
+                return jsonify({"total": len(self.corpus), "results": results})
+
+        @self.app.route("/api/documents/<path:doc_id>")
+        def get_document(doc_id: str) -> Dict[str, Any]:
+            """
+            Fetch the full content of a single document.
+
+            Args:
+                doc_id: Stable document ID as returned by search
+
+            Returns:
+                Dictionary with the document ID and all result fields
+            """
+            if not self.ready.is_set():
+                return self.not_ready_response()
+
+            doc = self.doc_store.load_document(doc_id)
+            if doc is None:
+                return jsonify({"error": "Document not found"}), 404
+            fields = [field for field in RESULT_FIELDS if field != "snippet"]
+            return jsonify({"id": doc_id, **self.format_result(doc, fields, "")})
 
         if not IS_DEVELOPMENT:
             @self.app.route('/')
@@ -0,0 +1,508 @@
+from functools import partial
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from documents import Document, NO_DATE, parse_addresses
+from document_store import DocumentStore
+from string_array import StringArray
+
+
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    Scale each row of a matrix to unit length.
+
+    Zero rows are left as zeros rather than producing NaNs.
+
+    Args:
+        matrix: 2D array of row vectors
+
+    Returns:
+        Contiguous float32 array of L2-normalized rows
+    """
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class DictionaryColumn:
+    """
+    Dictionary-encoded string column.
+
+    Stores each distinct value once and one small integer code per row, which
+    is far more compact than a Python string per row for repetitive metadata
+    such as senders. Missing values use code -1.
+    """
+
+    def __init__(self, codes: np.ndarray, values: Sequence[str]) -> None:
+        """
+        Initialize column from codes and their dictionary.
+
+        Args:
+            codes: Integer code per row, indexing into values (-1 for missing)
+            values: Distinct values, e.g. a list or a memory-mapped StringArray
+        """
+        self.codes = codes
+        self.values = values
+        self._lookup: Optional[Dict[str, int]] = None
+
+    @classmethod
+    def encode(cls, values: Sequence[Optional[str]]) -> "DictionaryColumn":
+        """
+        Dictionary-encode a sequence of values.
+
+        Args:
+            values: One value per row, None for missing
+
+        Returns:
+            Encoded column
+        """
+        dictionary: Dict[str, int] = {}
+        codes = np.fromiter(
+            (
+                -1 if value is None else dictionary.setdefault(value, len(dictionary))
+                for value in values
+            ),
+            dtype=np.int32,
+            count=len(values),
+        )
+        return cls(codes, list(dictionary))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, row: int) -> Optional[str]:
+        code = self.codes[row]
+        return None if code < 0 else self.values[code]
+
+    def code_of(self, value: str) -> int:
+        """
+        Get the code of a value.
+
+        Args:
+            value: Value to look up
+
+        Returns:
+            Code of the value, or -1 if no row has it
+        """
+        if self._lookup is None:
+            self._lookup = {value: code for code, value in enumerate(self.values)}
+        return self._lookup.get(value, -1)
+
+
+class Corpus:
+    """
+    Columnar in-memory representation of a searchable document collection.
+
+    Holds only what scoring and filtering touch: the normalized combined-vector
+    matrix, document IDs, dictionary-encoded sender/recipient columns and dates
+    as int64 timestamps. Full documents, including bodies, are fetched from the
+    DocumentStore only for the rows being rendered. A corpus can also wrap
+    documents already held in memory, in which case nothing is fetched.
+
+    Optionally it also holds per-field matrices of shape (documents, fields,
+    dim) with each field vector normalized separately, so field weights can be
+    chosen per query instead of being baked into the combined matrix.
+
+    A corpus loaded with from_snapshot keeps every array, including document
+    IDs and the metadata dictionaries, memory-mapped from the store snapshot,
+    so server worker processes share them instead of each holding a copy.
+    """
+
+    # Metadata fields kept as dictionary-encoded columns
+    COLUMN_FIELDS = ("sender", "to", "cc")
+
+    # Address filters and the header roles each one matches
+    ADDRESS_FILTERS = {
+        "sender": ("sender",),
+        "to": ("to",),
+        "cc": ("cc",),
+        "recipient": ("to", "cc", "bcc"),
+    }
+
+    def __init__(
+        self,
+        doc_ids: Sequence[str],
+        matrix: np.ndarray,
+        columns: Dict[str, DictionaryColumn],
+        dates: np.ndarray,
+        store: Optional[DocumentStore] = None,
+        documents: Optional[List[Document]] = None,
+        field_matrices: Optional[np.ndarray] = None,
+        field_names: Sequence[str] = (),
+    ) -> None:
+        """
+        Initialize corpus from prepared columns.
+
+        Args:
+            doc_ids: Stable document IDs, one per matrix row
+            matrix: Normalized combined-vector matrix
+            columns: Dictionary-encoded metadata columns by field name
+            dates: Unix timestamp per document (NO_DATE when unknown)
+            store: Store to fetch full documents from
+            documents: Documents held in memory, aligned with doc_ids; takes
+                       precedence over store
+            field_matrices: Per-field normalized vectors of shape
+                            (documents, len(field_names), dim)
+            field_names: Fields along the second axis of field_matrices
+        """
+        self.doc_ids = doc_ids
+        self.matrix = matrix
+        self.columns = columns
+        self.dates = dates
+        self.store = store
+        self.documents = documents
+        self.field_matrices = field_matrices
+        self.field_names = tuple(field_names)
+        self._row_lookup: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Report the size of the corpus arrays.
+
+        Memory-mapped arrays count their full mapped size, although only the
+        pages touched by searches are resident.
+
+        Returns:
+            Dictionary mapping each component to its size in bytes
+        """
+        usage = {
+            "matrix": self.matrix.nbytes,
+            "columns": sum(column.codes.nbytes for column in self.columns.values()),
+            "dates": self.dates.nbytes,
+        }
+        if isinstance(self.doc_ids, StringArray):
+            usage["doc_ids"] = self.doc_ids.nbytes
+        if self.field_matrices is not None:
+            usage["field_matrices"] = self.field_matrices.nbytes
+        return usage
+
+    @classmethod
+    def build_matrix(cls, documents: List[Document]) -> np.ndarray:
+        """
+        Stack combined document vectors into a normalized scoring matrix.
+
+        Args:
+            documents: Documents to include, in search order
+
+        Returns:
+            Float32 array of shape (len(documents), dim) with unit-length rows
+        """
+        if not documents:
+            return np.zeros((0, 0), dtype=np.float32)
+        return normalize_rows(np.stack([doc.get_combined_vector() for doc in documents]))
+
+    @staticmethod
+    def build_field_matrices(
+        vectors: Iterable[Dict[str, np.ndarray]],
+        field_names: Sequence[str],
+        count: int,
+        allocate: Optional[Callable[[Tuple[int, ...]], np.ndarray]] = None,
+    ) -> np.ndarray:
+        """
+        Stack normalized field vectors into one array of per-field matrices.
+
+        Fields a document lacks stay zero, so they contribute nothing to any
+        weighted score. The array is allocated once the vector dimension is
+        known from the first encoded document.
+
+        Args:
+            vectors: Field vectors of each document, in row order
+            field_names: Fields to keep, in column order
+            count: Number of documents
+            allocate: Returns a zeroed float32 array of a given shape, e.g. a
+                      writable snapshot memmap; defaults to np.zeros
+
+        Returns:
+            Array of shape (count, len(field_names), dim)
+        """
+        if allocate is None:
+            allocate = partial(np.zeros, dtype=np.float32)
+
+        out: Optional[np.ndarray] = None
+        for row, doc_vectors in enumerate(vectors):
+            for col, field in enumerate(field_names):
+                vector = doc_vectors.get(field)
+                if vector is None:
+                    continue
+                if out is None:
+                    out = allocate((count, len(field_names), vector.shape[0]))
+                norm = np.linalg.norm(vector)
+                if norm > 0:
+                    out[row, col] = vector / norm
+        if out is None:
+            return allocate((count, len(field_names), 0))
+        return out
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: List[Document],
+        doc_ids: Optional[List[str]] = None,
+        matrix: Optional[np.ndarray] = None,
+        field_names: Optional[Sequence[str]] = None,
+    ) -> "Corpus":
+        """
+        Build a corpus over documents held in memory.
+
+        Per-field matrices are built together with the scoring matrix, so
+        they are only available when no precomputed matrix is given.
+
+        Args:
+            documents: Documents to include
+            doc_ids: Stable IDs of the documents; defaults to row positions
+            matrix: Precomputed scoring matrix; built from the documents'
+                    vectors when omitted
+            field_names: Fields for per-field matrices; defaults to the
+                         weighted fields of the first document
+
+        Returns:
+            Corpus keeping the documents in memory
+        """
+        field_matrices = None
+        if matrix is None:
+            matrix = cls.build_matrix(documents)
+            if documents:
+                if field_names is None:
+                    field_names = tuple(documents[0].field_weights)
+                field_matrices = cls.build_field_matrices(
+                    (doc.to_vectors() for doc in documents), field_names, len(documents)
+                )
+        if doc_ids is None:
+            doc_ids = [str(i) for i in range(max(len(documents), matrix.shape[0]))]
+        columns = {
+            field: DictionaryColumn.encode([doc.data.get(field) for doc in documents])
+            for field in cls.COLUMN_FIELDS
+        }
+        dates = np.array([doc.timestamp() for doc in documents], dtype=np.int64)
+        return cls(
+            doc_ids,
+            matrix,
+            columns,
+            dates,
+            documents=documents,
+            field_matrices=field_matrices,
+            field_names=field_names or (),
+        )
+
+    @classmethod
+    def from_store(
+        cls,
+        store: DocumentStore,
+        field_weights: Dict[str, float],
+        matrix: Optional[np.ndarray] = None,
+    ) -> "Corpus":
+        """
+        Build a corpus from a document store without materializing documents.
+
+        Metadata columns are extracted inside SQLite and dates come from the
+        store's parsed timestamp column. When no matrix is given
+        (e.g. no valid snapshot), it is built by streaming stored vectors into
+        a preallocated array.
+
+        Args:
+            store: Populated document store
+            field_weights: Weights used to combine field vectors
+            matrix: Precomputed scoring matrix in store ID order
+
+        Returns:
+            Corpus fetching full documents from the store on demand
+        """
+        metadata = store.load_metadata_columns(list(cls.COLUMN_FIELDS))
+        doc_ids = metadata["id"]
+        if matrix is None:
+            matrix = cls.build_matrix_from_store(store, field_weights, len(doc_ids))
+
+        columns = {
+            field: DictionaryColumn.encode(metadata[field])
+            for field in cls.COLUMN_FIELDS
+        }
+        dates = store.load_timestamps()
+        return cls(doc_ids, matrix, columns, dates, store=store)
+
+    @classmethod
+    def from_snapshot(
+        cls, store: DocumentStore, fingerprint: Dict[str, Any]
+    ) -> Optional["Corpus"]:
+        """
+        Map a corpus written by write_snapshot from the store snapshot.
+
+        Nothing is copied into process memory: the matrix, document IDs,
+        metadata columns and dates all stay memory-mapped read-only.
+
+        Args:
+            store: Document store whose snapshot directory holds the corpus
+            fingerprint: Expected value from store.snapshot_fingerprint()
+
+        Returns:
+            Corpus fetching full documents from the store on demand, or None
+            if any part of the snapshot is missing, stale or does not match
+            the stored document IDs
+        """
+        snapshot = store.load_snapshot(fingerprint)
+        if snapshot is None:
+            return None
+        doc_ids, matrix = snapshot
+        # Guard against a snapshot whose fingerprint matches by accident,
+        # e.g. after the database was restored from a backup
+        count, first, last = store.document_id_range()
+        if len(doc_ids) != count or (count and (doc_ids[0], doc_ids[-1]) != (first, last)):
+            return None
+
+        columns = {}
+        for field in cls.COLUMN_FIELDS:
+            codes = store.load_snapshot_array(f"column_{field}_codes", fingerprint)
+            values = store.load_snapshot_array(f"column_{field}_values", fingerprint)
+            if codes is None or values is None or len(codes) != len(doc_ids):
+                return None
+            columns[field] = DictionaryColumn(codes, StringArray(values))
+        dates = store.load_snapshot_array("dates", fingerprint)
+        if dates is None or len(dates) != len(doc_ids):
+            return None
+        return cls(doc_ids, matrix, columns, dates, store=store)
+
+    def write_snapshot(self, store: DocumentStore, fingerprint: Dict[str, Any]) -> None:
+        """
+        Persist the corpus to the store snapshot for from_snapshot.
+
+        Args:
+            store: Document store the corpus was built from
+            fingerprint: Value from store.snapshot_fingerprint() describing it
+        """
+        for field, column in self.columns.items():
+            store.write_snapshot_array(f"column_{field}_codes", column.codes, fingerprint)
+            store.write_snapshot_array(
+                f"column_{field}_values",
+                StringArray.from_strings(column.values).data,
+                fingerprint,
+            )
+        store.write_snapshot_array("dates", self.dates, fingerprint)
+        # The matrix goes last: its metadata file marks the snapshot complete
+        store.write_snapshot(self.doc_ids, self.matrix, fingerprint)
+
+    @staticmethod
+    def build_matrix_from_store(
+        store: DocumentStore, field_weights: Dict[str, float], count: int
+    ) -> np.ndarray:
+        """
+        Build the normalized scoring matrix from stored field vectors.
+
+        Args:
+            store: Populated document store
+            field_weights: Weights used to combine field vectors
+            count: Number of stored documents
+
+        Returns:
+            Float32 matrix with one unit-length row per document, in ID order
+        """
+        matrix: Optional[np.ndarray] = None
+        for row, (_, _, vectors) in enumerate(store.iter_vectors()):
+            combined = Document.combine_vectors(vectors, field_weights)
+            if matrix is None:
+                matrix = np.zeros((count, combined.shape[0]), dtype=np.float32)
+            matrix[row] = combined
+        if matrix is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return matrix
+
+    def rows_of(self, doc_ids: Sequence[str]) -> np.ndarray:
+        """
+        Map document IDs to their corpus rows.
+
+        Args:
+            doc_ids: Stable document IDs
+
+        Returns:
+            Row position per ID, -1 for IDs not in the corpus
+        """
+        if isinstance(self.doc_ids, StringArray) and self.doc_ids.is_sorted():
+            return self.doc_ids.positions(doc_ids)
+        if self._row_lookup is None:
+            self._row_lookup = {doc_id: row for row, doc_id in enumerate(self.doc_ids)}
+        return np.array(
+            [self._row_lookup.get(doc_id, -1) for doc_id in doc_ids], dtype=np.int64
+        )
+
+    def filter_rows(
+        self,
+        date_from: Optional[int] = None,
+        date_to: Optional[int] = None,
+        addresses: Optional[Dict[str, List[str]]] = None,
+    ) -> Optional[np.ndarray]:
+        """
+        Select the rows matching metadata filters, before any scoring.
+
+        Date bounds are applied as a boolean mask over the timestamp column;
+        address filters are looked up in the store's address index (or
+        checked against in-memory documents). All filters must match.
+
+        Args:
+            date_from: Earliest Unix timestamp, inclusive
+            date_to: Latest Unix timestamp, exclusive
+            addresses: Addresses to match per filter name in ADDRESS_FILTERS;
+                       a row matches a filter if any of its addresses match
+
+        Returns:
+            Sorted array of matching rows, or None if no filter was given
+
+        Raises:
+            ValueError: If an address filter name is unknown
+        """
+        mask: Optional[np.ndarray] = None
+        if date_from is not None or date_to is not None:
+            mask = self.dates != NO_DATE
+            if date_from is not None:
+                mask &= self.dates >= date_from
+            if date_to is not None:
+                mask &= self.dates < date_to
+
+        for name, values in (addresses or {}).items():
+            if name not in self.ADDRESS_FILTERS:
+                raise ValueError(f"Unknown address filter: {name}")
+            address_mask = self.address_mask(values, self.ADDRESS_FILTERS[name])
+            mask = address_mask if mask is None else mask & address_mask
+
+        return None if mask is None else np.flatnonzero(mask)
+
+    def address_mask(self, addresses: List[str], roles: Tuple[str, ...]) -> np.ndarray:
+        """
+        Mark the rows with any of the given addresses in any of the roles.
+
+        Args:
+            addresses: Email addresses, matched case-insensitively
+            roles: Header roles to match
+
+        Returns:
+            Boolean array with one entry per row
+        """
+        mask = np.zeros(len(self), dtype=bool)
+        if self.documents is not None:
+            wanted = {address for value in addresses for address in parse_addresses(value)}
+            for row, doc in enumerate(self.documents):
+                found = doc.addresses()
+                mask[row] = any(wanted.intersection(found.get(role, ())) for role in roles)
+        elif self.store is not None:
+            rows = self.rows_of(self.store.find_documents_by_address(addresses, roles))
+            mask[rows[rows >= 0]] = True
+        return mask
+
+    def get_documents(self, rows: Sequence[int]) -> List[Optional[Document]]:
+        """
+        Get full documents for corpus rows, e.g. a page of search results.
+
+        Args:
+            rows: Row positions in the corpus
+
+        Returns:
+            Documents in the order of rows (None if no longer in the store)
+        """
+        if self.documents is not None:
+            return [self.documents[row] for row in rows]
+        if self.store is None:
+            return [None for _ in rows]
+        return self.store.load_documents([self.doc_ids[row] for row in rows])
@@ -1,8 +1,147 @@
 import sqlite3
 import numpy as np
 import json
-from typing import List, Optional, Dict, Type
-from documents import Document, Email
+import os
+import re
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, List, Optional, Dict, Sequence, Type, Tuple
+from documents import Document, Email, NO_DATE, parse_addresses
+from sqlite_vectors import TEXT_HASH_SIZE, VECTOR_DTYPE, select_in, text_hash
+from string_array import StringArray
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks, single process only
+    fcntl = None
+
+# Bump when the on-disk layout changes and add a matching step to migrate()
+SCHEMA_VERSION = 7
+
+# Bump when the layout of the embedding snapshot files changes
+SNAPSHOT_VERSION = 2
+
+# Field values are keyed by text_hash() of their text
+VALUE_HASH_SIZE = TEXT_HASH_SIZE
+
+
+INSERT_DOCUMENT_SQL = """
+    INSERT OR REPLACE INTO documents (id, type, data, fields, value_hashes, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+
+INSERT_FIELD_VALUE_SQL = "INSERT OR IGNORE INTO field_values (hash, vector) VALUES (?, ?)"
+
+
+CREATE_FIELD_VALUES_SQL = """
+    CREATE TABLE IF NOT EXISTS field_values (
+        hash BLOB PRIMARY KEY,     -- Truncated SHA-256 of the field text
+        vector BLOB                -- Packed little-endian float32 vector
+    )
+"""
+
+
+INSERT_ADDRESS_SQL = "INSERT OR IGNORE INTO addresses (address) VALUES (?)"
+
+
+INSERT_DOCUMENT_ADDRESS_SQL = """
+    INSERT OR IGNORE INTO document_addresses (doc_id, role, address_id)
+    SELECT ?, ?, id FROM addresses WHERE address = ?
+"""
+
+
+# BM25 weights of the full-text index columns (subject, body)
+FTS_COLUMN_WEIGHTS = (2.0, 1.0)
+
+
+# Keeps documents_fts in step with documents. Full-text rows share the rowid
+# of their document; the BEFORE INSERT trigger drops the entry of a row about
+# to be replaced, since REPLACE deletions do not fire delete triggers.
+FTS_TRIGGERS = {
+    "documents_fts_replace": """
+        BEFORE INSERT ON documents
+        BEGIN
+            DELETE FROM documents_fts
+            WHERE rowid = (SELECT rowid FROM documents WHERE id = new.id);
+        END
+    """,
+    "documents_fts_insert": """
+        AFTER INSERT ON documents
+        BEGIN
+            INSERT INTO documents_fts (rowid, subject, body) VALUES (
+                new.rowid,
+                json_extract(new.data, '$.subject'),
+                json_extract(new.data, '$.body')
+            );
+        END
+    """,
+    "documents_fts_update": """
+        AFTER UPDATE ON documents
+        BEGIN
+            DELETE FROM documents_fts WHERE rowid = old.rowid;
+            INSERT INTO documents_fts (rowid, subject, body) VALUES (
+                new.rowid,
+                json_extract(new.data, '$.subject'),
+                json_extract(new.data, '$.body')
+            );
+        END
+    """,
+    "documents_fts_delete": """
+        AFTER DELETE ON documents
+        BEGIN
+            DELETE FROM documents_fts WHERE rowid = old.rowid;
+        END
+    """,
+    "document_addresses_replace": """
+        BEFORE INSERT ON documents
+        BEGIN
+            DELETE FROM document_addresses WHERE doc_id = new.id;
+        END
+    """,
+    "document_addresses_delete": """
+        AFTER DELETE ON documents
+        BEGIN
+            DELETE FROM document_addresses WHERE doc_id = old.id;
+        END
+    """,
+}
+
+
+INSERT_PROGRESS_SQL = """
+    INSERT OR REPLACE INTO ingest_progress (source, position, size, complete, digest)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Document IDs the first versions derived from mbox positions, e.g. email_12
+LEGACY_ID_PATTERN = "email_[0-9]*"
+
+
+@contextmanager
+def loader_lock(db_path: str) -> Iterator[None]:
+    """
+    Hold an exclusive lock while a store is ingested and indexed.
+
+    Server worker processes all start from the same store. The first to take
+    the lock migrates, ingests and writes the snapshot; the others block until
+    it is released, then find the snapshot current and map it instead of
+    building their own. The lock is an advisory flock on a file next to the
+    database, released when the holder exits or dies. A no-op where fcntl is
+    unavailable.
+
+    Args:
+        db_path: Path to the SQLite database file
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(f"{db_path}.lock", "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
 
 
 class DocumentStore:
@@ -12,16 +151,40 @@ class DocumentStore:
     Handles persistence of Document objects and their computed vector embeddings,
     allowing for efficient storage and retrieval of processed documents. Supports
     different document types through a type mapping system.
+
+    Field vectors are stored once per distinct field text in a value table
+    keyed by a hash of the text, and documents reference them by hash, so
+    values repeated across emails (senders, recipients, quoted bodies) are
+    stored and encoded once. Replacing or deleting documents leaves their
+    values behind; prune_field_values reclaims the ones no document references
+    any more. The schema version is tracked with SQLite's
+    user_version pragma so older cache files are upgraded in place on open.
+
+    Alongside the database the store can keep a snapshot directory holding the
+    normalized combined-vector matrix as a .npy file plus the matching document
+    IDs, so servers can memory-map the search index instead of rebuilding it.
+    Server worker processes mapping the same snapshot share one copy of it
+    through the OS page cache.
+
+    Subjects and bodies are also indexed in an FTS5 table kept up to date by
+    triggers, for BM25-ranked lexical search. Dates and sender/recipient
+    addresses are parsed on write into an indexed timestamp column and a
+    normalized address table, so searches can be filtered without scanning.
     """
 
-    def __init__(self, db_path: str) -> None:
+    def __init__(self, db_path: str, snapshot_path: Optional[str] = None) -> None:
         """
         Initialize store with database path.
 
         Args:
             db_path: Path to SQLite database file
+            snapshot_path: Directory for the embedding snapshot; defaults to the
+                           database path with a .snapshot suffix
         """
         self.db_path = db_path
+        self.snapshot_path = Path(
+            snapshot_path or Path(db_path).with_suffix(".snapshot")
+        )
         self.type_map: Dict[str, Type[Document]] = {
             "Email": Email,
             "Document": Document,
@@ -32,29 +195,353 @@ class DocumentStore:
         """
         Initialize database with required schema.
 
-        Creates the documents table if it doesn't exist. Table stores:
+        Creates the documents table if it doesn't exist and migrates databases
+        written by older versions. Table stores:
         - Document ID
         - Document type (for proper reconstruction)
         - JSON-serialized document data
-        - JSON-serialized vector embeddings
+        - JSON list of field names, in the order of their value hashes
+        - Concatenated hashes of the field texts, keys into field_values
+        - Unix timestamp of the document date (NULL if unknown)
+
+        The field_values table maps each distinct field text hash to its
+        packed float32 embedding.
+
+        Also maintains a generation counter in store_meta that triggers bump on
+        every change to the documents table and a random store ID chosen when
+        the database is created, together used to detect stale snapshots,
+        an ingest_progress table recording how far each source was read, the
+        documents_fts full-text index over subjects and bodies, and the
+        addresses/document_addresses tables linking documents to normalized
+        sender and recipient addresses.
         """
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
 
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self.migrate(conn, version)
+
         c.execute(
             """
             CREATE TABLE IF NOT EXISTS documents (
                 id TEXT PRIMARY KEY,
                 type TEXT,                 -- Document class name for reconstruction
                 data TEXT,                 -- JSON-serialized document data
-                vectors TEXT               -- JSON-serialized vector embeddings
+                fields TEXT,               -- JSON list of vector field names
+                value_hashes BLOB,         -- Field value hashes, in fields order
+                timestamp INTEGER          -- Document date as Unix time
+            )
+        """
+        )
+        c.execute(CREATE_FIELD_VALUES_SQL)
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS documents_timestamp ON documents (timestamp)"
+        )
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS addresses (
+                id INTEGER PRIMARY KEY,
+                address TEXT UNIQUE        -- Lowercased email address
             )
         """
         )
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS document_addresses (
+                doc_id TEXT,
+                role TEXT,                 -- Header: sender, to, cc or bcc
+                address_id INTEGER,
+                PRIMARY KEY (address_id, role, doc_id)
+            ) WITHOUT ROWID
+        """
+        )
+        c.execute(
+            "CREATE INDEX IF NOT EXISTS document_addresses_doc ON document_addresses (doc_id)"
+        )
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS store_meta (
+                key TEXT PRIMARY KEY,
+                value INTEGER
+            )
+        """
+        )
+        c.execute("INSERT OR IGNORE INTO store_meta (key, value) VALUES ('generation', 0)")
+        c.execute(
+            "INSERT OR IGNORE INTO store_meta (key, value) VALUES ('store_id', ?)",
+            (secrets.randbits(63),),
+        )
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            c.execute(
+                f"""
+                CREATE TRIGGER IF NOT EXISTS documents_generation_{event.lower()}
+                AFTER {event} ON documents
+                BEGIN
+                    UPDATE store_meta SET value = value + 1 WHERE key = 'generation';
+                END
+            """
+            )
+        c.execute(
+            """
+            CREATE TABLE IF NOT EXISTS ingest_progress (
+                source TEXT PRIMARY KEY,   -- Identifier of the ingested mailbox
+                position INTEGER,          -- Messages consumed so far
+                size INTEGER,              -- Source file size when recorded
+                complete INTEGER,          -- 1 once the whole source was read
+                digest TEXT                -- Hash of the source up to size
+            )
+        """
+        )
+        c.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts
+            USING fts5(subject, body)  -- rowid matches documents.rowid
+        """
+        )
+        for name, body in FTS_TRIGGERS.items():
+            c.execute(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+        if version < 4:
+            c.execute(
+                """
+                INSERT INTO documents_fts (rowid, subject, body)
+                SELECT rowid, json_extract(data, '$.subject'), json_extract(data, '$.body')
+                FROM documents
+            """
+            )
+        if version < 5:
+            self.backfill_metadata(conn)
+        c.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
         conn.commit()
         conn.close()
 
+    def migrate(self, conn: sqlite3.Connection, version: int) -> None:
+        """
+        Upgrade an existing database to the current schema version.
+
+        Args:
+            conn: Open connection to the database being upgraded
+            version: Schema version the database is currently at
+        """
+        if version < 1:
+            self.migrate_json_vectors(conn)
+        # Version 2 only adds store_meta and its triggers, created by init_db
+        # Version 3 only adds ingest_progress, created by init_db
+        # Version 4 adds documents_fts, created and filled by init_db
+        if version < 5:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(documents)")]
+            if columns and "timestamp" not in columns:
+                conn.execute("ALTER TABLE documents ADD COLUMN timestamp INTEGER")
+            # The address tables are created and filled by init_db
+        if version < 6:
+            self.migrate_value_table(conn)
+        if version < 7:
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(ingest_progress)")]
+            if columns and "digest" not in columns:
+                conn.execute("ALTER TABLE ingest_progress ADD COLUMN digest TEXT")
+
+    @classmethod
+    def migrate_json_vectors(cls, conn: sqlite3.Connection) -> None:
+        """
+        Convert a version 0 database with JSON-encoded vectors to packed BLOBs.
+
+        Version 0 databases have no user_version set and store vectors as a
+        JSON object of float lists. Rows are rewritten into the new layout in
+        a single transaction. Empty or brand new databases are left untouched.
+
+        Args:
+            conn: Open connection to the database being upgraded
+        """
+        c = conn.cursor()
+        columns = [row[1] for row in c.execute("PRAGMA table_info(documents)")]
+        if not columns or "fields" in columns:
+            return
+
+        print("Migrating document store to binary vector storage")
+        c.execute("ALTER TABLE documents RENAME TO documents_v0")
+        c.execute(
+            """
+            CREATE TABLE documents (
+                id TEXT PRIMARY KEY,
+                type TEXT,
+                data TEXT,
+                fields TEXT,
+                vectors BLOB
+            )
+        """
+        )
+
+        read = conn.cursor()
+        read.execute("SELECT id, type, data, vectors FROM documents_v0")
+        while True:
+            rows = read.fetchmany(1000)
+            if not rows:
+                break
+            c.executemany(
+                "INSERT INTO documents (id, type, data, fields, vectors) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (
+                        doc_id,
+                        doc_type,
+                        data,
+                        *cls.pack_vectors(
+                            {
+                                field: np.array(vec)
+                                for field, vec in json.loads(vectors).items()
+                            }
+                        ),
+                    )
+                    for doc_id, doc_type, data, vectors in rows
+                ],
+            )
+
+        c.execute("DROP TABLE documents_v0")
+        conn.commit()
+
+    @classmethod
+    def migrate_value_table(cls, conn: sqlite3.Connection) -> None:
+        """
+        Move per-document vector BLOBs into the shared field value table.
+
+        Rows keep their rowids so the full-text index stays aligned. Space
+        freed by duplicate vectors is reused by SQLite but the file only
+        shrinks after a VACUUM.
+
+        Args:
+            conn: Open connection to the database being upgraded
+        """
+        c = conn.cursor()
+        columns = [row[1] for row in c.execute("PRAGMA table_info(documents)")]
+        if not columns or "value_hashes" in columns:
+            return
+
+        print("Migrating document store to shared field value vectors")
+        c.execute(CREATE_FIELD_VALUES_SQL)
+        c.execute("ALTER TABLE documents RENAME TO documents_v5")
+        c.execute(
+            """
+            CREATE TABLE documents (
+                id TEXT PRIMARY KEY,
+                type TEXT,
+                data TEXT,
+                fields TEXT,
+                value_hashes BLOB,
+                timestamp INTEGER
+            )
+        """
+        )
+
+        read = conn.cursor()
+        read.execute(
+            "SELECT rowid, id, type, data, fields, vectors, timestamp FROM documents_v5"
+        )
+        while True:
+            rows = read.fetchmany(1000)
+            if not rows:
+                break
+            document_rows = []
+            value_rows = []
+            for rowid, doc_id, doc_type, data, fields, vectors, timestamp in rows:
+                texts = json.loads(data)
+                field_vectors = cls.unpack_vectors(fields, vectors)
+                hashes = [cls.value_hash(str(texts.get(field))) for field in field_vectors]
+                value_rows.extend(
+                    (value_hash, vector.tobytes())
+                    for value_hash, vector in zip(hashes, field_vectors.values())
+                )
+                document_rows.append(
+                    (rowid, doc_id, doc_type, data, fields, b"".join(hashes), timestamp)
+                )
+            c.executemany(INSERT_FIELD_VALUE_SQL, value_rows)
+            c.executemany(
+                """
+                INSERT INTO documents (rowid, id, type, data, fields, value_hashes, timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+                document_rows,
+            )
+
+        c.execute("DROP TABLE documents_v5")
+        conn.commit()
+
+    def backfill_metadata(self, conn: sqlite3.Connection) -> None:
+        """
+        Parse dates and addresses of documents written before version 5.
+
+        Args:
+            conn: Open connection to the database being upgraded
+        """
+        read = conn.cursor()
+        read.execute("SELECT id, type, data FROM documents")
+        while True:
+            rows = read.fetchmany(1000)
+            if not rows:
+                break
+            timestamps = []
+            address_rows = []
+            for doc_id, doc_type, data in rows:
+                document = self.build_document(doc_type, data)
+                if document is None:
+                    continue
+                timestamps.append((self.stored_timestamp(document), doc_id))
+                address_rows.extend(self.address_rows(doc_id, document))
+            conn.executemany("UPDATE documents SET timestamp = ? WHERE id = ?", timestamps)
+            self.write_addresses(conn, address_rows)
+
+    @staticmethod
+    def value_hash(text: str) -> bytes:
+        """
+        Compute the field value table key of a field text.
+
+        Args:
+            text: Field text as passed to the encoder
+
+        Returns:
+            VALUE_HASH_SIZE-byte digest, the same key the embedding cache uses
+        """
+        return text_hash(text)
+
+    @staticmethod
+    def pack_vectors(vectors: Dict[str, np.ndarray]) -> Tuple[str, bytes]:
+        """
+        Pack a document's field vectors into a single binary BLOB.
+
+        This was the per-document storage layout before version 6; it is
+        still used when upgrading older databases.
+
+        Args:
+            vectors: Dictionary mapping field names to equal-length vectors
+
+        Returns:
+            Tuple of (JSON list of field names, packed float32 bytes)
+        """
+        fields = list(vectors.keys())
+        if not fields:
+            return json.dumps(fields), b""
+        packed = np.stack([vectors[field] for field in fields]).astype(VECTOR_DTYPE)
+        return json.dumps(fields), packed.tobytes()
+
+    @staticmethod
+    def unpack_vectors(fields: str, blob: bytes) -> Dict[str, np.ndarray]:
+        """
+        Decode a packed vector BLOB back into per-field vectors.
+
+        Vectors are zero-copy views over the BLOB bytes.
+
+        Args:
+            fields: JSON list of field names in packing order
+            blob: Packed float32 bytes written by pack_vectors
+
+        Returns:
+            Dictionary mapping field names to float32 vectors
+        """
+        names = json.loads(fields)
+        if not names:
+            return {}
+        matrix = np.frombuffer(blob, dtype=VECTOR_DTYPE).reshape(len(names), -1)
+        return dict(zip(names, matrix))
+
     def save_document(self, doc_id: str, document: Document) -> None:
         """
         Save document and its vector embeddings to database.
@@ -67,29 +554,139 @@ class DocumentStore:
             Replaces existing document if doc_id already exists
         """
         conn = sqlite3.connect(self.db_path)
-        c = conn.cursor()
+        self.write_rows(
+            conn,
+            [self.document_row(doc_id, document)],
+            self.value_rows(document),
+            self.address_rows(doc_id, document),
+        )
+        conn.commit()
+        conn.close()
 
-        # Convert numpy arrays to lists for JSON serialization
-        vectors_dict = document.to_vectors()
-        vectors_serialized = {
-            field: vec.tolist() for field, vec in vectors_dict.items()
-        }
+    def document_row(self, doc_id: str, document: Document) -> Tuple[Any, ...]:
+        """
+        Serialize a document into a documents table row.
 
-        c.execute(
-            """
-            INSERT OR REPLACE INTO documents (id, type, data, vectors)
-            VALUES (?, ?, ?, ?)
-        """,
-            (
-                doc_id,
-                document.__class__.__name__,
-                json.dumps(document.data),
-                json.dumps(vectors_serialized),
-            ),
+        Args:
+            doc_id: Unique identifier for the document
+            document: Document instance to serialize
+
+        Returns:
+            Parameter tuple for INSERT_DOCUMENT_SQL
+        """
+        fields = list(document.to_vectors())
+        return (
+            doc_id,
+            document.__class__.__name__,
+            json.dumps(document.data),
+            json.dumps(fields),
+            b"".join(self.value_hash(str(document.data.get(field))) for field in fields),
+            self.stored_timestamp(document),
         )
 
-        conn.commit()
-        conn.close()
+    @classmethod
+    def value_rows(cls, document: Document) -> List[Tuple[bytes, bytes]]:
+        """
+        Serialize a document's field vectors into field_values rows.
+
+        Args:
+            document: Document instance to serialize
+
+        Returns:
+            (value hash, packed float32 vector) tuples
+        """
+        return [
+            (
+                cls.value_hash(str(document.data.get(field))),
+                np.asarray(vector, dtype=VECTOR_DTYPE).tobytes(),
+            )
+            for field, vector in document.to_vectors().items()
+        ]
+
+    @staticmethod
+    def stored_timestamp(document: Document) -> Optional[int]:
+        """
+        Get the value of a document's timestamp column.
+
+        Args:
+            document: Document instance
+
+        Returns:
+            Unix timestamp, or None if the document has no parseable date
+        """
+        timestamp = document.timestamp()
+        return None if timestamp == NO_DATE else timestamp
+
+    @staticmethod
+    def address_rows(doc_id: str, document: Document) -> List[Tuple[str, str, str]]:
+        """
+        List a document's addresses for the document_addresses table.
+
+        Args:
+            doc_id: Unique identifier for the document
+            document: Document instance
+
+        Returns:
+            (document ID, role, address) tuples
+        """
+        return [
+            (doc_id, role, address)
+            for role, addresses in document.addresses().items()
+            for address in addresses
+        ]
+
+    @classmethod
+    def write_rows(
+        cls,
+        conn: sqlite3.Connection,
+        document_rows: List[Tuple[Any, ...]],
+        value_rows: List[Tuple[bytes, bytes]],
+        address_rows: List[Tuple[str, str, str]],
+    ) -> None:
+        """
+        Insert serialized documents, field values and addresses without committing.
+
+        Field values already in the table are kept as they are. Documents
+        are written before addresses so the replace triggers clear the
+        addresses of replaced rows before the new ones are linked.
+
+        Args:
+            conn: Open connection to write through
+            document_rows: Rows from document_row
+            value_rows: Rows from value_rows
+            address_rows: Rows from address_rows
+        """
+        conn.executemany(INSERT_FIELD_VALUE_SQL, value_rows)
+        conn.executemany(INSERT_DOCUMENT_SQL, document_rows)
+        cls.write_addresses(conn, address_rows)
+
+    @staticmethod
+    def write_addresses(
+        conn: sqlite3.Connection, address_rows: List[Tuple[str, str, str]]
+    ) -> None:
+        """
+        Link documents to addresses, adding new addresses to the address table.
+
+        Args:
+            conn: Open connection to write through
+            address_rows: (document ID, role, address) tuples
+        """
+        conn.executemany(INSERT_ADDRESS_SQL, [(row[2],) for row in address_rows])
+        conn.executemany(INSERT_DOCUMENT_ADDRESS_SQL, address_rows)
+
+    def bulk_writer(self, commit_every: int = 1000) -> "BulkWriter":
+        """
+        Open a writer for saving many documents over one connection.
+
+        Use as a context manager; pending rows are flushed when it exits.
+
+        Args:
+            commit_every: Number of documents written per transaction
+
+        Returns:
+            BulkWriter bound to this store
+        """
+        return BulkWriter(self, commit_every)
 
     def load_document(self, doc_id: str) -> Optional[Document]:
         """
@@ -108,63 +705,828 @@ class DocumentStore:
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
 
-        c.execute("SELECT type, data, vectors FROM documents WHERE id = ?", (doc_id,))
+        c.execute(
+            "SELECT type, data, fields, value_hashes FROM documents WHERE id = ?",
+            (doc_id,),
+        )
         result = c.fetchone()
-        conn.close()
-
         if result is None:
+            conn.close()
             return None
 
-        doc_type, data, vectors = result
-        data = json.loads(data)
-        vectors = {field: np.array(vec) for field, vec in json.loads(vectors).items()}
+        doc_type, data, fields, value_hashes = result
+        vectors = self.resolve_vectors(conn, [(fields, value_hashes)])[0]
+        conn.close()
+        return self.build_document(doc_type, data, vectors)
+
+    def build_document(
+        self,
+        doc_type: str,
+        data: str,
+        vectors: Optional[Dict[str, np.ndarray]] = None,
+    ) -> Optional[Document]:
+        """
+        Reconstruct a document from a stored row.
+
+        Args:
+            doc_type: Stored document class name
+            data: JSON-serialized document data
+            vectors: Field vectors from resolve_vectors; vectors are left
+                     unloaded when omitted
 
+        Returns:
+            Document of the stored type with vectors attached, or None if the
+            type is unknown
+        """
         # Use type_map to create correct object type
         doc_class = self.type_map.get(doc_type)
-        if doc_class:
-            doc = doc_class(**data)
+        if doc_class is None:
+            return None
+
+        doc = doc_class(**json.loads(data))
+        if vectors is not None:
             doc._vectors = vectors
-            return doc
+        return doc
+
+    @staticmethod
+    def load_value_vectors(
+        conn: sqlite3.Connection, hashes: List[bytes]
+    ) -> Dict[bytes, np.ndarray]:
+        """
+        Fetch field value vectors by hash.
 
-        return None
+        Args:
+            conn: Open connection to read through
+            hashes: Distinct value hashes
 
-    def load_all_documents(self) -> List[Document]:
+        Returns:
+            Dictionary mapping each stored hash to its float32 vector
+        """
+        return {
+            value_hash: np.frombuffer(vector, dtype=VECTOR_DTYPE)
+            for value_hash, vector in select_in(
+                conn, "SELECT hash, vector FROM field_values WHERE hash IN ({placeholders})", hashes
+            )
+        }
+
+    def resolve_vectors(
+        self, conn: sqlite3.Connection, rows: List[Tuple[str, bytes]]
+    ) -> List[Dict[str, np.ndarray]]:
+        """
+        Look up the field vectors of stored documents.
+
+        Each distinct value is fetched once, however many of the documents
+        share it.
+
+        Args:
+            conn: Open connection to read through
+            rows: (fields, value_hashes) columns of each document
+
+        Returns:
+            Field vectors of each document, in the order of rows
+        """
+        parsed = []
+        for fields, value_hashes in rows:
+            hashes = [
+                value_hashes[start : start + VALUE_HASH_SIZE]
+                for start in range(0, len(value_hashes or b""), VALUE_HASH_SIZE)
+            ]
+            parsed.append((json.loads(fields), hashes))
+
+        needed = list({value_hash for _, hashes in parsed for value_hash in hashes})
+        values = self.load_value_vectors(conn, needed)
+        return [
+            {
+                field: values[value_hash]
+                for field, value_hash in zip(names, hashes)
+                if value_hash in values
+            }
+            for names, hashes in parsed
+        ]
+
+    def lookup_text_vectors(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Find stored vectors for field texts, e.g. to skip encoding them again.
+
+        Args:
+            texts: Field texts as passed to the encoder
+
+        Returns:
+            Dictionary mapping each text already in the field value table to
+            its vector
+        """
+        by_hash = {self.value_hash(text): text for text in texts}
+        conn = sqlite3.connect(self.db_path)
+        try:
+            vectors = self.load_value_vectors(conn, list(by_hash))
+        finally:
+            conn.close()
+        return {by_hash[value_hash]: vector for value_hash, vector in vectors.items()}
+
+    def load_all_documents(self, include_vectors: bool = True) -> List[Document]:
         """
         Load all documents from database.
 
+        Documents are returned in ID order, matching load_document_ids().
+
+        Args:
+            include_vectors: If False, skip decoding vectors (e.g. when the
+                             search matrix comes from a snapshot)
+
         Returns:
             List of all stored documents, reconstructed to their proper types
         """
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
 
-        c.execute("SELECT id, type, data, vectors FROM documents")
+        c.execute("SELECT type, data, fields, value_hashes FROM documents ORDER BY id")
         results = c.fetchall()
+        vectors: List[Optional[Dict[str, np.ndarray]]] = [None] * len(results)
+        if include_vectors:
+            vectors = self.resolve_vectors(conn, [row[2:] for row in results])
         conn.close()
 
         documents = []
-        for doc_id, doc_type, data, vectors in results:
-            data = json.loads(data)
-            vectors = {
-                field: np.array(vec) for field, vec in json.loads(vectors).items()
-            }
-
-            doc_class = self.type_map.get(doc_type)
-            if doc_class:
-                doc = doc_class(**data)
-                doc._vectors = vectors
+        for (doc_type, data, _, _), doc_vectors in zip(results, vectors):
+            doc = self.build_document(doc_type, data, doc_vectors)
+            if doc is not None:
                 documents.append(doc)
 
         return documents
 
+    def load_documents(
+        self, doc_ids: List[str], include_vectors: bool = False
+    ) -> List[Optional[Document]]:
+        """
+        Load specific documents by ID, e.g. the results of a search.
+
+        Args:
+            doc_ids: IDs of the documents to load
+            include_vectors: If True, also decode the documents' vectors
+
+        Returns:
+            Documents in the order of doc_ids, with None for unknown IDs
+        """
+        rows: Dict[str, Tuple[Any, ...]] = {}
+        conn = sqlite3.connect(self.db_path)
+        for row in select_in(
+            conn,
+            "SELECT id, type, data, fields, value_hashes FROM documents "
+            "WHERE id IN ({placeholders})",
+            doc_ids,
+        ):
+            rows[row[0]] = row[1:]
+
+        vectors: Dict[str, Optional[Dict[str, np.ndarray]]] = dict.fromkeys(rows)
+        if include_vectors:
+            found = list(rows)
+            resolved = self.resolve_vectors(conn, [rows[doc_id][2:] for doc_id in found])
+            vectors = dict(zip(found, resolved))
+        conn.close()
+
+        return [
+            self.build_document(*rows[doc_id][:2], vectors[doc_id])
+            if doc_id in rows
+            else None
+            for doc_id in doc_ids
+        ]
+
+    def iter_vectors(
+        self, batch_size: int = 10000
+    ) -> Iterator[Tuple[str, str, Dict[str, np.ndarray]]]:
+        """
+        Stream every document's field vectors without building documents.
+
+        Args:
+            batch_size: Rows fetched from SQLite per step
+
+        Yields:
+            (document ID, document type, field vectors) in ID order
+        """
+        conn = sqlite3.connect(self.db_path)
+        try:
+            c = conn.execute(
+                "SELECT id, type, fields, value_hashes FROM documents ORDER BY id"
+            )
+            while True:
+                rows = c.fetchmany(batch_size)
+                if not rows:
+                    break
+                vectors = self.resolve_vectors(conn, [row[2:] for row in rows])
+                for (doc_id, doc_type, _, _), doc_vectors in zip(rows, vectors):
+                    yield doc_id, doc_type, doc_vectors
+        finally:
+            conn.close()
+
+    def load_metadata_columns(self, fields: List[str]) -> Dict[str, List[Any]]:
+        """
+        Load selected data fields of all documents as columns.
+
+        Fields are extracted inside SQLite, so large values such as bodies are
+        never decoded in Python.
+
+        Args:
+            fields: Names of document data fields to extract
+
+        Returns:
+            Dictionary mapping "id" and each field name to a list of values,
+            in ID order
+        """
+        extracts = "".join(f", json_extract(data, '$.{field}')" for field in fields)
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(f"SELECT id{extracts} FROM documents ORDER BY id").fetchall()
+        conn.close()
+
+        names = ["id", *fields]
+        if not rows:
+            return {name: [] for name in names}
+        return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+    def load_timestamps(self) -> np.ndarray:
+        """
+        Load the timestamp column of all documents.
+
+        Returns:
+            Int64 array of Unix timestamps in ID order, NO_DATE where unknown
+        """
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute("SELECT timestamp FROM documents ORDER BY id").fetchall()
+        conn.close()
+        return np.array(
+            [NO_DATE if value is None else value for (value,) in rows], dtype=np.int64
+        )
+
+    def find_documents_by_address(
+        self, addresses: List[str], roles: Tuple[str, ...]
+    ) -> List[str]:
+        """
+        Find documents sent from or to any of the given addresses.
+
+        Uses the address index instead of scanning document headers.
+
+        Args:
+            addresses: Email addresses, matched case-insensitively
+            roles: Header roles to match, e.g. ("to", "cc", "bcc")
+
+        Returns:
+            IDs of matching documents in ID order
+        """
+        normalized = [
+            address for value in addresses for address in parse_addresses(value)
+        ]
+        if not normalized or not roles:
+            return []
+
+        conn = sqlite3.connect(self.db_path)
+        rows = conn.execute(
+            f"""
+            SELECT DISTINCT document_addresses.doc_id
+            FROM addresses
+            JOIN document_addresses ON document_addresses.address_id = addresses.id
+            WHERE addresses.address IN ({", ".join("?" * len(normalized))})
+              AND document_addresses.role IN ({", ".join("?" * len(roles))})
+            ORDER BY document_addresses.doc_id
+        """,
+            (*normalized, *roles),
+        ).fetchall()
+        conn.close()
+        return [doc_id for (doc_id,) in rows]
+
+    def load_document_ids(self) -> List[str]:
+        """
+        Load the IDs of all stored documents.
+
+        Returns:
+            Document IDs in the same order as load_all_documents()
+        """
+        conn = sqlite3.connect(self.db_path)
+        ids = [row[0] for row in conn.execute("SELECT id FROM documents ORDER BY id")]
+        conn.close()
+        return ids
+
+    @staticmethod
+    def fts_query(text: str) -> str:
+        """
+        Turn free text into an FTS5 query matching any of its terms.
+
+        Each term is quoted so punctuation and FTS5 operators in user input
+        are matched literally rather than parsed.
+
+        Args:
+            text: Search query text
+
+        Returns:
+            FTS5 MATCH expression, empty if the text has no terms
+        """
+        return " OR ".join(f'"{term}"' for term in re.findall(r"\w+", text))
+
+    def search_text(self, query: str, limit: int = 1000) -> List[Tuple[str, float]]:
+        """
+        Rank documents by BM25 relevance of their subject and body to a query.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of matches to return
+
+        Returns:
+            (document ID, BM25 score) pairs, best match first; higher scores
+            are better
+        """
+        match = self.fts_query(query)
+        if not match or limit <= 0:
+            return []
+
+        weights = ", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+        conn = sqlite3.connect(self.db_path)
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT documents.id, -bm25(documents_fts, {weights}) AS score
+                FROM documents_fts
+                JOIN documents ON documents.rowid = documents_fts.rowid
+                WHERE documents_fts MATCH ?
+                ORDER BY score DESC
+                LIMIT ?
+            """,
+                (match, limit),
+            ).fetchall()
+        finally:
+            conn.close()
+        return rows
+
+    def count_documents(self) -> int:
+        """
+        Count stored documents.
+
+        Returns:
+            Number of documents in the store
+        """
+        conn = sqlite3.connect(self.db_path)
+        count = conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+        conn.close()
+        return count
+
+    def document_id_range(self) -> Tuple[int, Optional[str], Optional[str]]:
+        """
+        Summarize the stored document IDs in one cheap query.
+
+        Returns:
+            Tuple of (document count, first ID, last ID) in ID order, the
+            IDs None if the store is empty
+        """
+        conn = sqlite3.connect(self.db_path)
+        result = conn.execute("SELECT COUNT(*), MIN(id), MAX(id) FROM documents").fetchone()
+        conn.close()
+        return result
+
+    def get_generation(self) -> int:
+        """
+        Get the store's change counter.
+
+        Returns:
+            Integer that increases whenever documents are added, replaced or
+            removed
+        """
+        return self.get_meta("generation")
+
+    def get_store_id(self) -> int:
+        """
+        Get the random ID chosen when the database was created.
+
+        Distinguishes a recreated database from the one a snapshot was built
+        from, whose generation counter may have reached the same value.
+
+        Returns:
+            Positive 63-bit integer identifying this database
+        """
+        return self.get_meta("store_id")
+
+    def get_meta(self, key: str) -> int:
+        """
+        Read an integer from the store_meta table.
+
+        Args:
+            key: Name of the value
+
+        Returns:
+            Stored value, or 0 if it is missing
+        """
+        conn = sqlite3.connect(self.db_path)
+        result = conn.execute(
+            "SELECT value FROM store_meta WHERE key = ?", (key,)
+        ).fetchone()
+        conn.close()
+        return result[0] if result else 0
+
+    def snapshot_fingerprint(
+        self, model_name: str, field_weights: Dict[str, float]
+    ) -> Dict[str, Any]:
+        """
+        Describe the inputs a snapshot's combined vectors were derived from.
+
+        Args:
+            model_name: Identifier of the embedding model
+            field_weights: Field weights used to combine vectors
+
+        Returns:
+            JSON-serializable fingerprint; a snapshot is only valid for an
+            identical fingerprint
+        """
+        return {
+            "version": SNAPSHOT_VERSION,
+            "model": model_name,
+            "field_weights": field_weights,
+            "store": self.get_store_id(),
+            "generation": self.get_generation(),
+        }
+
+    def write_snapshot(
+        self, doc_ids: Sequence[str], matrix: np.ndarray, fingerprint: Dict[str, Any]
+    ) -> None:
+        """
+        Persist the search matrix and its document ID index to disk.
+
+        Files are written to temporary names and renamed into place, with the
+        metadata file last, so readers never see a partially written snapshot.
+
+        Args:
+            doc_ids: Document IDs, one per matrix row
+            matrix: Normalized combined-vector matrix
+            fingerprint: Value from snapshot_fingerprint() describing the matrix
+        """
+        self.snapshot_path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.snapshot_path / "meta.json"
+        if meta_path.exists():
+            meta_path.unlink()
+
+        vectors_tmp = self.snapshot_path / "vectors.npy.tmp"
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        os.replace(vectors_tmp, self.snapshot_path / "vectors.npy")
+
+        ids_tmp = self.snapshot_path / "ids.npy.tmp"
+        with open(ids_tmp, "wb") as f:
+            np.save(f, StringArray.from_strings(doc_ids).data)
+        os.replace(ids_tmp, self.snapshot_path / "ids.npy")
+
+        meta_tmp = self.snapshot_path / "meta.json.tmp"
+        with open(meta_tmp, "w") as f:
+            json.dump({"fingerprint": fingerprint, "count": len(doc_ids)}, f)
+        os.replace(meta_tmp, meta_path)
+
+    def load_snapshot(
+        self, fingerprint: Dict[str, Any]
+    ) -> Optional[Tuple[StringArray, np.ndarray]]:
+        """
+        Memory-map the snapshot if it matches the given fingerprint.
+
+        The matrix and the document IDs are opened read-only with mmap, so
+        pages are loaded on demand and shared through the OS page cache
+        between processes.
+
+        Args:
+            fingerprint: Expected value from snapshot_fingerprint()
+
+        Returns:
+            Tuple of (document IDs, memory-mapped matrix), or None if the
+            snapshot is missing or stale
+        """
+        meta_path = self.snapshot_path / "meta.json"
+        if not meta_path.exists():
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != fingerprint:
+            return None
+
+        doc_ids = StringArray(np.load(self.snapshot_path / "ids.npy", mmap_mode="r"))
+        matrix = np.load(self.snapshot_path / "vectors.npy", mmap_mode="r")
+        if len(doc_ids) != meta.get("count") or matrix.shape[0] != len(doc_ids):
+            return None
+        return doc_ids, matrix
+
+    def write_snapshot_array(
+        self, name: str, array: np.ndarray, fingerprint: Dict[str, Any]
+    ) -> None:
+        """
+        Persist an array derived from the search matrix next to the snapshot.
+
+        Used for per-corpus artifacts such as the 2D visualization projection.
+
+        Args:
+            name: File stem for the array, e.g. "projection"
+            array: Array with one row per snapshot document
+            fingerprint: Fingerprint of the data the array was derived from
+        """
+        self.snapshot_path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.snapshot_path / f"{name}.json"
+        if meta_path.exists():
+            meta_path.unlink()
+
+        array_tmp = self.snapshot_path / f"{name}.npy.tmp"
+        with open(array_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        self.finish_snapshot_array(name, fingerprint)
+
+    def open_snapshot_array(
+        self, name: str, shape: Tuple[int, ...], dtype: Any = np.float32
+    ) -> np.memmap:
+        """
+        Create a writable memory-mapped snapshot array to fill in place.
+
+        Lets arrays larger than memory be built row by row. The array becomes
+        visible to load_snapshot_array only after finish_snapshot_array.
+
+        Args:
+            name: File stem for the array
+            shape: Shape of the array
+            dtype: Element type
+
+        Returns:
+            Zero-initialized writable memory-mapped array
+        """
+        self.snapshot_path.mkdir(parents=True, exist_ok=True)
+        meta_path = self.snapshot_path / f"{name}.json"
+        if meta_path.exists():
+            meta_path.unlink()
+        return np.lib.format.open_memmap(
+            self.snapshot_path / f"{name}.npy.tmp", mode="w+", dtype=dtype, shape=shape
+        )
+
+    def finish_snapshot_array(self, name: str, fingerprint: Dict[str, Any]) -> None:
+        """
+        Move a written snapshot array into place and record its fingerprint.
+
+        Arrays opened with open_snapshot_array must be flushed first.
+
+        Args:
+            name: File stem of the array
+            fingerprint: Fingerprint of the data the array was derived from
+        """
+        os.replace(
+            self.snapshot_path / f"{name}.npy.tmp", self.snapshot_path / f"{name}.npy"
+        )
+        meta_tmp = self.snapshot_path / f"{name}.json.tmp"
+        with open(meta_tmp, "w") as f:
+            json.dump({"fingerprint": fingerprint}, f)
+        os.replace(meta_tmp, self.snapshot_path / f"{name}.json")
+
+    def load_snapshot_array(
+        self, name: str, fingerprint: Dict[str, Any]
+    ) -> Optional[np.ndarray]:
+        """
+        Memory-map an array written by write_snapshot_array if still current.
+
+        Args:
+            name: File stem the array was written under
+            fingerprint: Expected fingerprint
+
+        Returns:
+            Read-only memory-mapped array, or None if missing or stale
+        """
+        meta_path = self.snapshot_path / f"{name}.json"
+        if not meta_path.exists():
+            return None
+
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get("fingerprint") != fingerprint:
+            return None
+        return np.load(self.snapshot_path / f"{name}.npy", mmap_mode="r")
+
+    def get_ingest_progress(self, source: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the recorded ingestion progress for a source.
+
+        Args:
+            source: Identifier of the ingested mailbox
+
+        Returns:
+            Dictionary with position, size, complete and digest keys (digest is
+            None for progress recorded before digests were kept), or None if
+            the source was never ingested
+        """
+        conn = sqlite3.connect(self.db_path)
+        result = conn.execute(
+            "SELECT position, size, complete, digest FROM ingest_progress WHERE source = ?",
+            (source,),
+        ).fetchone()
+        conn.close()
+
+        if result is None:
+            return None
+        position, size, complete, digest = result
+        return {"position": position, "size": size, "complete": bool(complete), "digest": digest}
+
+    def set_ingest_progress(
+        self,
+        source: str,
+        position: int,
+        size: int,
+        complete: bool = False,
+        digest: Optional[str] = None,
+    ) -> None:
+        """
+        Record ingestion progress for a source.
+
+        Args:
+            source: Identifier of the ingested mailbox
+            position: Number of source messages consumed
+            size: Source file size the position refers to
+            complete: Whether the whole source has been read
+            digest: Hash identifying the source's first size bytes
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(INSERT_PROGRESS_SQL, (source, position, size, int(complete), digest))
+        conn.commit()
+        conn.close()
+
+    def rename_documents(self, renames: List[Tuple[str, str]]) -> None:
+        """
+        Move documents to new IDs, e.g. from legacy positional IDs.
+
+        A document whose new ID is already taken is deleted instead, so
+        duplicates collapse into one document.
+
+        Args:
+            renames: (current ID, new ID) pairs; missing current IDs are ignored
+        """
+        conn = sqlite3.connect(self.db_path)
+        for old_id, new_id in renames:
+            if old_id == new_id:
+                continue
+            taken = conn.execute("SELECT 1 FROM documents WHERE id = ?", (new_id,)).fetchone()
+            if taken:
+                conn.execute("DELETE FROM documents WHERE id = ?", (old_id,))
+            else:
+                conn.execute("UPDATE documents SET id = ? WHERE id = ?", (new_id, old_id))
+                conn.execute(
+                    "UPDATE document_addresses SET doc_id = ? WHERE doc_id = ?",
+                    (new_id, old_id),
+                )
+        conn.commit()
+        conn.close()
+
+    def prune_field_values(self) -> int:
+        """
+        Delete field value vectors that no stored document references.
+
+        Scans every document's value hashes, so this is a maintenance step
+        for after documents were replaced or deleted, not a per-write one.
+
+        Returns:
+            Number of field values deleted
+        """
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            f"""
+            WITH RECURSIVE refs (hash, rest) AS (
+                SELECT substr(value_hashes, 1, {VALUE_HASH_SIZE}),
+                       substr(value_hashes, {VALUE_HASH_SIZE + 1})
+                FROM documents WHERE length(value_hashes) > 0
+                UNION ALL
+                SELECT substr(rest, 1, {VALUE_HASH_SIZE}), substr(rest, {VALUE_HASH_SIZE + 1})
+                FROM refs WHERE length(rest) > 0
+            )
+            DELETE FROM field_values WHERE hash NOT IN (SELECT hash FROM refs)
+        """
+        )
+        # rowcount is not reported for statements starting with WITH
+        deleted = conn.total_changes
+        conn.commit()
+        conn.close()
+        return deleted
+
+    def delete_legacy_documents(self) -> int:
+        """
+        Delete documents stored under positional email_{i} IDs.
+
+        Returns:
+            Number of documents deleted
+        """
+        conn = sqlite3.connect(self.db_path)
+        deleted = conn.execute(
+            "DELETE FROM documents WHERE id GLOB ?", (LEGACY_ID_PATTERN,)
+        ).rowcount
+        conn.commit()
+        conn.close()
+        return deleted
+
     def clear_store(self) -> None:
         """
-        Delete all documents from database.
+        Delete all documents, field value vectors and ingestion progress from database.
 
         Useful for resetting the store or clearing cached data.
         """
         conn = sqlite3.connect(self.db_path)
         c = conn.cursor()
         c.execute("DELETE FROM documents")
+        c.execute("DELETE FROM field_values")
+        c.execute("DELETE FROM ingest_progress")
         conn.commit()
         conn.close()
+
+
+class BulkWriter:
+    """
+    Batched, transactional writer for loading many documents into a store.
+
+    Reuses a single connection and inserts rows with executemany, committing
+    once every commit_every documents instead of once per document. The
+    connection runs in WAL mode with synchronous writes disabled, trading
+    durability of the most recent batch on power loss for ingestion speed;
+    the database itself stays consistent.
+    """
+
+    def __init__(self, store: DocumentStore, commit_every: int = 1000) -> None:
+        """
+        Open a bulk connection to the store.
+
+        Args:
+            store: DocumentStore to write into
+            commit_every: Number of documents written per transaction
+        """
+        self.store = store
+        self.commit_every = commit_every
+        self.pending: List[Tuple[Any, ...]] = []
+        self.pending_values: Dict[bytes, bytes] = {}
+        self.pending_addresses: List[Tuple[str, str, str]] = []
+        self.written = 0
+
+        self.conn = sqlite3.connect(store.db_path)
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = OFF")
+
+    def add(self, doc_id: str, document: Document) -> None:
+        """
+        Queue a document for writing, committing when the batch is full.
+
+        Args:
+            doc_id: Unique identifier for the document
+            document: Document instance to save
+        """
+        self.pending.append(self.store.document_row(doc_id, document))
+        # Values repeated within the batch are written once
+        self.pending_values.update(self.store.value_rows(document))
+        self.pending_addresses.extend(self.store.address_rows(doc_id, document))
+        if len(self.pending) >= self.commit_every:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write and commit all queued documents."""
+        if not self.pending:
+            return
+        self.store.write_rows(
+            self.conn,
+            self.pending,
+            list(self.pending_values.items()),
+            self.pending_addresses,
+        )
+        self.conn.commit()
+        self.written += len(self.pending)
+        self.pending = []
+        self.pending_values = {}
+        self.pending_addresses = []
+
+    def checkpoint(
+        self,
+        source: str,
+        position: int,
+        size: int,
+        complete: bool = False,
+        digest: Optional[str] = None,
+    ) -> None:
+        """
+        Commit queued documents together with the source's ingestion progress.
+
+        Writing both in one transaction means a resumed ingestion never skips
+        messages whose documents were not saved.
+
+        Args:
+            source: Identifier of the ingested mailbox
+            position: Number of source messages consumed
+            size: Source file size the position refers to
+            complete: Whether the whole source has been read
+            digest: Hash identifying the source's first size bytes
+        """
+        self.conn.execute(
+            INSERT_PROGRESS_SQL, (source, position, size, int(complete), digest)
+        )
+        if self.pending:
+            self.flush()
+        else:
+            self.conn.commit()
+
+    def close(self) -> None:
+        """Flush queued documents and close the connection."""
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+
+    def __enter__(self) -> "BulkWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -1,6 +1,52 @@
-from typing import Dict, Optional, Any
+import time
+from email.utils import getaddresses, parsedate_to_datetime
+from typing import Callable, Dict, List, Optional, Any, Tuple
 from sentence_transformers import SentenceTransformer
 import numpy as np
+from encoder import encoders, MODEL_NAME
+from embedding_cache import EmbeddingCache
+from metrics import metrics
+
+# Timestamp used for documents without a parseable date
+NO_DATE = np.iinfo(np.int64).min
+
+
+def parse_date(value: Optional[str]) -> int:
+    """
+    Convert an email Date header to a Unix timestamp.
+
+    Args:
+        value: Raw Date header
+
+    Returns:
+        Seconds since the epoch, or NO_DATE if missing or unparseable
+    """
+    if not value:
+        return NO_DATE
+    try:
+        return int(parsedate_to_datetime(value).timestamp())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return NO_DATE
+
+
+def parse_addresses(value: Optional[str]) -> List[str]:
+    """
+    Extract normalized email addresses from an address header.
+
+    Args:
+        value: Raw header such as "Jane <Jane@Example.com>, bob@example.com"
+
+    Returns:
+        Distinct lowercased addresses in header order
+    """
+    if not value:
+        return []
+    addresses = []
+    for _, address in getaddresses([value]):
+        address = address.strip().lower()
+        if address and address not in addresses:
+            addresses.append(address)
+    return addresses
 
 
 class Document:
@@ -12,22 +58,22 @@ class Document:
     Uses lazy loading to compute vectors only when needed.
     """
 
-    _shared_model: Optional[SentenceTransformer] = None
+    # Field weights given to new instances; subclasses define their own
+    DEFAULT_FIELD_WEIGHTS: Dict[str, float] = {}
+
+    # Persistent embedding cache consulted before encoding, if configured
+    embedding_cache: Optional[EmbeddingCache] = None
 
     @classmethod
     def get_model(cls) -> SentenceTransformer:
         """
-        Get or initialize the shared transformer model singleton.
+        Get the shared transformer model from the process-wide encoder registry.
 
         Returns:
             SentenceTransformer: Instance of msmarco-MiniLM-L6-cos-v5 model,
                                 optimized for fast encoding and cosine similarity
         """
-        if cls._shared_model is None:
-            cls._shared_model = SentenceTransformer(
-                "sentence-transformers/msmarco-MiniLM-L6-cos-v5"
-            )
-        return cls._shared_model
+        return encoders.get(MODEL_NAME)
 
     def __init__(self, data: Dict[str, Optional[str]]) -> None:
         """
@@ -38,25 +84,138 @@ class Document:
         """
         self.data = data
         self._vectors: Optional[Dict[str, np.ndarray]] = None
-        self.field_weights: Dict[str, float] = {}
+        self.field_weights: Dict[str, float] = dict(self.DEFAULT_FIELD_WEIGHTS)
 
     def to_vectors(self) -> Dict[str, np.ndarray]:
         """
         Convert each text field to its vector embedding.
 
         Uses lazy loading - vectors are computed only on first request
-        and cached for subsequent uses.
+        and cached for subsequent uses. Texts found in the embedding cache
+        are not encoded again, and newly encoded ones are added to it.
 
         Returns:
             Dictionary mapping field names to their vector embeddings
         """
         if self._vectors is None:
-            self._vectors = {}
-            for field, value in self.data.items():
-                if value is not None:
-                    self._vectors[field] = self.get_model().encode(str(value))
+            texts = {
+                field: str(value)
+                for field, value in self.data.items()
+                if value is not None
+            }
+            cache = self.embedding_cache
+            text_vectors = (
+                cache.get_many(list(set(texts.values()))) if cache is not None else {}
+            )
+
+            encoded: Dict[str, np.ndarray] = {}
+            for text in texts.values():
+                if text not in text_vectors:
+                    text_vectors[text] = encoded[text] = self.get_model().encode(text)
+            if cache is not None:
+                cache.put_many(encoded)
+
+            self._vectors = {field: text_vectors[text] for field, text in texts.items()}
         return self._vectors
 
+    @classmethod
+    def encode_documents(
+        cls,
+        documents: List["Document"],
+        batch_size: int = 128,
+        lookup: Optional[Callable[[List[str]], Dict[str, np.ndarray]]] = None,
+    ) -> None:
+        """
+        Compute vector embeddings for many documents in batched model calls.
+
+        Collects the field texts of every document that has no vectors yet and
+        encodes each distinct text once, sharing its vector between all fields
+        and documents that contain it (senders and recipients repeat across
+        most of a mailbox). Texts are ordered by length so each batch holds
+        similarly sized inputs (less padding per forward pass), and encoded
+        batch_size texts at a time. Results are written back into each
+        document's vector cache.
+
+        Texts not returned by lookup are looked up in the embedding cache
+        before encoding, and every vector not already cached is added to it,
+        so re-ingesting the same mail after clearing the store costs parsing
+        time only.
+
+        Args:
+            documents: Documents to encode; already-encoded ones are skipped
+            batch_size: Number of texts per model forward pass
+            lookup: Optional function returning known vectors for a list of
+                    texts (e.g. from the store's field value table); only
+                    texts it does not return are encoded
+        """
+        pending: List[Tuple[int, str, str]] = []
+        for doc_idx, doc in enumerate(documents):
+            if doc._vectors is not None:
+                continue
+            for field, value in doc.data.items():
+                if value is not None:
+                    pending.append((doc_idx, field, str(value)))
+
+        unique_texts = list(dict.fromkeys(text for _, _, text in pending))
+        text_vectors: Dict[str, np.ndarray] = {}
+        if lookup is not None and unique_texts:
+            text_vectors.update(lookup(unique_texts))
+
+        cache = cls.embedding_cache
+        cached: Dict[str, np.ndarray] = {}
+        if cache is not None and unique_texts:
+            cached = cache.get_many(
+                [text for text in unique_texts if text not in text_vectors]
+            )
+            text_vectors.update(cached)
+
+        missing = sorted(
+            (text for text in unique_texts if text not in text_vectors), key=len
+        )
+        batch_seconds = metrics.histogram(
+            "searchica_encode_batch_seconds", "Duration of one batched encoder call"
+        )
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start : start + batch_size]
+            started = time.perf_counter()
+            embeddings = cls.get_model().encode(batch, batch_size=batch_size)
+            batch_seconds.observe(time.perf_counter() - started)
+            text_vectors.update(zip(batch, embeddings))
+        metrics.counter(
+            "searchica_encoded_texts_total", "Distinct field texts sent to the encoder"
+        ).inc(len(missing))
+
+        if cache is not None:
+            cache.put_many(
+                {text: vector for text, vector in text_vectors.items() if text not in cached}
+            )
+
+        vectors: Dict[int, Dict[str, np.ndarray]] = {}
+        for doc_idx, field, text in pending:
+            vectors.setdefault(doc_idx, {})[field] = text_vectors[text]
+
+        for doc_idx, doc in enumerate(documents):
+            if doc._vectors is None:
+                doc._vectors = vectors.get(doc_idx, {})
+
+    def timestamp(self) -> int:
+        """
+        Get the document date as a Unix timestamp.
+
+        Returns:
+            Seconds since the epoch, or NO_DATE if the document has no date
+        """
+        return parse_date(self.data.get("date"))
+
+    def addresses(self) -> Dict[str, List[str]]:
+        """
+        Get the normalized addresses of the document by header role.
+
+        Returns:
+            Dictionary mapping roles to addresses; empty for plain documents
+        """
+        return {}
+
     def get_combined_vector(self) -> np.ndarray:
         """
         Get single weighted vector representation of document.
@@ -67,10 +226,25 @@ class Document:
         Returns:
             Combined vector embedding for the entire document
         """
-        vectors = self.to_vectors()
+        return self.combine_vectors(self.to_vectors(), self.field_weights)
+
+    @staticmethod
+    def combine_vectors(
+        vectors: Dict[str, np.ndarray], field_weights: Dict[str, float]
+    ) -> np.ndarray:
+        """
+        Compute the weighted sum of a document's field vectors.
+
+        Args:
+            vectors: Dictionary mapping field names to vector embeddings
+            field_weights: Weight of each field; unlisted fields are ignored
+
+        Returns:
+            Combined vector embedding
+        """
         combined = np.zeros_like(list(vectors.values())[0])
         for field, vector in vectors.items():
-            weight = self.field_weights.get(field, 0)
+            weight = field_weights.get(field, 0)
             combined += weight * vector
         return combined
 
@@ -84,6 +258,20 @@ class Email(Document):
     of different email fields (subject, body, etc.) in search.
     """
 
+    # Define relative importance of each field for similarity scoring
+    DEFAULT_FIELD_WEIGHTS: Dict[str, float] = {
+        "subject": 0.3,  # Subject highly relevant for matching
+        "body": 0.4,  # Body content most important
+        "sender": 0.1,  # Sender moderately relevant
+        "to": 0.1,  # Recipients moderately relevant
+        "cc": 0.05,  # CC less important
+        "bcc": 0.025,  # BCC minimal importance
+        "date": 0.025,  # Date minimal importance
+    }
+
+    # Address headers indexed for filtering
+    ADDRESS_ROLES = ("sender", "to", "cc", "bcc")
+
     def __init__(
         self,
         body: str,
@@ -117,13 +305,13 @@ class Email(Document):
         }
         super().__init__(data)
 
-        # Define relative importance of each field for similarity scoring
-        self.field_weights = {
-            "subject": 0.3,  # Subject highly relevant for matching
-            "body": 0.4,  # Body content most important
-            "sender": 0.1,  # Sender moderately relevant
-            "to": 0.1,  # Recipients moderately relevant
-            "cc": 0.05,  # CC less important
-            "bcc": 0.025,  # BCC minimal importance
-            "date": 0.025,  # Date minimal importance
+    def addresses(self) -> Dict[str, List[str]]:
+        """
+        Get the normalized sender and recipient addresses.
+
+        Returns:
+            Dictionary mapping each of ADDRESS_ROLES to its addresses
+        """
+        return {
+            role: parse_addresses(self.data.get(role)) for role in self.ADDRESS_ROLES
         }
@@ -1,10 +1,29 @@
+import hashlib
 import mailbox
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
 from bs4 import BeautifulSoup
 import re
-from typing import List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 from email.header import decode_header
 from documents import Email
-from document_store import DocumentStore
+from encoder import encoders
+from document_store import DocumentStore, BulkWriter
+from metrics import metrics
+from profiling import profiled
+
+# (position, document ID, Email) produced by the parse stage of ingestion
+ParsedMessage = Tuple[int, Optional[str], Optional[Email]]
+
+# Number of raw messages sent to a parse worker per task
+PARSE_TASK_SIZE = 64
+
+# Bytes hashed at the start of the mbox and before a checkpointed size
+DIGEST_WINDOW = 64 * 1024
 
 
 class EmailProcessor:
@@ -16,24 +35,175 @@ class EmailProcessor:
     Processed emails are saved to a document store for later retrieval.
     """
 
-    def __init__(self, mbox_path: str, doc_store: DocumentStore) -> None:
+    def __init__(
+        self,
+        mbox_path: str,
+        doc_store: DocumentStore,
+        batch_size: int = 128,
+        chunk_size: int = 1024,
+        commit_every: int = 1000,
+        workers: int = 0,
+        queue_size: int = 64,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+        profile_dir: Optional[str] = None,
+    ) -> None:
         """
         Initialize processor with mbox file path and document store.
 
         Args:
             mbox_path: Path to mbox file containing emails
             doc_store: DocumentStore instance for saving processed emails
+            batch_size: Number of field texts per model forward pass
+            chunk_size: Number of emails collected before they are encoded
+                        together and saved
+            commit_every: Number of emails written per store transaction
+            workers: Number of processes parsing and cleaning messages in
+                     parallel with encoding; 0 or 1 parses in-process
+            queue_size: Maximum number of parse tasks in flight ahead of the
+                        encoder when using workers
+            progress_callback: Optional function called after each committed
+                               chunk with (messages consumed, total messages)
+            profile_dir: If set, process_mbox runs under cProfile and saves
+                         the profile to this directory
         """
         self.mbox_path = mbox_path
         self.doc_store = doc_store
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.commit_every = commit_every
+        self.workers = workers
+        self.queue_size = queue_size
+        self.progress_callback = progress_callback
+        self.profile_dir = profile_dir
+
+    def __getstate__(self) -> dict:
+        """
+        State copied to parse workers, without the progress callback.
+
+        The callback is only called in the ingesting process and may be bound
+        to an object that cannot be pickled, such as the app with its locks.
+        """
+        state = self.__dict__.copy()
+        state["progress_callback"] = None
+        return state
+
+    @property
+    def source(self) -> str:
+        """Identifier under which this mailbox's ingestion progress is stored."""
+        return os.path.abspath(self.mbox_path)
+
+    def needs_processing(self) -> bool:
+        """
+        Check whether the mbox has messages that are not yet in the store.
+
+        Stores filled before progress tracking existed are adopted as complete
+        up to the mailbox's current length, so only mail appended afterwards
+        is ingested. Their documents, stored under positional email_{i} IDs,
+        are moved to the stable IDs later runs derive for the same messages.
+
+        Returns:
+            True if ingestion was interrupted, never ran, or the mbox changed
+            since it last completed
+        """
+        size = os.path.getsize(self.mbox_path)
+        progress = self.doc_store.get_ingest_progress(self.source)
+        if progress is None and self.doc_store.count_documents() > 0:
+            print("Adopting existing document store as fully ingested")
+            mbox = mailbox.mbox(self.mbox_path, create=False)
+            self.adopt_legacy_ids(mbox)
+            self.doc_store.set_ingest_progress(
+                self.source, len(mbox), size, True, self.file_digest(self.mbox_path, size)
+            )
+            return False
+        return (
+            progress is None
+            or not progress["complete"]
+            or progress["size"] != size
+            or not self.unchanged_since(progress)
+        )
+
+    def adopt_legacy_ids(self, mbox: mailbox.mbox) -> None:
+        """
+        Move documents from positional email_{i} IDs to their stable IDs.
+
+        The first versions keyed documents by mbox position; the message at
+        each position is assumed to be the one stored under it.
+
+        Args:
+            mbox: Mailbox the store was filled from
+        """
+        renames = []
+        for key in mbox.iterkeys():
+            try:
+                renames.append((f"email_{key}", self.document_id(mbox.get_message(key))))
+            except Exception as e:
+                print(f"Error deriving ID of message {key}: {str(e)}")
+        self.doc_store.rename_documents(renames)
+
+    @staticmethod
+    def file_digest(path: str, size: int) -> str:
+        """
+        Hash the start of a file and the bytes just before a given size.
+
+        Appending to an mbox leaves the digest of its old size unchanged, while
+        a rewrite almost always changes it, without reading the whole file.
+
+        Args:
+            path: File to hash
+            size: Length of the file prefix the digest stands for
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        digest = hashlib.sha256(str(size).encode())
+        with open(path, "rb") as f:
+            digest.update(f.read(min(size, DIGEST_WINDOW)))
+            f.seek(max(0, size - DIGEST_WINDOW))
+            digest.update(f.read(min(size, DIGEST_WINDOW)))
+        return digest.hexdigest()
+
+    def unchanged_since(self, progress: Dict[str, Any]) -> bool:
+        """
+        Check that the mbox still starts with the bytes progress was recorded for.
+
+        Args:
+            progress: Value of DocumentStore.get_ingest_progress
+
+        Returns:
+            False if the file is shorter than recorded or its digest differs;
+            True when no digest was recorded
+        """
+        if os.path.getsize(self.mbox_path) < progress["size"]:
+            return False
+        if progress["digest"] is None:
+            return True
+        return self.file_digest(self.mbox_path, progress["size"]) == progress["digest"]
 
     def process_mbox(self) -> List[Email]:
         """
-        Process all emails in the mbox file and save to document store.
+        Process new emails in the mbox file and save to document store.
 
         Extracts content and metadata from each email, converts to Email objects,
-        and saves them to the document store. Handles errors for individual emails
-        without failing the entire process.
+        and saves them to the document store. Emails are collected in chunks and
+        their fields encoded in batches before being written through a single
+        bulk store connection. Messages that cannot be parsed or encoded are
+        reported and skipped without failing the entire process; a failing
+        store write aborts the run, and a rerun resumes from the last
+        checkpoint.
+
+        Ingestion is incremental and resumable: reading starts after the last
+        checkpointed message (unless the file was rewritten, detected by its
+        size and digest), and messages whose ID is already stored are skipped
+        without encoding. Restarting from the first message deletes documents
+        left under legacy positional IDs, which would otherwise duplicate the
+        re-ingested messages, and field values no document references. With
+        workers configured, parsing runs in a process pool that overlaps with
+        encoding. Throughput in documents per second is printed at the end and
+        exported with the encoder batch timings through the metrics registry.
+
+        With profile_dir set, the run is profiled with cProfile. Only the
+        ingesting thread is covered, so parse workers do not appear; profile
+        with workers=0 to include parsing.
 
         Returns:
             List of successfully processed Email objects
@@ -41,22 +211,313 @@ class EmailProcessor:
         Raises:
             FileNotFoundError: If mbox file doesn't exist
         """
-        mbox = mailbox.mbox(self.mbox_path)
+        with profiled(self.profile_dir, "process_mbox"):
+            return self.ingest_mbox()
+
+    def ingest_mbox(self) -> List[Email]:
+        """
+        Ingest new messages of the mbox; see process_mbox.
+
+        Returns:
+            List of successfully processed Email objects
+        """
+        mbox = mailbox.mbox(self.mbox_path, create=False)
+        size = os.path.getsize(self.mbox_path)
+        progress = self.doc_store.get_ingest_progress(self.source)
+        start = progress["position"] if progress and self.unchanged_since(progress) else 0
+        if start == 0:
+            deleted = self.doc_store.delete_legacy_documents()
+            if deleted:
+                print(f"Deleted {deleted} documents with legacy positional IDs")
+            pruned = self.doc_store.prune_field_values()
+            if pruned:
+                print(f"Deleted {pruned} field values no document references")
+        digest = self.file_digest(self.mbox_path, size)
+        existing_ids = set(self.doc_store.load_document_ids())
+        total = len(mbox)
+        # Load the model while the first chunk is being parsed
+        encoders.warmup()
+
         processed_emails = []
+        pending: List[Tuple[str, Email]] = []
+        position = start
+        started = time.perf_counter()
 
-        for i, message in enumerate(mbox):
-            try:
-                email = self.process_single_email(message)
-                if email:
-                    self.doc_store.save_document(f"email_{i}", email)
-                    processed_emails.append(email)
-            except Exception as e:
-                print(
-                    f"Error processing email with subject '{message['subject']}': {str(e)}"
-                )
+        with self.doc_store.bulk_writer(commit_every=self.commit_every) as writer:
+            for position, doc_id, email in self.iter_parsed(mbox, start, existing_ids):
+                if email is not None and doc_id not in existing_ids:
+                    existing_ids.add(doc_id)
+                    pending.append((doc_id, email))
+
+                if len(pending) >= self.chunk_size:
+                    processed_emails.extend(self.save_batch(pending, writer))
+                    writer.checkpoint(self.source, position, size, digest=digest)
+                    self.report_progress(position, total)
+                    self.record_rate(len(processed_emails), started)
+                    pending = []
 
+            processed_emails.extend(self.save_batch(pending, writer))
+            writer.checkpoint(self.source, position, size, complete=True, digest=digest)
+            self.report_progress(position, total)
+
+        rate = self.record_rate(len(processed_emails), started)
+        print(
+            f"Ingested {len(processed_emails)} emails in "
+            f"{time.perf_counter() - started:.1f}s ({rate:.1f} docs/sec)"
+        )
         return processed_emails
 
+    @staticmethod
+    def record_rate(documents: int, started: float) -> float:
+        """
+        Export the ingestion throughput of the current run.
+
+        Args:
+            documents: Number of emails saved so far
+            started: perf_counter() value when the run started
+
+        Returns:
+            Documents saved per second
+        """
+        elapsed = time.perf_counter() - started
+        rate = documents / elapsed if elapsed > 0 else 0.0
+        metrics.gauge(
+            "searchica_ingest_documents_per_second",
+            "Throughput of the current or last mbox ingestion",
+        ).set(rate)
+        return rate
+
+    def report_progress(self, position: int, total: int) -> None:
+        """
+        Pass ingestion progress to the progress callback, if any.
+
+        Args:
+            position: Number of mbox messages consumed
+            total: Number of messages in the mbox
+        """
+        if self.progress_callback is not None:
+            self.progress_callback(position, total)
+
+    def iter_parsed(
+        self, mbox: mailbox.mbox, start: int, skip_ids: Set[str]
+    ) -> Iterator[ParsedMessage]:
+        """
+        Parse messages from the mbox in file order, starting at a position.
+
+        Runs in-process unless more than one worker is configured, in which
+        case parsing is spread over a process pool.
+
+        Args:
+            mbox: Open mailbox to read
+            start: Number of leading messages to skip
+            skip_ids: Document IDs that need not be parsed
+
+        Yields:
+            (position, document ID, Email) tuples in mbox order, where position
+            counts the messages consumed so far; Email is None for skipped or
+            unparseable messages
+        """
+        if self.workers > 1:
+            yield from self.iter_parsed_parallel(mbox, start, skip_ids)
+            return
+
+        for key in mbox.iterkeys():
+            if key < start:
+                continue
+            yield (key + 1, *self.parse_message(mbox.get_message(key), skip_ids))
+
+    def iter_parsed_parallel(
+        self, mbox: mailbox.mbox, start: int, skip_ids: Set[str]
+    ) -> Iterator[ParsedMessage]:
+        """
+        Parse and clean messages in a process pool while the caller encodes.
+
+        A feeder thread reads raw messages and submits them to the pool in
+        small tasks. Pending tasks pass through a bounded queue, so reading
+        stays at most queue_size tasks ahead of the consumer, and results are
+        yielded in submission order. The skip set is sent to each worker once,
+        when the pool starts.
+
+        Args:
+            mbox: Open mailbox to read
+            start: Number of leading messages to skip
+            skip_ids: Document IDs that need not be parsed
+
+        Yields:
+            (position, document ID, Email) tuples in mbox order
+
+        Raises:
+            Exception: Any error of the feeder thread, such as failing to read
+                       the mbox or to submit to the pool, after the messages
+                       parsed before it
+        """
+        tasks: "queue.Queue[Union[Future, Exception, None]]" = queue.Queue(
+            maxsize=self.queue_size
+        )
+        stop = threading.Event()
+
+        # Spawn rather than fork: the encoder may be loading in another thread
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_parse_worker,
+            initargs=(self, skip_ids),
+        ) as pool:
+
+            def feed() -> None:
+                try:
+                    chunk: List[Tuple[int, bytes]] = []
+                    for key in mbox.iterkeys():
+                        if stop.is_set():
+                            return
+                        if key < start:
+                            continue
+                        chunk.append((key + 1, mbox.get_bytes(key)))
+                        if len(chunk) >= PARSE_TASK_SIZE:
+                            tasks.put(pool.submit(_parse_in_worker, chunk))
+                            chunk = []
+                    if chunk:
+                        tasks.put(pool.submit(_parse_in_worker, chunk))
+                except Exception as e:
+                    # Passed on so the consumer does not mistake it for the end
+                    tasks.put(e)
+                finally:
+                    tasks.put(None)
+
+            feeder = threading.Thread(target=feed, daemon=True)
+            feeder.start()
+            try:
+                while True:
+                    task = tasks.get()
+                    if task is None:
+                        break
+                    if isinstance(task, Exception):
+                        raise task
+                    yield from task.result()
+            finally:
+                # Unblock the feeder if the consumer stopped early
+                stop.set()
+                while feeder.is_alive():
+                    try:
+                        tasks.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
+
+    def parse_message(
+        self, message: mailbox.mboxMessage, skip_ids: Optional[Set[str]] = None
+    ) -> Tuple[Optional[str], Optional[Email]]:
+        """
+        Derive a message's document ID and convert it to an Email.
+
+        Errors are reported and swallowed so one bad message does not stop
+        ingestion.
+
+        Args:
+            message: Email message from mbox file
+            skip_ids: Document IDs for which parsing is skipped
+
+        Returns:
+            Tuple of (document ID, Email); Email is None if the message was
+            skipped or could not be processed
+        """
+        doc_id = None
+        try:
+            doc_id = self.document_id(message)
+            if skip_ids is not None and doc_id in skip_ids:
+                return doc_id, None
+            return doc_id, self.process_single_email(message)
+        except Exception as e:
+            print(
+                f"Error processing email with subject '{message['subject']}': {str(e)}"
+            )
+            return doc_id, None
+
+    @staticmethod
+    def document_id(message: mailbox.mboxMessage) -> str:
+        """
+        Derive a stable document ID from a message.
+
+        Uses the Message-ID header when present; otherwise falls back to a hash
+        of the raw message so the same email always maps to the same ID.
+
+        Args:
+            message: Email message from mbox file
+
+        Returns:
+            Document ID string
+        """
+        message_id = message["message-id"]
+        if message_id:
+            message_id = str(message_id).strip().strip("<>").strip()
+            if message_id:
+                return message_id
+        return "sha256:" + hashlib.sha256(message.as_bytes()).hexdigest()
+
+    def save_batch(
+        self, batch: List[Tuple[str, Email]], writer: BulkWriter
+    ) -> List[Email]:
+        """
+        Encode a chunk of emails in batched model calls and queue them for saving.
+
+        Field texts already in the store's field value table, such as known
+        senders, are not encoded again. If encoding the chunk fails, its emails
+        are retried one by one and those that still fail are reported and
+        skipped.
+
+        Args:
+            batch: List of (document ID, Email) pairs to encode and store
+            writer: Bulk writer of the target document store
+
+        Returns:
+            List of saved Email objects
+        """
+        try:
+            self.encode_emails([email for _, email in batch])
+        except Exception as e:
+            print(f"Error encoding chunk of {len(batch)} emails, retrying singly: {str(e)}")
+            batch = [
+                (doc_id, email) for doc_id, email in batch if self.encode_single(doc_id, email)
+            ]
+
+        emails = [email for _, email in batch]
+        for doc_id, email in batch:
+            writer.add(doc_id, email)
+        metrics.counter(
+            "searchica_ingested_documents_total", "Emails encoded and saved by ingestion"
+        ).inc(len(emails))
+        return emails
+
+    def encode_emails(self, emails: List[Email]) -> None:
+        """
+        Encode the fields of emails in batched model calls.
+
+        Args:
+            emails: Emails to encode in place
+        """
+        Email.encode_documents(
+            emails,
+            batch_size=self.batch_size,
+            lookup=self.doc_store.lookup_text_vectors,
+        )
+
+    def encode_single(self, doc_id: str, email: Email) -> bool:
+        """
+        Encode one email, reporting instead of raising errors.
+
+        Args:
+            doc_id: Document ID of the email, used in the error report
+            email: Email to encode in place
+
+        Returns:
+            True if the email was encoded
+        """
+        try:
+            self.encode_emails([email])
+            return True
+        except Exception as e:
+            print(f"Error encoding email {doc_id}: {str(e)}")
+            return False
+
     def clean_whitespace(self, text: str) -> str:
         """
         Clean and normalize whitespace in text.
@@ -145,3 +606,34 @@ class EmailProcessor:
         if isinstance(decoded_text, bytes):
             return decoded_text.decode(encoding or "utf-8")
         return decoded_text
+
+
+# Processor and skipped IDs used by parse workers, installed once per worker process
+_worker_processor: Optional[EmailProcessor] = None
+_worker_skip_ids: Set[str] = set()
+
+
+def _init_parse_worker(processor: EmailProcessor, skip_ids: Set[str]) -> None:
+    """Install the processor and the IDs to skip of a pool worker."""
+    global _worker_processor, _worker_skip_ids
+    _worker_processor = processor
+    _worker_skip_ids = skip_ids
+
+
+def _parse_in_worker(chunk: List[Tuple[int, bytes]]) -> List[ParsedMessage]:
+    """
+    Parse a chunk of raw mbox messages inside a pool worker.
+
+    Args:
+        chunk: List of (position, raw message bytes) pairs
+
+    Returns:
+        List of (position, document ID, Email) tuples in input order
+    """
+    return [
+        (
+            position,
+            *_worker_processor.parse_message(mailbox.mboxMessage(raw), _worker_skip_ids),
+        )
+        for position, raw in chunk
+    ]
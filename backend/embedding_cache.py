@@ -0,0 +1,186 @@
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List
+import numpy as np
+from encoder import MODEL_NAME
+from sqlite_vectors import VECTOR_DTYPE, select_in, text_hash
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of text embeddings.
+
+    Entries are keyed by (model identifier, hash of the text) in a SQLite file
+    kept apart from any document store, so clearing or replacing a store, or
+    loading another mailbox that shares messages with one already ingested,
+    reuses the vectors computed before instead of encoding the texts again.
+    Entries of other models are never returned, so changing the model simply
+    misses until the new model's vectors are cached.
+
+    Vectors of ingested texts are therefore held twice: in the cache, and in
+    the field_values table of the document store they were ingested into,
+    which serves search and lasts as long as the store. Both are keyed by the
+    same text_hash(), and the cache is bounded, so the duplicate is what lets
+    encodings outlive a cleared or replaced store.
+
+    The cache holds at most max_entries vectors across all models; once over
+    the bound, the least recently used entries are evicted. Hit and miss
+    counts are kept for monitoring. Safe to share between threads.
+    """
+
+    def __init__(
+        self, path: str, max_entries: int = 500000, model: str = MODEL_NAME
+    ) -> None:
+        """
+        Open (creating if needed) a cache file.
+
+        Args:
+            path: Path to the SQLite cache file
+            max_entries: Maximum number of cached vectors; 0 disables caching
+            model: Identifier of the model whose vectors are read and written
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        conn = sqlite3.connect(self.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT,                -- Model identifier
+                hash BLOB,                 -- Truncated SHA-256 of the text
+                vector BLOB,               -- Packed little-endian float32 vector
+                last_used REAL,            -- Time of last read or write
+                PRIMARY KEY (model, hash)
+            ) WITHOUT ROWID
+        """)
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        conn.commit()
+        self._entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        conn.close()
+
+    def get_many(self, texts: List[str]) -> Dict[str, np.ndarray]:
+        """
+        Look up cached vectors, counting hits and misses.
+
+        Entries found are marked as recently used.
+
+        Args:
+            texts: Distinct texts to look up
+
+        Returns:
+            Dictionary mapping each cached text to its float32 vector
+        """
+        by_hash = {text_hash(text): text for text in texts}
+        found: Dict[str, np.ndarray] = {}
+        conn = sqlite3.connect(self.path)
+        try:
+            for key, vector in select_in(
+                conn,
+                "SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                list(by_hash),
+                params=[self.model],
+            ):
+                found[by_hash[key]] = np.frombuffer(vector, dtype=VECTOR_DTYPE)
+
+            if found:
+                now = time.time()
+                conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?",
+                    [(now, self.model, text_hash(text)) for text in found],
+                )
+                conn.commit()
+        finally:
+            conn.close()
+
+        with self._lock:
+            self.hits += len(found)
+            self.misses += len(by_hash) - len(found)
+        return found
+
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        """
+        Store vectors, evicting the least recently used entries if over the bound.
+
+        Args:
+            vectors: Dictionary mapping texts to their vectors
+        """
+        if self.max_entries <= 0 or not vectors:
+            return
+        now = time.time()
+        rows = [
+            (
+                self.model,
+                text_hash(text),
+                np.asarray(vector, dtype=VECTOR_DTYPE).tobytes(),
+                now,
+            )
+            for text, vector in vectors.items()
+        ]
+        conn = sqlite3.connect(self.path)
+        try:
+            before = conn.total_changes
+            conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, hash, vector, last_used) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            added = conn.total_changes - before
+            with self._lock:
+                self._entries += added
+                over = self._entries > self.max_entries
+            if over:
+                self.evict(conn)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def evict(self, conn: sqlite3.Connection) -> None:
+        """
+        Delete the least recently used entries beyond max_entries.
+
+        The entry count is re-read first, since other processes may share
+        the cache file.
+
+        Args:
+            conn: Open connection to delete through; the caller commits
+        """
+        entries = conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = entries - self.max_entries
+        if excess > 0:
+            conn.execute(
+                """
+                DELETE FROM embeddings WHERE (model, hash) IN (
+                    SELECT model, hash FROM embeddings ORDER BY last_used LIMIT ?
+                )
+                """,
+                (excess,),
+            )
+        with self._lock:
+            self._entries = entries - max(excess, 0)
+            self.evictions += max(excess, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache occupancy and effectiveness.
+
+        Returns:
+            Dictionary with size, max_size, hits, misses, hit_rate and
+            evictions
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": self._entries,
+                "max_size": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,121 @@
+import threading
+from typing import Any, Dict, Optional
+from sentence_transformers import SentenceTransformer
+
+# Sentence transformer used for every document and query embedding
+MODEL_NAME = "sentence-transformers/msmarco-MiniLM-L6-cos-v5"
+
+
+class EncoderRegistry:
+    """
+    Process-wide registry of sentence transformer models.
+
+    Guarantees a single copy of each model's weights per process, shared by
+    document ingestion and query processing. Models load lazily on first use,
+    or ahead of time through warmup(), which can run in a background thread
+    while the rest of the application starts. Readiness can be polled without
+    blocking.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._models: Dict[str, SentenceTransformer] = {}
+        self._errors: Dict[str, Exception] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str = MODEL_NAME) -> SentenceTransformer:
+        """
+        Get a model, loading it on first use.
+
+        Concurrent callers wait for a single load instead of loading twice.
+
+        Args:
+            name: Model identifier
+
+        Returns:
+            Shared SentenceTransformer instance
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._models:
+                try:
+                    self._models[name] = SentenceTransformer(name)
+                    self._errors.pop(name, None)
+                except Exception as e:
+                    self._errors[name] = e
+                    raise
+            return self._models[name]
+
+    def register(self, name: str, model: Any) -> None:
+        """
+        Install an already constructed model under a name.
+
+        Lets callers substitute a stand-in with the same encode() interface,
+        e.g. the deterministic stub encoder used by the offline benchmarks.
+
+        Args:
+            name: Model identifier
+            model: Object used in place of the SentenceTransformer
+        """
+        with self._lock:
+            self._models[name] = model
+            self._errors.pop(name, None)
+
+    def warmup(
+        self, name: str = MODEL_NAME, background: bool = True
+    ) -> Optional[threading.Thread]:
+        """
+        Load a model and run one encode so the first real request is fast.
+
+        Args:
+            name: Model identifier
+            background: If True, warm up in a daemon thread and return it
+
+        Returns:
+            The warmup thread when running in the background, otherwise None
+        """
+
+        def run() -> None:
+            try:
+                self.get(name).encode("warmup")
+            except Exception as e:
+                print(f"Encoder warmup failed for {name}: {str(e)}")
+
+        if not background:
+            run()
+            return None
+
+        thread = threading.Thread(target=run, name="encoder-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self, name: str = MODEL_NAME) -> bool:
+        """
+        Check whether a model is loaded, without triggering a load.
+
+        Args:
+            name: Model identifier
+
+        Returns:
+            True if the model can be used without waiting
+        """
+        return name in self._models
+
+    def error(self, name: str = MODEL_NAME) -> Optional[Exception]:
+        """
+        Get the error from the last failed load of a model.
+
+        Args:
+            name: Model identifier
+
+        Returns:
+            Exception raised while loading, or None
+        """
+        return self._errors.get(name)
+
+
+# Registry shared by documents, query_processor and email_processor
+encoders = EncoderRegistry()
@@ -0,0 +1,306 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds, in seconds, of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Label values of one series, as sorted (name, value) pairs
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class StageTimer:
+    """
+    Wall-clock durations of the named stages of one request.
+
+    Stages entered several times (e.g. scoring in both halves of a hybrid
+    search) accumulate. Code deep in the search path records into the timer
+    of the current request through the module-level span(), so stage timing
+    needs no extra parameters and costs nothing outside a timed request.
+    """
+
+    def __init__(self) -> None:
+        """Start timing a request."""
+        self.start = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+
+    def add(self, stage: str, seconds: float) -> None:
+        """
+        Add time spent in a stage.
+
+        Args:
+            stage: Stage name, a token such as "encode"
+            seconds: Duration to add
+        """
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        """Seconds since the timer started."""
+        return time.perf_counter() - self.start
+
+    def activate(self) -> Token:
+        """
+        Make this the timer span() records into, in the current context.
+
+        Returns:
+            Token to pass to deactivate() when the request is done
+        """
+        return _current_timer.set(self)
+
+    @staticmethod
+    def deactivate(token: Token) -> None:
+        """
+        Restore the timer that was active before activate().
+
+        Args:
+            token: Token returned by activate()
+        """
+        _current_timer.reset(token)
+
+    def server_timing(self, total: Optional[float] = None) -> str:
+        """
+        Format the stages as a Server-Timing header value.
+
+        Args:
+            total: Optional overall duration in seconds, reported as "total"
+
+        Returns:
+            Header value such as "encode;dur=1.204, score;dur=3.51"
+        """
+        stages = list(self.stages.items())
+        if total is not None:
+            stages.append(("total", total))
+        return ", ".join(f"{stage};dur={seconds * 1000:.3f}" for stage, seconds in stages)
+
+
+_current_timer: ContextVar[Optional[StageTimer]] = ContextVar("stage_timer", default=None)
+
+
+@contextmanager
+def span(stage: str) -> Iterator[None]:
+    """
+    Time the enclosed code as a stage of the current request.
+
+    Does nothing when no StageTimer is active.
+
+    Args:
+        stage: Stage name
+    """
+    timer = _current_timer.get()
+    if timer is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timer.add(stage, time.perf_counter() - start)
+
+
+def label_set(labels: Dict[str, str]) -> LabelSet:
+    """Canonical key of a series' labels."""
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def format_labels(labels: LabelSet, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    """Render labels in Prometheus exposition syntax, e.g. {stage="encode"}."""
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    """Render a sample value; integers without a fractional part."""
+    if value == int(value) and abs(value) < 1 << 53:
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric(ABC):
+    """Base of a named metric family with labelled series."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str) -> None:
+        """
+        Initialize an empty metric family.
+
+        Args:
+            name: Prometheus metric name
+            help_text: Description shown in the HELP line
+        """
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Exposition lines of every series."""
+
+    def render(self) -> str:
+        """Exposition text of the family, HELP and TYPE lines first."""
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class ValueMetric(Metric):
+    """Metric family holding one value per series."""
+
+    def __init__(self, name: str, help_text: str) -> None:
+        super().__init__(name, help_text)
+        self._values: Dict[LabelSet, float] = {}
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{format_labels(key)} {format_value(value)}" for key, value in values]
+
+
+class Counter(ValueMetric):
+    """Monotonically increasing count, e.g. requests served."""
+
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        """
+        Add to the series with the given labels.
+
+        Args:
+            amount: Non-negative increment
+            **labels: Label values of the series
+        """
+        key = label_set(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(ValueMetric):
+    """Value that can go up and down, e.g. corpus size."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        """
+        Set the series with the given labels.
+
+        Args:
+            value: New value
+            **labels: Label values of the series
+        """
+        with self._lock:
+            self._values[label_set(labels)] = float(value)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, e.g. latencies."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ) -> None:
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: count per bucket (the last one is +Inf), sum of values
+        self._series: Dict[LabelSet, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        """
+        Record one value in the series with the given labels.
+
+        Args:
+            value: Observed value, e.g. seconds
+            **labels: Label values of the series
+        """
+        key = label_set(labels)
+        bucket = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][bucket] += 1
+            series[1][0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = sorted(
+                (key, (list(counts), total[0])) for key, (counts, total) in self._series.items()
+            )
+        lines = []
+        for key, (counts, total) in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else format_value(bound)
+                lines.append(
+                    f"{self.name}_bucket{format_labels(key, (('le', le),))} {cumulative}"
+                )
+            lines.append(f"{self.name}_sum{format_labels(key)} {format_value(total)}")
+            lines.append(f"{self.name}_count{format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics, rendered in Prometheus text format.
+
+    Metric families are created on first use and shared afterwards, so
+    modules record into them by name without passing a registry around.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty registry."""
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls: type, name: str, help_text: str, **kwargs) -> Metric:
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, help_text, **kwargs)
+        if not isinstance(metric, cls):
+            raise ValueError(f"Metric {name} is a {metric.kind}, not a {cls.kind}")
+        return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        """Get or create a counter."""
+        return self._get(Counter, name, help_text)
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        """Get or create a gauge."""
+        return self._get(Gauge, name, help_text)
+
+    def histogram(
+        self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS
+    ) -> Histogram:
+        """Get or create a histogram; buckets only apply on creation."""
+        return self._get(Histogram, name, help_text, buckets=buckets)
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            Exposition text, families in name order
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        return "\n".join(metric.render() for _, metric in metrics) + "\n"
+
+
+# Registry shared by the app, query processing and ingestion
+metrics = MetricsRegistry()
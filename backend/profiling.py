@@ -0,0 +1,124 @@
+import cProfile
+import io
+import os
+import pstats
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+# Request header and query parameter carrying the profiling token
+PROFILE_HEADER = "X-Profile-Token"
+PROFILE_PARAM = "profile"
+
+# Request header and query parameter asking for a text summary in the response
+SUMMARY_HEADER = "X-Profile-Summary"
+SUMMARY_PARAM = "profile_summary"
+
+# Held by the running profiler: from Python 3.12 cProfile uses sys.monitoring,
+# which allows only one active profiler per interpreter
+_profiler_lock = threading.Lock()
+
+
+def start_profiler() -> Optional[cProfile.Profile]:
+    """
+    Start a profiler unless one is already running in this process.
+
+    Returns:
+        Enabled profiler to pass to stop_profiler(), or None if another
+        request, an ingestion or another profiling tool is being profiled
+    """
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another tool, e.g. a debugger or coverage, holds the profiling hook
+        _profiler_lock.release()
+        return None
+    return profiler
+
+
+def stop_profiler(profiler: cProfile.Profile) -> None:
+    """
+    Stop a profiler started by start_profiler().
+
+    Args:
+        profiler: Running profiler
+    """
+    try:
+        profiler.disable()
+    finally:
+        _profiler_lock.release()
+
+
+def summarize_profile(profiler: cProfile.Profile, limit: int = 40) -> str:
+    """
+    Format the most expensive functions of a profile.
+
+    Args:
+        profiler: Finished profiler
+        limit: Number of functions listed
+
+    Returns:
+        pstats report sorted by cumulative time
+    """
+    output = io.StringIO()
+    stats = pstats.Stats(profiler, stream=output)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+def save_profile(profiler: cProfile.Profile, directory: str, label: str) -> Path:
+    """
+    Write a profile in pstats format, e.g. for snakeviz or pstats.Stats.
+
+    Args:
+        profiler: Finished profiler
+        directory: Directory to write to; created if missing
+        label: Name of what was profiled, such as a request path
+
+    Returns:
+        Path of the written .prof file
+    """
+    os.makedirs(directory, exist_ok=True)
+    slug = re.sub(r"[^A-Za-z0-9_]+", "-", label).strip("-") or "profile"
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{slug}-{uuid.uuid4().hex[:8]}.prof"
+    path = Path(directory) / name
+    profiler.dump_stats(str(path))
+    return path
+
+
+@contextmanager
+def profiled(directory: Optional[str], label: str) -> Iterator[Optional[cProfile.Profile]]:
+    """
+    Run the enclosed code under cProfile and save the profile.
+
+    Only the calling thread is profiled. Does nothing when directory is None,
+    and runs the code unprofiled when another profiler is already running.
+
+    Args:
+        directory: Directory for the .prof file, or None to disable profiling
+        label: Name of what is profiled, used in the file name
+
+    Yields:
+        The active profiler, or None when disabled or busy
+    """
+    if directory is None:
+        yield None
+        return
+    profiler = start_profiler()
+    if profiler is None:
+        print(f"Profiler busy, running {label} without profiling")
+        yield None
+        return
+    try:
+        yield profiler
+    finally:
+        stop_profiler(profiler)
+        path = save_profile(profiler, directory, label)
+        print(f"Saved {label} profile to {path}")
@@ -0,0 +1,132 @@
+from typing import Callable, Optional, Tuple
+import numpy as np
+
+# Storage types a scoring matrix can be quantized to
+PRECISIONS = ("int8", "float16")
+
+
+def _allocate_empty(name: str, shape: Tuple[int, ...], dtype: type) -> np.ndarray:
+    """Default allocator for QuantizedMatrix.quantize."""
+    return np.empty(shape, dtype=dtype)
+
+
+class QuantizedMatrix:
+    """
+    Reduced-precision copy of the normalized document matrix for coarse scans.
+
+    int8 stores each row as 8-bit codes with one float32 scale per row
+    (row ~= codes * scale), a quarter of the float32 size; float16 halves it.
+    Scores from the quantized copy are close to exact cosine similarities and
+    are used to pick candidates, which QueryProcessor then re-scores with the
+    full-precision matrix.
+
+    Rows are scored in chunks that are widened to float32 one at a time, so a
+    scan never materializes a full-precision copy of the matrix.
+    """
+
+    def __init__(
+        self, codes: np.ndarray, scales: Optional[np.ndarray] = None
+    ) -> None:
+        """
+        Initialize from quantized rows.
+
+        Args:
+            codes: Array of shape (rows, dim), int8 or float16
+            scales: Float32 scale per row for int8 codes; None for float16
+        """
+        self.codes = codes
+        self.scales = scales
+
+    @property
+    def precision(self) -> str:
+        """Storage type of the codes, one of PRECISIONS."""
+        return "int8" if self.codes.dtype == np.int8 else "float16"
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the codes and scales in bytes."""
+        return self.codes.nbytes + (0 if self.scales is None else self.scales.nbytes)
+
+    def __len__(self) -> int:
+        return self.codes.shape[0]
+
+    @classmethod
+    def quantize(
+        cls,
+        matrix: np.ndarray,
+        precision: str = "int8",
+        allocate: Optional[Callable[[str, Tuple[int, ...], type], np.ndarray]] = None,
+        chunk_size: int = 65536,
+    ) -> "QuantizedMatrix":
+        """
+        Quantize a normalized matrix chunk by chunk.
+
+        int8 rows use symmetric scaling: each row is divided by its largest
+        absolute value over 127 and rounded.
+
+        Args:
+            matrix: Normalized float32 document matrix, possibly memory-mapped
+            precision: One of PRECISIONS
+            allocate: Returns a writable array for a name ("codes" or
+                      "scales"), shape and dtype, e.g. a snapshot memmap;
+                      defaults to np.empty
+            chunk_size: Rows converted per step
+
+        Returns:
+            QuantizedMatrix holding the allocated arrays
+
+        Raises:
+            ValueError: If precision is unknown
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        if allocate is None:
+            allocate = _allocate_empty
+
+        num_rows, dim = matrix.shape
+        if precision == "float16":
+            codes = allocate("codes", (num_rows, dim), np.float16)
+            for start in range(0, num_rows, chunk_size):
+                codes[start : start + chunk_size] = matrix[start : start + chunk_size]
+            return cls(codes)
+
+        codes = allocate("codes", (num_rows, dim), np.int8)
+        scales = allocate("scales", (num_rows,), np.float32)
+        for start in range(0, num_rows, chunk_size):
+            chunk = np.asarray(matrix[start : start + chunk_size], dtype=np.float32)
+            chunk_scales = np.abs(chunk).max(axis=1) / 127.0
+            chunk_scales[chunk_scales == 0] = 1.0
+            codes[start : start + chunk_size] = np.rint(chunk / chunk_scales[:, None])
+            scales[start : start + chunk_size] = chunk_scales
+        return cls(codes, scales)
+
+    def scores(
+        self,
+        query_vector: np.ndarray,
+        rows: Optional[np.ndarray] = None,
+        chunk_size: int = 16384,
+    ) -> np.ndarray:
+        """
+        Compute approximate cosine similarities with a normalized query.
+
+        Args:
+            query_vector: Unit-length float32 query vector
+            rows: Optional rows to score; defaults to all
+            chunk_size: Rows widened to float32 per step
+
+        Returns:
+            Approximate score per row, or per entry of rows
+        """
+        num_rows = len(self) if rows is None else len(rows)
+        scores = np.empty(num_rows, dtype=np.float32)
+        for start in range(0, num_rows, chunk_size):
+            if rows is None:
+                selected = slice(start, start + chunk_size)
+            else:
+                selected = rows[start : start + chunk_size]
+            chunk = np.asarray(self.codes[selected], dtype=np.float32)
+            chunk_scores = chunk @ query_vector
+            if self.scales is not None:
+                chunk_scores *= self.scales[selected]
+            scores[start : start + chunk_size] = chunk_scores
+        return scores
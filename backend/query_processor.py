@@ -1,7 +1,122 @@
-from typing import List, Dict, Optional, Tuple
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Tuple, Union
+import re
+import threading
+import time
 import numpy as np
 from sentence_transformers import SentenceTransformer
 from documents import Document
+from corpus import Corpus, normalize_rows
+from quantization import QuantizedMatrix
+from encoder import encoders, MODEL_NAME
+from metrics import span
+
+# Ways of combining the lexical (FTS5/BM25) and semantic rankings:
+# - semantic: vector similarity over the whole corpus
+# - hybrid: reciprocal rank fusion of the lexical and semantic rankings
+# - filtered: vector similarity over lexical candidates only
+SEARCH_MODES = ("semantic", "hybrid", "filtered")
+
+# Rank offset of reciprocal rank fusion; damps the weight of top positions
+RRF_K = 60
+
+
+class QueryCache:
+    """
+    Thread-safe, bounded LRU cache of query embeddings.
+
+    Entries expire after ttl seconds and the least recently used entry is
+    evicted once max_size is reached. Hit and miss counts are kept for
+    monitoring. Safe to share between request threads.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 3600) -> None:
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_size: Maximum number of cached queries; 0 disables caching
+            ttl: Seconds an entry stays valid, or None for no expiry
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Build the cache key for a query.
+
+        Collapses whitespace and lowercases, which does not change the
+        embedding since the model's tokenizer is uncased.
+
+        Args:
+            query: Raw query text
+
+        Returns:
+            Normalized query text
+        """
+        return re.sub(r"\s+", " ", query).strip().lower()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Look up a cached embedding, counting the hit or miss.
+
+        Args:
+            key: Normalized query text
+
+        Returns:
+            Cached embedding, or None if absent or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (
+                self.ttl is None or time.monotonic() - entry[0] < self.ttl
+            ):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """
+        Store an embedding, evicting the least recently used entry if full.
+
+        Args:
+            key: Normalized query text
+            vector: Query embedding; stored read-only
+        """
+        if self.max_size <= 0:
+            return
+        vector.setflags(write=False)
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache occupancy and effectiveness.
+
+        Returns:
+            Dictionary with size, max_size, hits, misses and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
 
 
 class QueryProcessor:
@@ -11,36 +126,121 @@ class QueryProcessor:
     Uses a sentence transformer model to convert text queries into vector space,
     then computes similarity scores with document embeddings to find the most relevant matches.
     The model is optimized for cosine similarity and shorter passages.
-    """
 
-    _shared_model: Optional[SentenceTransformer] = None
+    Document vectors are combined and normalized once at construction into a single
+    contiguous float32 matrix, so a search is one matrix-vector product followed by
+    a partial sort for the top results.
+
+    When the corpus holds per-field matrices, a search may also supply its own
+    field weights. The score is then the weighted mean of the per-field cosine
+    similarities, computed as a single product of the flattened field matrices
+    with the concatenated weighted query vectors.
+
+    With a quantized copy of the matrix (int8 or float16), top_k searches scan
+    the compact copy and re-rank the best rerank_candidates rows exactly
+    against the full-precision matrix, which may stay on disk as a memmap.
+
+    Corpora backed by a DocumentStore can also be searched lexically through
+    the store's full-text index, either fused with the semantic ranking or as
+    a cheap candidate filter ahead of vector scoring (see SEARCH_MODES).
+    """
 
     @classmethod
     def get_model(cls) -> SentenceTransformer:
         """
-        Get or initialize the shared transformer model singleton.
+        Get the shared transformer model from the process-wide encoder registry.
 
         Returns:
             SentenceTransformer: Instance of msmarco-MiniLM-L6-cos-v5 model,
                                 optimized for fast encoding and cosine similarity
         """
-        if cls._shared_model is None:
-            cls._shared_model = SentenceTransformer(
-                "sentence-transformers/msmarco-MiniLM-L6-cos-v5"
-            )
-        return cls._shared_model
+        return encoders.get(MODEL_NAME)
 
-    def __init__(self, documents: List[Document]) -> None:
+    def __init__(
+        self,
+        documents: Union[List[Document], Corpus],
+        doc_ids: Optional[List[str]] = None,
+        doc_matrix: Optional[np.ndarray] = None,
+        index: Optional[Any] = None,
+        query_cache: Optional[QueryCache] = None,
+        lexical_candidates: int = 1000,
+        quantized: Optional[QuantizedMatrix] = None,
+        rerank_candidates: int = 200,
+    ) -> None:
         """
         Initialize processor with collection of documents to search.
 
         Args:
-            documents: List of Document objects to include in search
+            documents: Corpus to search, or a list of Document objects which
+                       is wrapped in an in-memory Corpus
+            doc_ids: Stable IDs of listed documents, in the same order;
+                     defaults to their list positions
+            doc_matrix: Optional precomputed scoring matrix for listed
+                        documents, with one normalized row per document;
+                        built from the documents' vectors when omitted
+            index: Optional approximate nearest-neighbor index over the corpus
+                   matrix (e.g. IVFIndex) used for top_k searches; searches
+                   without top_k always score exactly
+            query_cache: Cache for query embeddings; a default-sized cache is
+                         created when omitted
+            lexical_candidates: Number of full-text matches considered by
+                                hybrid and filtered searches
+            quantized: Optional reduced-precision copy of the corpus matrix
+                       used for the coarse scan of top_k searches
+            rerank_candidates: Number of coarse candidates re-scored exactly
+                               when searching the quantized matrix
+        """
+        if isinstance(documents, Corpus):
+            self.corpus = documents
+        else:
+            self.corpus = Corpus.from_documents(documents, doc_ids, doc_matrix)
+        self.doc_ids = self.corpus.doc_ids
+        self.doc_matrix = self.corpus.matrix
+        self.index = index
+        self.query_cache = query_cache if query_cache is not None else QueryCache()
+        self.lexical_candidates = lexical_candidates
+        self.quantized = quantized
+        self.rerank_candidates = rerank_candidates
+
+    def memory_usage(self) -> Dict[str, int]:
         """
-        self.documents = documents
+        Report the size of the arrays searches read.
+
+        Returns:
+            Dictionary mapping each component (see Corpus.memory_usage, plus
+            quantized and ivf_index when configured) to its size in bytes
+        """
+        usage = self.corpus.memory_usage()
+        if self.quantized is not None:
+            usage["quantized"] = self.quantized.nbytes
+        if self.index is not None:
+            usage["ivf_index"] = (
+                self.index.centroids.nbytes
+                + self.index.order.nbytes
+                + self.index.offsets.nbytes
+            )
+        return usage
+
+    @staticmethod
+    def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+        """
+        Scale each row of a matrix to unit length.
+
+        Args:
+            matrix: 2D array of row vectors
+
+        Returns:
+            Contiguous float32 array of L2-normalized rows
+        """
+        return normalize_rows(matrix)
 
     def search(
-        self, query: str, top_k: Optional[int] = None
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        mode: str = "semantic",
+        filters: Optional[Dict[str, Any]] = None,
     ) -> List[Tuple[Document, float]]:
         """
         Search documents for matches to query text.
@@ -51,16 +251,461 @@ class QueryProcessor:
         Args:
             query: Search query text
             top_k: Optional limit on number of results to return
+            field_weights: Optional per-query weight of each field (see rank)
+            mode: One of SEARCH_MODES
+            filters: Optional metadata filters (see search_indices)
 
         Returns:
             List of (Document, score) tuples sorted by descending score
         """
-        query_vector = self.get_model().encode(query)
-        scored_docs = [
-            (doc, self.compute_similarity(query_vector, doc)) for doc in self.documents
+        indices, scores = self.search_indices(
+            query, top_k, field_weights, mode, filters
+        )
+        documents = self.corpus.get_documents(indices)
+        return [(doc, float(score)) for doc, score in zip(documents, scores)]
+
+    def search_indices(
+        self,
+        query: str,
+        top_k: Optional[int] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        mode: str = "semantic",
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Search documents for matches to query text, returning matrix positions.
+
+        Hybrid scores are reciprocal rank fusion scores rather than cosine
+        similarities; filtered scores are cosine similarities.
+
+        Metadata filters select candidate rows before anything is scored, so
+        a selective filter makes the vector scan smaller rather than adding a
+        pass over the results.
+
+        Args:
+            query: Search query text
+            top_k: Optional limit on number of results to return
+            field_weights: Optional per-query weight of each field (see rank)
+            mode: One of SEARCH_MODES
+            filters: Optional keyword arguments for Corpus.filter_rows
+                     (date_from, date_to, addresses)
+
+        Returns:
+            Tuple of (document indices, scores) sorted by descending score
+
+        Raises:
+            ValueError: If mode is unknown, needs a full-text index the
+                        corpus does not have, or a filter is invalid
+        """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        rows = None
+        if filters:
+            with span("filter"):
+                rows = self.corpus.filter_rows(**filters)
+        with span("encode"):
+            query_vector = self.encode_query(query)
+        if mode == "semantic":
+            return self.rank(query_vector, top_k, field_weights, rows=rows)
+
+        num_docs = len(self.corpus)
+        depth = num_docs if top_k is None else max(top_k, self.lexical_candidates)
+        with span("lexical"):
+            lexical_rows = self.lexical_rows(query, min(depth, num_docs))
+            if rows is not None:
+                lexical_rows = lexical_rows[np.isin(lexical_rows, rows)]
+        if mode == "filtered":
+            return self.rank(query_vector, top_k, field_weights, rows=lexical_rows)
+
+        semantic_rows, _ = self.rank(query_vector, depth, field_weights, rows=rows)
+        with span("fuse"):
+            return self.fuse_rankings([lexical_rows, semantic_rows], top_k)
+
+    def lexical_rows(self, query: str, limit: int) -> np.ndarray:
+        """
+        Rank corpus rows by BM25 using the store's full-text index.
+
+        Args:
+            query: Search query text
+            limit: Maximum number of rows to return
+
+        Returns:
+            Corpus rows of matching documents, best match first
+
+        Raises:
+            ValueError: If the corpus is not backed by a DocumentStore
+        """
+        if self.corpus.store is None:
+            raise ValueError("Lexical search needs a corpus backed by a document store")
+        matches = self.corpus.store.search_text(query, limit)
+        rows = self.corpus.rows_of([doc_id for doc_id, _ in matches])
+        return rows[rows >= 0]
+
+    @staticmethod
+    def fuse_rankings(
+        rankings: List[np.ndarray], top_k: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Merge rankings with reciprocal rank fusion.
+
+        Each row scores the sum of 1 / (RRF_K + rank) over the rankings it
+        appears in, so rows ranked well by several rankings rise to the top
+        without having to calibrate BM25 against cosine scores.
+
+        Args:
+            rankings: Arrays of corpus rows, each best first
+            top_k: Optional limit on number of results to return
+
+        Returns:
+            Tuple of (document indices, fused scores) sorted by descending score
+        """
+        rankings = [ranking for ranking in rankings if len(ranking)]
+        if not rankings:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        rows = np.concatenate(rankings)
+        contributions = np.concatenate(
+            [1.0 / (RRF_K + 1 + np.arange(len(ranking))) for ranking in rankings]
+        )
+        unique_rows, inverse = np.unique(rows, return_inverse=True)
+        fused = np.bincount(inverse, weights=contributions).astype(np.float32)
+        order = QueryProcessor.top_indices(fused, top_k)
+        return unique_rows[order], fused[order]
+
+    def encode_query(self, query: str) -> np.ndarray:
+        """
+        Encode query text, reusing cached embeddings of repeated queries.
+
+        Args:
+            query: Search query text
+
+        Returns:
+            Query embedding vector
+        """
+        key = self.query_cache.normalize(query)
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = np.asarray(self.get_model().encode(key))
+            self.query_cache.put(key, vector)
+        return vector
+
+    def encode_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode many queries with one batched model call.
+
+        Cached embeddings are reused; only the remaining distinct queries are
+        sent to the model, together.
+
+        Args:
+            queries: Search query texts
+
+        Returns:
+            Array of shape (len(queries), dim) with one embedding per query
+        """
+        keys = [self.query_cache.normalize(query) for query in queries]
+        vectors = {key: self.query_cache.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, vector in vectors.items() if vector is None]
+        if missing:
+            embeddings = self.get_model().encode(missing, batch_size=len(missing))
+            for key, vector in zip(missing, embeddings):
+                vectors[key] = np.asarray(vector)
+                self.query_cache.put(key, vectors[key])
+        return np.stack([vectors[key] for key in keys])
+
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: Optional[int] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        filters: Optional[Dict[str, Any]] = None,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Search documents for many queries at once, returning matrix positions.
+
+        All queries are encoded in one batched call and scored with a single
+        matrix-matrix product per block of queries (see rank_many). Always
+        scores exactly; the approximate index is not used.
+
+        Args:
+            queries: Search query texts
+            top_k: Optional limit on number of results per query
+            field_weights: Optional weight of each field, shared by all queries
+            filters: Optional metadata filters shared by all queries (see
+                     search_indices)
+
+        Returns:
+            One (document indices, scores) tuple per query, each sorted by
+            descending score
+
+        Raises:
+            ValueError: If the field weights or filters are invalid
+        """
+        if not queries:
+            return []
+        rows = None
+        if filters:
+            with span("filter"):
+                rows = self.corpus.filter_rows(**filters)
+        with span("encode"):
+            query_matrix = self.encode_queries(queries)
+        return self.rank_many(query_matrix, top_k, field_weights, rows)
+
+    def rank_many(
+        self,
+        query_matrix: np.ndarray,
+        top_k: Optional[int] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        rows: Optional[np.ndarray] = None,
+        max_scores: int = 1 << 24,
+    ) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Score many query vectors against the corpus and select each one's best matches.
+
+        Queries are scored in blocks with one matrix-matrix product each, the
+        block size chosen so a block's score matrix holds at most max_scores
+        values. Top matches are then picked per row with argpartition.
+
+        Args:
+            query_matrix: Encoded query vectors, one per row
+            top_k: Optional limit on number of results per query
+            field_weights: Optional weight of each field (see rank)
+            rows: Optional corpus rows to restrict scoring to
+            max_scores: Upper bound on the size of each block's score matrix
+
+        Returns:
+            One (document indices, cosine similarity scores) tuple per query,
+            each sorted by descending score
+        """
+        query_matrix = normalize_rows(query_matrix)
+        num_queries = query_matrix.shape[0]
+        doc_matrix = self.doc_matrix
+        if rows is not None and field_weights is None:
+            doc_matrix = np.asarray(self.doc_matrix[rows])
+        num_docs = len(self.corpus) if rows is None else len(rows)
+        if num_docs == 0:
+            empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32))
+            return [empty for _ in range(num_queries)]
+
+        results = []
+        block_size = max(1, max_scores // num_docs)
+        for start in range(0, num_queries, block_size):
+            block = query_matrix[start : start + block_size]
+            with span("score"):
+                if field_weights is not None:
+                    scores = self.score_fields(block, field_weights, rows).T
+                else:
+                    scores = block @ doc_matrix.T
+
+            with span("sort"):
+                if top_k is None or top_k >= num_docs:
+                    order = np.argsort(-scores, axis=1, kind="stable")
+                elif top_k <= 0:
+                    order = np.zeros((len(block), 0), dtype=np.int64)
+                else:
+                    candidates = np.argpartition(-scores, top_k - 1, axis=1)[:, :top_k]
+                    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+                    best = np.argsort(-candidate_scores, axis=1, kind="stable")
+                    order = np.take_along_axis(candidates, best, axis=1)
+
+            block_scores = np.take_along_axis(scores, order, axis=1)
+            indices = order if rows is None else rows[order]
+            results.extend(zip(indices, block_scores))
+        return results
+
+    def rank(
+        self,
+        query_vector: np.ndarray,
+        top_k: Optional[int] = None,
+        field_weights: Optional[Dict[str, float]] = None,
+        rows: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Score every document against a query vector and select the best matches.
+
+        Uses argpartition to pick the top_k candidates in linear time and only
+        sorts those, rather than sorting the whole corpus. When an approximate
+        index is configured, top_k searches with the default weights are
+        delegated to it; otherwise, with a quantized matrix, they scan the
+        quantized matrix and re-rank its best candidates exactly.
+
+        Args:
+            query_vector: Encoded query vector
+            top_k: Optional limit on number of results to return
+            field_weights: Optional weight of each field for this query;
+                           fields left out get no weight. Scores documents
+                           against the corpus per-field matrices instead of
+                           the combined matrix.
+            rows: Optional corpus rows to restrict scoring to, e.g. lexical
+                  candidates
+
+        Returns:
+            Tuple of (document indices, cosine similarity scores) sorted by
+            descending score
+
+        Raises:
+            ValueError: If field_weights is given but the corpus has no
+                        per-field matrices, names an unknown field, or has
+                        no positive weight
+        """
+        num_docs = self.doc_matrix.shape[0]
+        if num_docs == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+        norm = np.linalg.norm(query_vector)
+        if norm > 0:
+            query_vector = query_vector / norm
+
+        use_index = rows is None and field_weights is None and self.index is not None
+        if use_index and top_k is not None and 0 < top_k < num_docs:
+            with span("score"):
+                return self.index.search(query_vector, top_k)
+        if field_weights is None and self.quantized is not None and top_k is not None:
+            return self.rank_quantized(query_vector, top_k, rows)
+
+        with span("score"):
+            if field_weights is not None:
+                scores = self.score_fields(query_vector, field_weights, rows)
+            elif rows is not None:
+                scores = np.asarray(self.doc_matrix[rows]) @ query_vector
+            else:
+                scores = self.doc_matrix @ query_vector
+
+        with span("sort"):
+            order = self.top_indices(scores, top_k)
+        indices = order if rows is None else rows[order]
+        return indices, scores[order]
+
+    def rank_quantized(
+        self, query_vector: np.ndarray, top_k: int, rows: Optional[np.ndarray] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Select top matches from the quantized matrix, then re-score them exactly.
+
+        Args:
+            query_vector: Normalized query vector
+            top_k: Number of results to return
+            rows: Optional corpus rows to restrict scoring to
+
+        Returns:
+            Tuple of (document indices, exact cosine similarity scores) sorted
+            by descending score
+        """
+        with span("score"):
+            coarse = self.quantized.scores(query_vector, rows)
+        with span("sort"):
+            candidates = self.top_indices(coarse, max(top_k, self.rerank_candidates))
+        with span("rerank"):
+            if rows is not None:
+                candidates = rows[candidates]
+            # Sorted rows read the full-precision memmap sequentially
+            candidates = np.sort(candidates)
+            scores = np.asarray(self.doc_matrix[candidates]) @ query_vector
+            order = self.top_indices(scores, top_k)
+        return candidates[order], scores[order]
+
+    def score_fields(
+        self,
+        query_vector: np.ndarray,
+        field_weights: Dict[str, float],
+        rows: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Compute the weighted mean of per-field cosine similarities.
+
+        The (documents, fields, dim) field matrices are viewed as one
+        (documents, fields * dim) matrix and multiplied by the query vector
+        repeated once per field and scaled by that field's weight, so every
+        field is scored in a single matrix-vector product.
+
+        Args:
+            query_vector: Normalized query vector, or a matrix of normalized
+                          query rows to score in one matrix product
+            field_weights: Weight of each field; fields left out get no weight
+            rows: Optional corpus rows to score; defaults to all
+
+        Returns:
+            Score per document, or per entry of rows; for a query matrix an
+            array of shape (documents, queries)
+
+        Raises:
+            ValueError: If the weights cannot be applied to this corpus
+        """
+        field_matrices = self.corpus.field_matrices
+        field_names = self.corpus.field_names
+        if field_matrices is None:
+            raise ValueError("Per-field weighting is not available for this corpus")
+        unknown = set(field_weights) - set(field_names)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+
+        weights = np.array(
+            [field_weights.get(field, 0.0) for field in field_names], dtype=np.float32
+        )
+        total = weights.sum()
+        if np.any(weights < 0) or total <= 0:
+            raise ValueError("Field weights must be non-negative with a positive sum")
+
+        if rows is not None:
+            field_matrices = np.asarray(field_matrices[rows])
+        num_docs, num_fields, dim = field_matrices.shape
+        weighted = (weights[:, None] / total) * query_vector[..., None, :]
+        weighted_query = weighted.reshape(*query_vector.shape[:-1], num_fields * dim)
+        return field_matrices.reshape(num_docs, num_fields * dim) @ weighted_query.T
+
+    @staticmethod
+    def top_indices(scores: np.ndarray, top_k: Optional[int] = None) -> np.ndarray:
+        """
+        Select the positions of the highest scores in descending order.
+
+        Args:
+            scores: Score per document
+            top_k: Optional limit on number of positions to return
+
+        Returns:
+            Array of document indices
+        """
+        num_docs = scores.shape[0]
+        if top_k is None or top_k >= num_docs:
+            return np.argsort(-scores, kind="stable")
+        if top_k <= 0:
+            return np.zeros(0, dtype=np.int64)
+        candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+    @staticmethod
+    def snippet(text: Optional[str], query: str, length: int = 200) -> str:
+        """
+        Extract a short excerpt of a text around the first query term it contains.
+
+        Falls back to the start of the text when no query term occurs in it.
+
+        Args:
+            text: Full text, typically an email body
+            query: Search query text
+            length: Maximum snippet length in characters
+
+        Returns:
+            Excerpt with ellipses marking truncated ends
+        """
+        text = text or ""
+        if len(text) <= length:
+            return text
+
+        lowered = text.lower()
+        positions = [
+            lowered.find(term)
+            for term in re.findall(r"\w+", query.lower())
+            if len(term) > 2
         ]
-        scored_docs.sort(key=lambda x: x[1], reverse=True)
-        return scored_docs[:top_k] if top_k is not None else scored_docs
+        positions = [pos for pos in positions if pos >= 0]
+        start = max(0, min(positions) - length // 4) if positions else 0
+        start = min(start, len(text) - length)
+
+        excerpt = text[start : start + length]
+        prefix = "..." if start > 0 else ""
+        suffix = "..." if start + length < len(text) else ""
+        return f"{prefix}{excerpt}{suffix}"
 
     def compute_similarity(self, query_vector: np.ndarray, doc: Document) -> float:
         """
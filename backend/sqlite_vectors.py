@@ -0,0 +1,55 @@
+import hashlib
+import sqlite3
+from typing import Any, Iterator, Sequence, Tuple
+import numpy as np
+
+# Vectors are stored as raw little-endian float32 regardless of host byte order
+VECTOR_DTYPE = np.dtype("<f4")
+
+# Texts are keyed by this many leading bytes of their SHA-256
+TEXT_HASH_SIZE = 16
+
+# Values bound per IN list, well below SQLite's limit on bound parameters
+IN_CHUNK_SIZE = 500
+
+
+def text_hash(text: str) -> bytes:
+    """
+    Compute the key under which a text's vector is stored.
+
+    Used by both the document store's field value table and the embedding
+    cache, so the same text has the same key in each.
+
+    Args:
+        text: Text as passed to the encoder
+
+    Returns:
+        TEXT_HASH_SIZE-byte digest
+    """
+    return hashlib.sha256(text.encode("utf-8")).digest()[:TEXT_HASH_SIZE]
+
+
+def select_in(
+    conn: sqlite3.Connection,
+    query: str,
+    values: Sequence[Any],
+    params: Sequence[Any] = (),
+) -> Iterator[Tuple[Any, ...]]:
+    """
+    Run a query whose IN list may exceed SQLite's bound parameter limit.
+
+    The values are bound in chunks of IN_CHUNK_SIZE, one statement per chunk.
+
+    Args:
+        conn: Open connection to query through
+        query: SELECT statement with a {placeholders} slot for the IN list
+        values: Values of the IN list
+        params: Parameters bound before the IN list
+
+    Yields:
+        Result rows of every chunk
+    """
+    for start in range(0, len(values), IN_CHUNK_SIZE):
+        chunk = values[start : start + IN_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        yield from conn.execute(query.format(placeholders=placeholders), [*params, *chunk])
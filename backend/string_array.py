@@ -0,0 +1,97 @@
+import operator
+from typing import Iterator, List, Optional, Sequence, Union
+import numpy as np
+
+
+class StringArray(Sequence[str]):
+    """
+    Read-only sequence of strings stored as one fixed-width bytes array.
+
+    Holds UTF-8 encoded strings in a numpy "S" array instead of one Python
+    object per string, so the array can be saved with np.save and memory-
+    mapped: every server process mapping the same file shares one copy
+    through the OS page cache rather than building a private list. Strings
+    are decoded on access.
+
+    When the strings are in bytewise order (e.g. document IDs in SQLite ID
+    order), positions() finds strings by binary search without an index.
+    """
+
+    def __init__(self, data: np.ndarray) -> None:
+        """
+        Wrap an encoded array.
+
+        Args:
+            data: One-dimensional "S" array of UTF-8 strings, possibly
+                  memory-mapped
+        """
+        self.data = data
+        self._sorted: Optional[bool] = None
+
+    @classmethod
+    def from_strings(cls, values: Sequence[str]) -> "StringArray":
+        """
+        Encode strings into a new array.
+
+        Args:
+            values: Strings to store; must not end in NUL characters
+
+        Returns:
+            StringArray holding the encoded strings
+        """
+        encoded = [value.encode("utf-8") for value in values]
+        width = max((len(value) for value in encoded), default=0)
+        return cls(np.array(encoded, dtype=f"S{max(width, 1)}"))
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the encoded strings in bytes."""
+        return self.data.nbytes
+
+    def __len__(self) -> int:
+        return self.data.shape[0]
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, List[str]]:
+        if isinstance(index, slice):
+            return [value.decode("utf-8") for value in self.data[index]]
+        return self.data[operator.index(index)].decode("utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        for value in self.data:
+            yield value.decode("utf-8")
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, StringArray):
+            return np.array_equal(self.data, other.data)
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def is_sorted(self) -> bool:
+        """Whether the strings are in ascending bytewise order."""
+        if self._sorted is None:
+            self._sorted = bool(np.all(self.data[:-1] <= self.data[1:]))
+        return self._sorted
+
+    def positions(self, values: Sequence[str]) -> np.ndarray:
+        """
+        Find the positions of strings by binary search.
+
+        Args:
+            values: Strings to look up
+
+        Returns:
+            Position of each string, -1 for strings not present
+
+        Raises:
+            ValueError: If the array is not sorted
+        """
+        if not self.is_sorted():
+            raise ValueError("positions() needs a sorted StringArray")
+        if not len(values) or not len(self):
+            return np.full(len(values), -1, dtype=np.int64)
+        keys = np.array([value.encode("utf-8") for value in values], dtype=bytes)
+        found = np.searchsorted(self.data, keys).astype(np.int64)
+        clipped = np.minimum(found, len(self) - 1)
+        found[self.data[clipped] != keys] = -1
+        return found
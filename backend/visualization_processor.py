@@ -1,4 +1,4 @@
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Optional
 import numpy as np
 from sklearn.decomposition import PCA
 from documents import Document
@@ -12,26 +12,87 @@ class VisualizationProcessor:
     and prepares the data for visualization with custom coloring based on relevance scores.
     The visualization uses PCA to create a 2D scatter plot where similar documents
     appear closer together.
+
+    The projection is normally fitted once per corpus with fit_projection and
+    passed in per request, so layouts stay stable between queries; PCA is only
+    fitted on the results themselves when no projection is given.
     """
 
     _shared_pca_embeddings: np.ndarray = None
     _shared_doc_vectors: np.ndarray = None
 
-    def __init__(self, doc_scores: List[Tuple[Document, float]]) -> None:
+    def __init__(
+        self,
+        doc_scores: List[Tuple[Document, float]],
+        doc_vectors: Optional[np.ndarray] = None,
+        embeddings_2d: Optional[np.ndarray] = None,
+    ) -> None:
         """
         Initialize processor with document-score pairs and compute 2D embeddings.
 
         Args:
             doc_scores: List of tuples containing (Document, similarity_score) pairs
+            doc_vectors: Optional precomputed vectors aligned with doc_scores;
+                         combined document vectors are used when omitted
+            embeddings_2d: Optional precomputed 2D coordinates aligned with
+                           doc_scores, e.g. rows of a corpus-wide projection
         """
         self.doc_scores = doc_scores
         self.documents = [doc for doc, _ in doc_scores]
         self.scores = [score for _, score in doc_scores]
 
+        if embeddings_2d is not None:
+            self.embeddings_2d = np.asarray(embeddings_2d)
+            return
+
         # Compute 2D embeddings using PCA
-        doc_vectors = np.array([doc.get_combined_vector() for doc in self.documents])
+        if doc_vectors is None:
+            doc_vectors = np.array(
+                [doc.get_combined_vector() for doc in self.documents]
+            )
+        if len(doc_vectors) >= 2:
+            pca = PCA(n_components=2, random_state=42)
+            self.embeddings_2d = pca.fit_transform(doc_vectors)
+        else:
+            # PCA needs at least two points; place a lone result at the origin
+            self.embeddings_2d = np.zeros((len(doc_vectors), 2))
+
+    @staticmethod
+    def fit_projection(
+        doc_matrix: np.ndarray, sample_size: int = 100000, chunk_size: int = 65536
+    ) -> np.ndarray:
+        """
+        Fit a 2D PCA projection over a whole corpus and project every document.
+
+        PCA is fitted on a fixed random sample of rows for large corpora, then
+        all rows are transformed in chunks.
+
+        Args:
+            doc_matrix: Matrix with one vector per document
+            sample_size: Maximum number of rows used to fit PCA
+            chunk_size: Rows transformed per step
+
+        Returns:
+            Float32 array of shape (num_docs, 2)
+        """
+        num_docs = doc_matrix.shape[0]
+        if num_docs < 2:
+            return np.zeros((num_docs, 2), dtype=np.float32)
+
+        rng = np.random.default_rng(42)
+        sample = (
+            np.sort(rng.choice(num_docs, sample_size, replace=False))
+            if num_docs > sample_size
+            else slice(None)
+        )
         pca = PCA(n_components=2, random_state=42)
-        self.embeddings_2d = pca.fit_transform(doc_vectors)
+        pca.fit(np.asarray(doc_matrix[sample]))
+
+        projection = np.empty((num_docs, 2), dtype=np.float32)
+        for start in range(0, num_docs, chunk_size):
+            chunk = np.asarray(doc_matrix[start : start + chunk_size])
+            projection[start : start + chunk_size] = pca.transform(chunk)
+        return projection
 
     @staticmethod
     def exp_normalize(scores: np.ndarray, alpha: float, beta: float) -> np.ndarray:
@@ -0,0 +1,77 @@
+"""
+Recall vs latency of the IVF index against exact brute-force search.
+
+Runs on the memory-mapped snapshot of an existing document store, or on a
+synthetic clustered corpus when no store is given. Prints one JSON object per
+configuration.
+
+Usage:
+    python benchmarks/ann_recall.py [--store ../data/processed_doc_cache.db]
+        [--docs 100000] [--queries 200] [--top-k 20] [--probes 1 2 4 8 16 32]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from ann_index import IVFIndex
+from query_processor import QueryProcessor
+from synthetic import synthetic_matrix
+
+
+def snapshot_matrix(store_path: str) -> np.ndarray:
+    """Memory-mapped search matrix from a document store's snapshot."""
+    from document_store import DocumentStore
+
+    snapshot = DocumentStore(store_path).snapshot_path / "vectors.npy"
+    return np.load(snapshot, mmap_mode="r")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store", help="Document store whose snapshot to benchmark")
+    parser.add_argument("--docs", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=20)
+    parser.add_argument("--lists", type=int, default=0)
+    parser.add_argument("--probes", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    args = parser.parse_args()
+
+    matrix = snapshot_matrix(args.store) if args.store else synthetic_matrix(args.docs)
+    rng = np.random.default_rng(1)
+    # Perturbed corpus rows stand in for queries near real documents
+    queries = QueryProcessor.normalize_rows(
+        np.asarray(matrix[rng.choice(matrix.shape[0], args.queries, replace=False)])
+        + rng.normal(scale=0.05, size=(args.queries, matrix.shape[1]))
+    )
+    exact = QueryProcessor([], doc_matrix=matrix)
+
+    start = time.perf_counter()
+    truth = [set(exact.rank(q, args.top_k)[0]) for q in queries]
+    exact_ms = (time.perf_counter() - start) * 1000 / len(queries)
+    print(json.dumps({"engine": "exact", "docs": matrix.shape[0], "top_k": args.top_k,
+                      "recall": 1.0, "latency_ms": round(exact_ms, 3)}))
+
+    start = time.perf_counter()
+    index = IVFIndex.build(matrix, n_lists=args.lists or None)
+    build_s = time.perf_counter() - start
+
+    for n_probe in args.probes:
+        start = time.perf_counter()
+        found = [set(index.search(q, args.top_k, n_probe=n_probe)[0]) for q in queries]
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(json.dumps({"engine": "ivf", "docs": matrix.shape[0], "top_k": args.top_k,
+                          "n_lists": index.n_lists, "n_probe": n_probe,
+                          "build_s": round(build_s, 2), "recall": round(float(recall), 4),
+                          "latency_ms": round(latency_ms, 3)}))
+
+
+if __name__ == "__main__":
+    main()
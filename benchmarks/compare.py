@@ -0,0 +1,65 @@
+"""
+Compare two run_benchmarks.py reports and flag regressions.
+
+Matches records by name, variant and corpus size and prints the change of
+the median time of each. Exits with status 1 if any measurement got slower
+by more than the threshold, so it can gate a commit in CI.
+
+Usage:
+    python benchmarks/compare.py base.json new.json [--threshold 0.1] [--min-ms 1]
+"""
+import argparse
+import json
+import sys
+from typing import Any, Dict, Tuple
+
+Key = Tuple[str, str, int]
+
+
+def load_results(path: str) -> Tuple[Dict[str, Any], Dict[Key, Dict[str, Any]]]:
+    """Report metadata and its records keyed by (name, variant, docs)."""
+    with open(path) as f:
+        report = json.load(f)
+    records = {
+        (record["name"], record["variant"], record["docs"]): record
+        for record in report["results"]
+    }
+    return report["meta"], records
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("base")
+    parser.add_argument("new")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="Relative slowdown reported as a regression")
+    parser.add_argument("--min-ms", type=float, default=1.0,
+                        help="Ignore differences smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    base_meta, base = load_results(args.base)
+    new_meta, new = load_results(args.new)
+    print(f"base: {base_meta.get('revision')}  new: {new_meta.get('revision')}")
+    for field in ("platform", "cpus", "python", "numpy"):
+        if base_meta.get(field) != new_meta.get(field):
+            print(f"warning: {field} differs ({base_meta.get(field)} vs {new_meta.get(field)})")
+
+    regressions = 0
+    print(f"{'benchmark':<44}{'docs':>9}{'base ms':>12}{'new ms':>12}{'change':>9}")
+    for key in sorted(base.keys() & new.keys()):
+        before, after = base[key]["time_ms"], new[key]["time_ms"]
+        change = (after - before) / before if before else 0.0
+        regressed = change > args.threshold and after - before > args.min_ms
+        regressions += regressed
+        name = f"{key[0]}.{key[1]}"
+        print(f"{name:<44}{key[2]:>9}{before:>12.3f}{after:>12.3f}{change:>+9.1%}"
+              + ("  REGRESSION" if regressed else ""))
+
+    for key in sorted(base.keys() ^ new.keys()):
+        print(f"only in {'base' if key in base else 'new'}: {key[0]}.{key[1]} ({key[2]} docs)")
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""
+End-to-end benchmarks of ingestion, loading, search and the search API.
+
+Generates a deterministic synthetic mailbox of each requested size, swaps the
+sentence transformer for the stub encoder in synthetic.py so everything runs
+offline, and times:
+
+    ingest     EmailProcessor.process_mbox into an empty store
+    load       DocumentStore.load_all_documents and Corpus.from_store
+    startup    SearchicaApp start: index build (cold) and snapshot load (warm)
+    search     QueryProcessor.search per search mode and with field weights
+    visualize  VisualizationProcessor corpus projection and per-query plot data
+    api        POST /api/search through the Flask test client
+
+Writes one JSON document with a record per measurement, keyed by name,
+variant and corpus size; compare two runs with benchmarks/compare.py.
+Timings use the stub encoder, so they cover everything except model
+inference. Mailboxes are cached in the work directory between runs; stores
+are rebuilt every run.
+
+Usage:
+    python benchmarks/run_benchmarks.py [--docs 10000 100000 1000000]
+        [--queries 100] [--repeat 3] [--workdir /tmp/searchica-bench]
+        [--only ingest search api] [--output bench.json]
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from synthetic import HashingEncoder, sample_queries, write_mbox
+from encoder import encoders, MODEL_NAME
+
+BENCHMARKS = ("ingest", "load", "startup", "search", "visualize", "api")
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, Any]:
+    """Median, spread and count of per-run timings in milliseconds."""
+    samples = np.asarray(samples_ms)
+    return {
+        "time_ms": round(float(np.median(samples)), 3),
+        "min_ms": round(float(samples.min()), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "runs": len(samples),
+    }
+
+
+def time_calls(fn: Callable[[Any], Any], args: List[Any], repeat: int) -> List[float]:
+    """Time fn on each argument, repeat times over, in milliseconds per call."""
+    samples = []
+    for _ in range(repeat):
+        for arg in args:
+            start = time.perf_counter()
+            fn(arg)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def git_revision() -> Optional[str]:
+    """Commit the benchmarks run on, marked dirty with uncommitted changes."""
+    repo = os.path.dirname(backend_dir)
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=repo, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+        dirty = subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=repo, stderr=subprocess.DEVNULL, text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return commit + ("-dirty" if dirty else "")
+
+
+def run_size(num_docs: int, args: argparse.Namespace, emit: Callable[..., None]) -> None:
+    """Run the selected benchmarks on a mailbox of num_docs messages."""
+    from app import SearchicaApp
+    from corpus import Corpus
+    from document_store import DocumentStore
+    from documents import Email
+    from email_processor import EmailProcessor
+    from query_processor import SEARCH_MODES
+    from visualization_processor import VisualizationProcessor
+
+    mbox_path = os.path.join(args.workdir, f"synthetic-{num_docs}-{args.seed}.mbox")
+    if not os.path.exists(mbox_path):
+        print(f"Generating {num_docs} messages", file=sys.stderr)
+        write_mbox(mbox_path + ".tmp", num_docs, seed=args.seed)
+        os.replace(mbox_path + ".tmp", mbox_path)
+
+    store_path = os.path.join(args.workdir, f"store-{num_docs}.db")
+    for path in (store_path, store_path + "-wal", store_path + "-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    shutil.rmtree(DocumentStore(store_path).snapshot_path, ignore_errors=True)
+
+    start = time.perf_counter()
+    EmailProcessor(mbox_path, DocumentStore(store_path), workers=args.workers).process_mbox()
+    elapsed = time.perf_counter() - start
+    if "ingest" in args.only:
+        emit("ingest", "process_mbox", num_docs, summarize([elapsed * 1000]),
+             docs_per_sec=round(num_docs / elapsed, 1))
+
+    doc_store = DocumentStore(store_path)
+    if "load" in args.only:
+        samples = time_calls(lambda _: doc_store.load_all_documents(), [None], args.repeat)
+        emit("load", "load_all_documents", num_docs, summarize(samples))
+        samples = time_calls(
+            lambda _: Corpus.from_store(doc_store, Email.DEFAULT_FIELD_WEIGHTS),
+            [None], args.repeat,
+        )
+        emit("load", "corpus_from_store", num_docs, summarize(samples))
+
+    config = {
+        "MBOX_PATH": mbox_path,
+        "STORE_PATH": store_path,
+        "BACKGROUND_LOAD": False,
+        "EMBEDDING_CACHE_PATH": "",
+        "QUERY_CACHE_SIZE": 0,
+    }
+    start = time.perf_counter()
+    app = SearchicaApp(config)
+    cold_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    app = SearchicaApp(config)
+    warm_ms = (time.perf_counter() - start) * 1000
+    if not app.ready.is_set():
+        raise RuntimeError(f"App failed to load: {app.load_state}")
+    if "startup" in args.only:
+        emit("startup", "cold", num_docs, summarize([cold_ms]))
+        emit("startup", "warm", num_docs, summarize([warm_ms]))
+
+    queries = sample_queries(args.queries)
+    query_processor = app.query_processor
+    if "search" in args.only:
+        for mode in SEARCH_MODES:
+            samples = time_calls(
+                lambda q: query_processor.search(q, top_k=args.top_k, mode=mode),
+                queries, args.repeat,
+            )
+            emit("search", mode, num_docs, summarize(samples))
+        samples = time_calls(
+            lambda q: query_processor.search(
+                q, top_k=args.top_k, field_weights={"subject": 1.0, "body": 1.0}
+            ),
+            queries, args.repeat,
+        )
+        emit("search", "field_weights", num_docs, summarize(samples))
+
+    if "visualize" in args.only:
+        samples = time_calls(
+            lambda _: VisualizationProcessor.fit_projection(query_processor.doc_matrix),
+            [None], args.repeat,
+        )
+        emit("visualize", "fit_projection", num_docs, summarize(samples))
+
+        page = [query_processor.search_indices(q, top_k=args.top_k) for q in queries]
+        rendered = [
+            (list(zip(app.corpus.get_documents(indices), scores)), app.projection[indices])
+            for indices, scores in page
+        ]
+        samples = time_calls(
+            lambda item: VisualizationProcessor(
+                item[0], embeddings_2d=item[1]
+            ).prepare_visualization_data(),
+            rendered, args.repeat,
+        )
+        emit("visualize", "prepare_visualization_data", num_docs, summarize(samples))
+
+    if "api" in args.only:
+        client = app.app.test_client()
+
+        def post(query: str) -> None:
+            response = client.post("/api/search", json={"query": query, "top_k": args.top_k})
+            if response.status_code != 200:
+                raise RuntimeError(f"/api/search returned {response.status_code}")
+
+        emit("api", "search", num_docs, summarize(time_calls(post, queries, args.repeat)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", type=int, nargs="+", default=[10000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=0, help="Ingestion parse workers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--workdir", default=os.path.join(tempfile.gettempdir(), "searchica-bench"))
+    parser.add_argument("--output", help="Write results here instead of stdout")
+    args = parser.parse_args()
+    os.makedirs(args.workdir, exist_ok=True)
+
+    encoders.register(MODEL_NAME, HashingEncoder())
+    # Keep the app module's default instance away from real data
+    os.environ["MBOX_PATH"] = os.path.join(args.workdir, "none.mbox")
+    os.environ["STORE_PATH"] = os.path.join(args.workdir, "default.db")
+    os.environ["BACKGROUND_LOAD"] = "0"
+    os.environ["EMBEDDING_CACHE_PATH"] = ""
+
+    results: List[Dict[str, Any]] = []
+
+    def emit(name: str, variant: str, docs: int, timing: Dict[str, Any], **extra: Any) -> None:
+        record = {"name": name, "variant": variant, "docs": docs, **timing, **extra}
+        print(json.dumps(record), file=sys.stderr)
+        results.append(record)
+
+    # Application logging goes to stderr so stdout holds only the report
+    with contextlib.redirect_stdout(sys.stderr):
+        for num_docs in args.docs:
+            run_size(num_docs, args, emit)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "encoder": "HashingEncoder",
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
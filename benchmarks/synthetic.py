@@ -0,0 +1,184 @@
+"""
+Deterministic synthetic data for the benchmarks.
+
+Provides an Enron-like mailbox generator, a stub encoder that stands in for
+the sentence transformer so benchmarks run offline, and a clustered vector
+corpus for index-only benchmarks. Everything is seeded, so the same
+arguments always produce the same mailbox, vectors and queries.
+"""
+import os
+import random
+import re
+import sys
+import zlib
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Union
+
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from query_processor import QueryProcessor
+
+# Words mail bodies and subjects are drawn from; queries reuse them so they match
+TOPIC_WORDS = (
+    "energy trading deal contract gas power price market meeting report budget "
+    "california legal risk pipeline capacity transmission forecast credit invoice "
+    "schedule agreement counterparty settlement storage supply demand curve desk "
+    "volume delivery hedge option swap natural electricity utility regulator filing "
+    "tariff audit compliance quarter revenue expense approval review draft memo "
+    "conference call travel houston portland london weekly daily update status "
+    "issue question request confirm change plan project team office system"
+).split()
+
+FILLER_WORDS = (
+    "the a to of and in for on with is be this that we will please as at by "
+    "from it are have our you your can let me know if any all thanks regards"
+).split()
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+class HashingEncoder:
+    """
+    Deterministic, offline stand-in for the sentence transformer.
+
+    Each token is hashed to one row of a fixed random table and a text's
+    vector is the normalized sum of its token rows, so texts sharing words
+    get similar vectors and searches return meaningful rankings. Much cheaper
+    than the real model, so benchmark timings measure everything except
+    model inference.
+    """
+
+    def __init__(self, dim: int = 384, buckets: int = 1 << 15, seed: int = 0) -> None:
+        """
+        Initialize the token table.
+
+        Args:
+            dim: Embedding dimension, matching the real model's
+            buckets: Number of distinct token rows
+            seed: Seed of the token table
+        """
+        self.dim = dim
+        self.buckets = buckets
+        rng = np.random.default_rng(seed)
+        self.table = QueryProcessor.normalize_rows(
+            rng.standard_normal((buckets, dim)).astype(np.float32)
+        )
+        self._token_ids: Dict[str, int] = {}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def token_id(self, token: str) -> int:
+        """Table row of a token."""
+        token_id = self._token_ids.get(token)
+        if token_id is None:
+            token_id = zlib.crc32(token.encode("utf-8")) % self.buckets
+            self._token_ids[token] = token_id
+        return token_id
+
+    def encode(
+        self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs
+    ) -> np.ndarray:
+        """
+        Embed one text or a list of texts, like SentenceTransformer.encode.
+
+        Args:
+            sentences: Text or list of texts
+            batch_size: Ignored; accepted for interface compatibility
+
+        Returns:
+            Unit-length float32 vector, or one row per text
+        """
+        if isinstance(sentences, str):
+            return self.encode([sentences])[0]
+        if not sentences:
+            return np.zeros((0, self.dim), dtype=np.float32)
+
+        ids: List[int] = []
+        offsets: List[int] = []
+        for text in sentences:
+            offsets.append(len(ids))
+            tokens = TOKEN_PATTERN.findall(text.lower()) or [text]
+            ids.extend(self.token_id(token) for token in tokens)
+        vectors = np.add.reduceat(self.table[ids], offsets, axis=0)
+        return QueryProcessor.normalize_rows(vectors)
+
+
+def write_mbox(path: str, num_docs: int, seed: int = 0) -> None:
+    """
+    Write an Enron-like mailbox of num_docs messages.
+
+    Senders and recipients come from a pool that grows with the mailbox,
+    subjects recur across reply threads and dates span two years, so
+    deduplication, filters and full-text search see realistic repetition.
+
+    Args:
+        path: Output mbox path
+        num_docs: Number of messages
+        seed: Seed of the generated content
+    """
+    rng = random.Random(seed)
+    num_people = max(10, int(num_docs ** 0.5))
+    people = [f"user{i}@enron.com" for i in range(num_people)]
+    threads = [
+        " ".join(rng.choices(TOPIC_WORDS, k=rng.randint(2, 6)))
+        for _ in range(max(10, num_docs // 5))
+    ]
+    start = datetime(2000, 1, 1, tzinfo=timezone.utc)
+
+    with open(path, "w") as f:
+        for i in range(num_docs):
+            sender = rng.choice(people)
+            to = ", ".join(rng.sample(people, rng.randint(1, 3)))
+            subject = rng.choice(threads)
+            if rng.random() < 0.4:
+                subject = f"Re: {subject}"
+            words = rng.choices(
+                TOPIC_WORDS + FILLER_WORDS * 2, k=rng.randint(20, 300)
+            )
+            body = "\n".join(
+                " ".join(words[line : line + 12]) for line in range(0, len(words), 12)
+            )
+            date = start + timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))
+
+            f.write(f"From {sender} {date.strftime('%a %b %d %H:%M:%S %Y')}\n")
+            f.write(f"Message-ID: <{seed}.{i}.JavaMail@enron.com>\n")
+            f.write(f"Date: {format_datetime(date)}\n")
+            f.write(f"From: {sender}\n")
+            f.write(f"To: {to}\n")
+            if rng.random() < 0.25:
+                f.write(f"Cc: {rng.choice(people)}\n")
+            f.write(f"Subject: {subject}\n\n{body}\n\n")
+
+
+def sample_queries(num_queries: int, seed: int = 1) -> List[str]:
+    """
+    Generate short keyword queries over the mailbox vocabulary.
+
+    Args:
+        num_queries: Number of queries
+        seed: Seed of the generated queries
+
+    Returns:
+        Distinct query strings
+    """
+    rng = random.Random(seed)
+    queries: List[str] = []
+    while len(queries) < num_queries:
+        query = " ".join(rng.sample(TOPIC_WORDS, rng.randint(1, 4)))
+        if query not in queries:
+            queries.append(query)
+    return queries
+
+
+def synthetic_matrix(num_docs: int, dim: int = 384, clusters: int = 200, seed: int = 0) -> np.ndarray:
+    """Normalized vectors scattered around random cluster centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=num_docs)
+    noise = rng.normal(scale=0.5, size=(num_docs, dim)).astype(np.float32)
+    return QueryProcessor.normalize_rows(centers[labels] + noise)
@@ -50,13 +50,25 @@ function App() {
     }
   };
 
-  const handleEmailClick = (email: EmailResult) => {
-    if (selectedEmail === email) {
+  const handleEmailClick = async (email: EmailResult) => {
+    if (selectedEmail?.id === email.id) {
       // If clicking the currently selected email, deselect it
       setSelectedEmail(null);
-    } else {
-      // Otherwise, select the new email
-      setSelectedEmail(email);
+      return;
+    }
+    // Otherwise, select the new email and load its full body
+    setSelectedEmail(email);
+    try {
+      const apiUrl = import.meta.env.VITE_API_URL || "";
+      const response = await fetch(
+        `${apiUrl}/api/documents/${encodeURIComponent(email.id)}`
+      );
+      const document = await response.json();
+      setSelectedEmail((current) =>
+        current?.id === email.id ? { ...email, body: document.body } : current
+      );
+    } catch (error) {
+      console.error("Loading email failed:", error);
     }
   };
 
@@ -32,10 +32,10 @@ function EmailList({
       >
         {results.map((email, index) => (
           <div
-            id={`email-${email.id}`}
+            id={`email-${email.rank}`}
             key={email.id}
             className={`border-bottom ${
-              selectedEmail === email ? "bg-light" : ""
+              selectedEmail?.id === email.id ? "bg-light" : ""
             }`}
             style={{
               padding: "8px 6px",
@@ -18,7 +18,7 @@ function EmailViewer({ email }: EmailViewerProps) {
           {email.cc && <div>CC: {email.cc}</div>}
           <div>Date: {new Date(email.date).toLocaleString()}</div>
         </div>
-        <div style={{ whiteSpace: "pre-wrap" }}>{email.body}</div>
+        <div style={{ whiteSpace: "pre-wrap" }}>{email.body ?? email.snippet}</div>
       </div>
     </div>
   );
@@ -1,9 +1,11 @@
 export interface EmailResult {
-    id: number;
+    id: string;
+    rank: number;
     subject: string;
     from: string;
     date: string;
-    body: string;
+    snippet?: string;
+    body?: string;
     to: string;
     cc: string;
     score: number;
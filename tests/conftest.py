@@ -23,6 +23,20 @@ def sample_email():
         date="2024-02-03"
     )
 
+@pytest.fixture
+def random_documents():
+    """Fixture providing a factory of documents with random field vectors."""
+    def make(n, dim=8, seed=0):
+        rng = np.random.default_rng(seed)
+        docs = []
+        for _ in range(n):
+            doc = Document({'field1': 'a', 'field2': 'b'})
+            doc._vectors = {'field1': rng.normal(size=dim), 'field2': rng.normal(size=dim)}
+            doc.field_weights = {'field1': 0.6, 'field2': 0.4}
+            docs.append(doc)
+        return docs
+    return make
+
 @pytest.fixture
 def sample_document():
     """Fixture providing a sample document for testing."""
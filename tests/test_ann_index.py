@@ -0,0 +1,47 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from ann_index import IVFIndex
+from query_processor import QueryProcessor
+
+@pytest.fixture
+def clustered_matrix():
+    """Fixture providing normalized vectors drawn around a few cluster centers."""
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(8, 16))
+    matrix = centers[rng.integers(0, 8, size=400)] + 0.1 * rng.normal(size=(400, 16))
+    return QueryProcessor.normalize_rows(matrix)
+
+class TestIVFIndex:
+    def test_full_probe_matches_exact(self, clustered_matrix):
+        index = IVFIndex.build(clustered_matrix, n_lists=8)
+        query = clustered_matrix[3]
+
+        indices, scores = index.search(query, top_k=10, n_probe=index.n_lists)
+        exact = np.argsort(-(clustered_matrix @ query))[:10]
+
+        assert list(indices) == list(exact)
+        assert np.all(np.diff(scores) <= 0)
+
+    def test_partial_probe_recall(self, clustered_matrix):
+        index = IVFIndex.build(clustered_matrix, n_lists=8, n_probe=2)
+        hits = 0
+        for query in clustered_matrix[:20]:
+            indices, _ = index.search(query, top_k=10)
+            exact = np.argsort(-(clustered_matrix @ query))[:10]
+            hits += len(set(indices) & set(exact))
+        assert hits / 200 >= 0.9
+
+    def test_save_and_load(self, clustered_matrix, tmp_path):
+        index = IVFIndex.build(clustered_matrix, n_lists=8)
+        index.save(tmp_path, {"generation": 1})
+
+        loaded = IVFIndex.load(tmp_path, {"generation": 1}, clustered_matrix)
+        assert loaded is not None
+        assert np.array_equal(loaded.order, index.order)
+        assert IVFIndex.load(tmp_path, {"generation": 2}, clustered_matrix) is None
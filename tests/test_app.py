@@ -0,0 +1,98 @@
+# tests/test_app.py
+import os
+import sys
+import sqlite3
+import tempfile
+import pytest
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+# Keep the module's default app instance away from real data
+_default_dir = tempfile.mkdtemp()
+os.environ["MBOX_PATH"] = os.path.join(_default_dir, "none.mbox")
+os.environ["STORE_PATH"] = os.path.join(_default_dir, "store.db")
+os.environ["BACKGROUND_LOAD"] = "0"
+os.environ["EMBEDDING_CACHE_PATH"] = ""
+
+from app import SearchicaApp
+from profiling import start_profiler, stop_profiler
+
+@pytest.fixture
+def client(tmp_path):
+    """Fixture creating a test client of an app over an empty store."""
+    app = SearchicaApp({
+        "MBOX_PATH": tmp_path / "none.mbox",
+        "STORE_PATH": tmp_path / "store.db",
+        "PROFILE_TOKEN": "secret",
+        "PROFILE_DIR": str(tmp_path / "profiles"),
+    })
+    return app.app.test_client()
+
+class TestSearch:
+    def test_search_skips_documents_deleted_after_load(self, tmp_path):
+        mbox_path = tmp_path / "test.mbox"
+        mbox_path.write_text("".join(
+            f"From sender@example.com Thu Feb 03 10:00:00 2024\n"
+            f"Message-ID: <{i}@example.com>\nSubject: Subject {i}\n"
+            f"From: sender@example.com\nTo: recipient@example.com\n\nBody {i}\n\n"
+            for i in range(3)
+        ))
+        app = SearchicaApp({
+            "MBOX_PATH": mbox_path,
+            "STORE_PATH": tmp_path / "store.db",
+            "QUERY_CACHE_SIZE": 0,
+        })
+        conn = sqlite3.connect(str(tmp_path / "store.db"))
+        conn.execute("DELETE FROM documents WHERE id = '1@example.com'")
+        conn.commit()
+        conn.close()
+
+        response = app.app.test_client().post("/api/search", json={"query": "Body", "top_k": 3})
+        assert response.status_code == 200
+        data = response.get_json()
+        assert sorted(result["id"] for result in data["results"]) == [
+            "0@example.com", "2@example.com"
+        ]
+        assert len(data["plot_data"]["data"][0]["x"]) == 2
+
+class TestProfiling:
+    def test_not_profiled_without_token(self, client, tmp_path):
+        response = client.get("/api/status")
+        assert response.status_code == 200
+        assert "X-Profile" not in response.headers
+        assert not (tmp_path / "profiles").exists()
+
+    def test_not_profiled_with_wrong_token(self, client, tmp_path):
+        response = client.get("/api/status", headers={"X-Profile-Token": "wrong"})
+        assert response.status_code == 200
+        assert "X-Profile" not in response.headers
+        assert not (tmp_path / "profiles").exists()
+
+    def test_profiled_with_token(self, client, tmp_path):
+        response = client.get("/api/status", headers={"X-Profile-Token": "secret"})
+        assert response.status_code == 200
+        assert response.get_json()["ready"]
+        name = response.headers["X-Profile"]
+        assert (tmp_path / "profiles" / name).exists()
+
+        response = client.get("/api/status?profile=secret")
+        assert response.headers["X-Profile"].endswith(".prof")
+
+    def test_profile_summary(self, client):
+        response = client.get(
+            "/api/status?profile_summary=1", headers={"X-Profile-Token": "secret"}
+        )
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+        assert "cumulative" in response.get_data(as_text=True)
+
+    def test_busy_profiler_serves_unprofiled(self, client, tmp_path):
+        profiler = start_profiler()
+        try:
+            response = client.get("/api/status", headers={"X-Profile-Token": "secret"})
+        finally:
+            stop_profiler(profiler)
+        assert response.status_code == 200
+        assert response.headers["X-Profile"] == "busy"
+        assert not (tmp_path / "profiles").exists()
@@ -0,0 +1,132 @@
+import os
+import sqlite3
+import sys
+import pytest
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from corpus import Corpus, DictionaryColumn
+from document_store import DocumentStore
+from documents import Email, NO_DATE, parse_date
+
+class TestCorpus:
+    def test_dictionary_column(self):
+        column = DictionaryColumn.encode(["a", "b", None, "a"])
+        assert list(column.codes) == [0, 1, -1, 0]
+        assert column[3] == "a"
+        assert column[2] is None
+        assert column.code_of("b") == 1
+        assert column.code_of("missing") == -1
+
+    def test_parse_date(self):
+        assert parse_date("Thu, 03 Feb 2024 10:00:00 -0000") == 1706954400
+        assert parse_date("not a date") == NO_DATE
+        assert parse_date(None) == NO_DATE
+
+    def test_from_store_matches_in_memory(self, tmp_path, sample_email):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        other = Email(body="Other body", subject="Other", sender="other@example.com", to="x@example.com")
+        store.save_document("a", sample_email)
+        store.save_document("b", other)
+
+        corpus = Corpus.from_store(store, Email.DEFAULT_FIELD_WEIGHTS)
+        in_memory = Corpus.from_documents([sample_email, other], doc_ids=["a", "b"])
+
+        assert corpus.doc_ids == ["a", "b"]
+        assert np.allclose(corpus.matrix, in_memory.matrix, atol=1e-6)
+        assert corpus.columns["sender"][1] == "other@example.com"
+        assert corpus.dates[1] == NO_DATE
+
+        documents = corpus.get_documents([1])
+        assert documents[0].data["body"] == "Other body"
+        assert documents[0]._vectors is None
+
+    def test_from_snapshot(self, tmp_path, sample_email):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        other = Email(body="Other body", subject="Other", sender="Zoë <z@example.com>", to="x@example.com")
+        store.save_document("a", sample_email)
+        store.save_document("b", other)
+        fingerprint = store.snapshot_fingerprint("model", Email.DEFAULT_FIELD_WEIGHTS)
+        assert Corpus.from_snapshot(store, fingerprint) is None
+
+        built = Corpus.from_store(store, Email.DEFAULT_FIELD_WEIGHTS)
+        built.write_snapshot(store, fingerprint)
+        corpus = Corpus.from_snapshot(store, fingerprint)
+
+        assert corpus.doc_ids == ["a", "b"]
+        assert isinstance(corpus.doc_ids.data, np.memmap)
+        assert isinstance(corpus.columns["sender"].codes, np.memmap)
+        assert np.array_equal(corpus.matrix, built.matrix)
+        assert np.array_equal(corpus.dates, built.dates)
+        assert corpus.columns["sender"][1] == "Zoë <z@example.com>"
+        assert corpus.columns["cc"][0] == built.columns["cc"][0]
+        assert corpus.columns["sender"].code_of("Zoë <z@example.com>") == 1
+        assert list(corpus.rows_of(["b", "missing", "a"])) == [1, -1, 0]
+        assert corpus.get_documents([1])[0].data["body"] == "Other body"
+
+        store.save_document("c", other)
+        fingerprint = store.snapshot_fingerprint("model", Email.DEFAULT_FIELD_WEIGHTS)
+        assert Corpus.from_snapshot(store, fingerprint) is None
+
+    def test_from_snapshot_checks_stored_ids(self, tmp_path, sample_email):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        store.save_document("a", sample_email)
+        store.save_document("b", sample_email)
+        fingerprint = store.snapshot_fingerprint("model", Email.DEFAULT_FIELD_WEIGHTS)
+        Corpus.from_store(store, Email.DEFAULT_FIELD_WEIGHTS).write_snapshot(store, fingerprint)
+        assert Corpus.from_snapshot(store, fingerprint) is not None
+
+        # Rewind the change counter as a restored backup would
+        generation = store.get_generation()
+        store.save_document("c", sample_email)
+        conn = sqlite3.connect(store.db_path)
+        conn.execute("DELETE FROM documents WHERE id = 'a'")
+        conn.execute("UPDATE store_meta SET value = ? WHERE key = 'generation'", (generation,))
+        conn.commit()
+        conn.close()
+
+        assert store.snapshot_fingerprint("model", Email.DEFAULT_FIELD_WEIGHTS) == fingerprint
+        assert Corpus.from_snapshot(store, fingerprint) is None
+
+    def test_build_field_matrices(self):
+        vectors = [
+            {"subject": np.array([3.0, 4.0]), "body": np.array([0.0, 2.0])},
+            {"body": np.array([1.0, 0.0])},
+        ]
+        field_matrices = Corpus.build_field_matrices(vectors, ("subject", "body", "cc"), 2)
+
+        assert field_matrices.shape == (2, 3, 2)
+        assert np.allclose(field_matrices[0, 0], [0.6, 0.8])
+        assert np.allclose(field_matrices[0, 1], [0.0, 1.0])
+        assert np.allclose(field_matrices[1, 0], 0)
+        assert np.allclose(field_matrices[:, 2], 0)
+
+    def test_filter_rows(self, tmp_path):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        emails = [
+            Email(body="a", subject="a", sender="Jeff <JEFF@enron.com>", to="kay@enron.com",
+                  date="Sun, 01 Jul 2001 10:00:00 -0000"),
+            Email(body="b", subject="b", sender="kay@enron.com", to="jeff@enron.com",
+                  cc="sara@enron.com", date="Mon, 01 Oct 2001 10:00:00 -0000"),
+            Email(body="c", subject="c", sender="jeff@enron.com", to="sara@enron.com"),
+        ]
+        for i, email in enumerate(emails):
+            email._vectors = {"body": np.ones(2)}
+            store.save_document(f"doc{i}", email)
+
+        q3_start, q4_start = 993945600, 1001894400
+        for corpus in (
+            Corpus.from_store(store, Email.DEFAULT_FIELD_WEIGHTS),
+            Corpus.from_documents(emails, matrix=np.ones((3, 2), dtype=np.float32)),
+        ):
+            assert corpus.filter_rows() is None
+            assert list(corpus.filter_rows(date_from=q3_start, date_to=q4_start)) == [0]
+            assert list(corpus.filter_rows(addresses={"sender": ["jeff@enron.com"]})) == [0, 2]
+            assert list(corpus.filter_rows(addresses={"recipient": ["Sara@Enron.com"]})) == [1, 2]
+            assert list(corpus.filter_rows(
+                date_from=q3_start, addresses={"sender": ["jeff@enron.com"]}
+            )) == [0]
+            with pytest.raises(ValueError):
+                corpus.filter_rows(addresses={"bcc": ["x@enron.com"]})
@@ -1,12 +1,17 @@
 import os
 import sys
+import fcntl
+import json
+import sqlite3
 import pytest
+import numpy as np
 
 # Add backend directory to Python path
 backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 sys.path.append(backend_dir)
 
-from document_store import DocumentStore
+from document_store import DocumentStore, SCHEMA_VERSION, loader_lock
+from documents import Email, NO_DATE
 
 @pytest.fixture
 def document_store(tmp_path):
@@ -39,4 +44,226 @@ class TestDocumentStore:
         
         document_store.clear_store()
         docs = document_store.load_all_documents()
-        assert len(docs) == 0
\ No newline at end of file
+        assert len(docs) == 0
+
+    def test_vectors_round_trip_as_float32(self, document_store, sample_email):
+        """Test vectors are stored in binary form without loss."""
+        document_store.save_document("test1", sample_email)
+        loaded_doc = document_store.load_document("test1")
+
+        for field, vector in sample_email.to_vectors().items():
+            assert loaded_doc._vectors[field].dtype == np.float32
+            assert np.allclose(loaded_doc._vectors[field], vector)
+
+    def test_migrates_json_vectors(self, tmp_path):
+        """Test a version 0 database with JSON vectors is upgraded on open."""
+        db_path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE documents (id TEXT PRIMARY KEY, type TEXT, data TEXT, vectors TEXT)")
+        data = {"body": "b", "subject": "s", "sender": "f", "to": "t",
+                "cc": None, "bcc": None, "date": None}
+        conn.execute(
+            "INSERT INTO documents VALUES (?, ?, ?, ?)",
+            ("legacy1", "Email", json.dumps(data), json.dumps({"body": [0.5, 0.25]})),
+        )
+        conn.commit()
+        conn.close()
+
+        store = DocumentStore(db_path)
+        loaded_doc = store.load_document("legacy1")
+
+        assert loaded_doc.data["subject"] == "s"
+        assert np.allclose(loaded_doc._vectors["body"], [0.5, 0.25])
+        assert [doc_id for doc_id, _ in store.search_text("s")] == ["legacy1"]
+        assert store.find_documents_by_address(["t"], ("to",)) == ["legacy1"]
+        conn = sqlite3.connect(db_path)
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        conn.close()
+
+    def test_search_text(self, document_store, sample_email):
+        """Test the full-text index follows saves, replacements and deletes."""
+        other = Email(body="Deal 4471 for ENE", subject="Trade", sender="a", to="b")
+        other._vectors = {"body": np.ones(2)}
+        document_store.save_document("test1", sample_email)
+        document_store.save_document("test2", other)
+        document_store.save_document("test2", other)
+
+        assert [doc_id for doc_id, _ in document_store.search_text("ENE deal")] == ["test2"]
+        assert [doc_id for doc_id, _ in document_store.search_text('4471 OR "(')] == ["test2"]
+        matches = document_store.search_text("test trade")
+        assert {doc_id for doc_id, _ in matches} == {"test1", "test2"}
+        assert document_store.search_text("!!") == []
+
+        document_store.clear_store()
+        assert document_store.search_text("ENE") == []
+
+    def test_parsed_metadata(self, document_store, sample_email):
+        """Test dates and addresses are parsed into indexed columns on save."""
+        email = Email(body="b", subject="s", sender="Jeff <Jeff@Enron.com>",
+                      to="kay@enron.com, sara@enron.com", cc="kay@enron.com",
+                      date="Thu, 03 Feb 2024 10:00:00 -0000")
+        email._vectors = {"body": np.ones(2)}
+        document_store.save_document("test1", sample_email)
+        document_store.save_document("test2", email)
+
+        assert list(document_store.load_timestamps()) == [NO_DATE, 1706954400]
+        assert document_store.find_documents_by_address(["JEFF@enron.com"], ("sender",)) == ["test2"]
+        assert document_store.find_documents_by_address(["kay@enron.com"], ("sender",)) == []
+        assert document_store.find_documents_by_address(
+            ["kay@enron.com", "recipient@example.com"], ("to", "cc")
+        ) == ["test1", "test2"]
+
+        # Replacing a document relinks its addresses
+        email.data["to"] = "other@enron.com"
+        email.data["cc"] = None
+        document_store.save_document("test2", email)
+        assert document_store.find_documents_by_address(["kay@enron.com"], ("to", "cc")) == []
+
+    def test_shared_field_values(self, document_store):
+        """Test repeated field texts are stored once and shared on load."""
+        for i in range(3):
+            email = Email(body=f"Body {i}", subject="Status", sender="a@example.com", to="b@example.com")
+            email._vectors = {
+                field: np.full(4, len(value), dtype=np.float32)
+                for field, value in email.data.items() if value is not None
+            }
+            document_store.save_document(f"doc{i}", email)
+
+        conn = sqlite3.connect(document_store.db_path)
+        assert conn.execute("SELECT COUNT(*) FROM field_values").fetchone()[0] == 6
+        conn.close()
+
+        documents = document_store.load_documents(["doc0", "doc2"], include_vectors=True)
+        assert np.array_equal(documents[1]._vectors["sender"], np.full(4, 13))
+        assert np.array_equal(documents[1]._vectors["body"], np.full(4, 6))
+        found = document_store.lookup_text_vectors(["a@example.com", "unknown"])
+        assert list(found) == ["a@example.com"]
+
+    def test_prune_field_values(self, document_store):
+        """Test values of replaced and deleted documents are reclaimed."""
+        for i in range(3):
+            email = Email(body=f"Body {i}", subject="Status", sender="a@example.com", to="b@example.com")
+            email._vectors = {
+                field: np.full(4, len(value), dtype=np.float32)
+                for field, value in email.data.items() if value is not None
+            }
+            document_store.save_document(f"doc{i}", email)
+        replacement = Email(body="New body", subject="Status", sender="a@example.com", to="b@example.com")
+        replacement._vectors = {field: np.ones(4, np.float32) for field in ("body", "subject", "sender", "to")}
+        document_store.save_document("doc0", replacement)
+        conn = sqlite3.connect(document_store.db_path)
+        conn.execute("DELETE FROM documents WHERE id = 'doc1'")
+        conn.commit()
+
+        # Body 0 and Body 1 are no longer referenced
+        assert document_store.prune_field_values() == 2
+        assert conn.execute("SELECT COUNT(*) FROM field_values").fetchone()[0] == 5
+        conn.close()
+        assert document_store.prune_field_values() == 0
+        documents = document_store.load_documents(["doc0", "doc2"], include_vectors=True)
+        assert documents[0].data["body"] == "New body"
+        assert np.array_equal(documents[1]._vectors["body"], np.full(4, 6))
+
+    def test_migrates_packed_vectors(self, tmp_path):
+        """Test a version 5 database with per-document vector BLOBs is upgraded."""
+        db_path = str(tmp_path / "v5.db")
+        store = DocumentStore(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute("DROP TABLE documents")
+        conn.execute(
+            "CREATE TABLE documents (id TEXT PRIMARY KEY, type TEXT, data TEXT, "
+            "fields TEXT, vectors BLOB, timestamp INTEGER)"
+        )
+        data = {"body": "b", "subject": "s", "sender": "f", "to": "t",
+                "cc": None, "bcc": None, "date": None}
+        fields, vectors = DocumentStore.pack_vectors(
+            {"body": np.array([0.5, 0.25]), "sender": np.array([1.0, 0.0])}
+        )
+        conn.execute(
+            "INSERT INTO documents VALUES (?, ?, ?, ?, ?, ?)",
+            ("old1", "Email", json.dumps(data), fields, vectors, None),
+        )
+        conn.execute("INSERT INTO documents_fts (rowid, subject, body) VALUES (1, 's', 'b')")
+        conn.execute("PRAGMA user_version = 5")
+        conn.commit()
+        conn.close()
+
+        store = DocumentStore(db_path)
+        loaded_doc = store.load_document("old1")
+        assert np.allclose(loaded_doc._vectors["body"], [0.5, 0.25])
+        assert np.allclose(loaded_doc._vectors["sender"], [1.0, 0.0])
+        assert [doc_id for doc_id, _ in store.search_text("b")] == ["old1"]
+
+    def test_snapshot_round_trip(self, document_store, sample_email):
+        """Test the snapshot is memory-mapped back while the store is unchanged."""
+        document_store.save_document("test1", sample_email)
+        fingerprint = document_store.snapshot_fingerprint("model", {"body": 1.0})
+        matrix = np.eye(1, 4, dtype=np.float32)
+        document_store.write_snapshot(["test1"], matrix, fingerprint)
+
+        doc_ids, loaded = document_store.load_snapshot(fingerprint)
+        assert doc_ids == ["test1"]
+        assert isinstance(loaded, np.memmap)
+        assert np.array_equal(loaded, matrix)
+
+    def test_snapshot_array_written_in_place(self, document_store, sample_email):
+        """Test a memory-mapped snapshot array is only visible once finished."""
+        document_store.save_document("test1", sample_email)
+        fingerprint = document_store.snapshot_fingerprint("model", {"body": 1.0})
+        array = document_store.open_snapshot_array("field_vectors", (1, 2, 3))
+        array[0, 1] = [1.0, 2.0, 3.0]
+        assert document_store.load_snapshot_array("field_vectors", fingerprint) is None
+
+        array.flush()
+        document_store.finish_snapshot_array("field_vectors", fingerprint)
+        loaded = document_store.load_snapshot_array("field_vectors", fingerprint)
+        assert loaded.shape == (1, 2, 3)
+        assert np.array_equal(loaded[0, 1], [1.0, 2.0, 3.0])
+
+    def test_snapshot_invalidated_by_changes(self, document_store, sample_email):
+        """Test store writes and fingerprint changes make the snapshot stale."""
+        document_store.save_document("test1", sample_email)
+        fingerprint = document_store.snapshot_fingerprint("model", {"body": 1.0})
+        document_store.write_snapshot(["test1"], np.ones((1, 4), np.float32), fingerprint)
+
+        assert document_store.load_snapshot(
+            document_store.snapshot_fingerprint("other-model", {"body": 1.0})
+        ) is None
+        document_store.save_document("test2", sample_email)
+        assert document_store.load_snapshot(
+            document_store.snapshot_fingerprint("model", {"body": 1.0})
+        ) is None
+
+    def test_snapshot_invalidated_by_recreated_store(self, tmp_path, sample_email):
+        """Test a new database at the same path does not reuse the old snapshot."""
+        db_path = str(tmp_path / "store.db")
+        store = DocumentStore(db_path)
+        store.save_document("a", sample_email)
+        fingerprint = store.snapshot_fingerprint("model", {"body": 1.0})
+        store.write_snapshot(["a"], np.ones((1, 4), np.float32), fingerprint)
+
+        os.remove(db_path)
+        recreated = DocumentStore(db_path)
+        recreated.save_document("b", sample_email)
+        assert recreated.get_generation() == store.get_generation()
+        assert recreated.load_snapshot(
+            recreated.snapshot_fingerprint("model", {"body": 1.0})
+        ) is None
+
+    def test_loader_lock(self, document_store):
+        """Test the loader lock excludes other holders until released."""
+        with loader_lock(document_store.db_path):
+            with open(f"{document_store.db_path}.lock") as f:
+                with pytest.raises(BlockingIOError):
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        with open(f"{document_store.db_path}.lock") as f:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+    def test_bulk_writer(self, document_store, sample_email):
+        """Test bulk writes commit in batches and flush on exit."""
+        with document_store.bulk_writer(commit_every=2) as writer:
+            for i in range(5):
+                writer.add(f"test{i}", sample_email)
+            assert writer.written == 4
+
+        assert document_store.count_documents() == 5
@@ -8,6 +8,7 @@ backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bac
 sys.path.append(backend_dir)
 
 from documents import Document, Email
+from embedding_cache import EmbeddingCache
 
 class TestDocument:
     def test_document_initialization(self, sample_document):
@@ -40,4 +41,51 @@ class TestEmail:
 
     def test_email_weights_sum(self, sample_email):
         weights_sum = sum(sample_email.field_weights.values())
-        assert pytest.approx(weights_sum, 0.01) == 1.0
\ No newline at end of file
+        assert pytest.approx(weights_sum, 0.01) == 1.0
+
+    def test_encode_documents_matches_to_vectors(self, sample_email):
+        other = Email(body="Another body", subject="Other", sender="a@example.com", to="b@example.com")
+        Email.encode_documents([sample_email, other], batch_size=3)
+
+        assert set(other.to_vectors()) == {'body', 'subject', 'sender', 'to'}
+        expected = Email.get_model().encode("Another body")
+        assert np.allclose(other.to_vectors()['body'], expected, atol=1e-5)
+
+    def test_encode_documents_shares_repeated_values(self, monkeypatch):
+        emails = [
+            Email(body=f"Body {i}", subject="Status", sender="a@example.com", to="b@example.com")
+            for i in range(3)
+        ]
+        model = Email.get_model()
+        encoded = []
+        original_encode = model.encode
+
+        def counting_encode(texts, **kwargs):
+            encoded.extend(texts)
+            return original_encode(texts, **kwargs)
+
+        monkeypatch.setattr(model, "encode", counting_encode)
+        known = {"a@example.com": np.ones(3)}
+        Email.encode_documents(
+            emails,
+            batch_size=4,
+            lookup=lambda texts: {text: known[text] for text in texts if text in known},
+        )
+
+        assert sorted(encoded) == ["Body 0", "Body 1", "Body 2", "Status", "b@example.com"]
+        assert emails[0].to_vectors()["subject"] is emails[2].to_vectors()["subject"]
+        assert np.array_equal(emails[1].to_vectors()["sender"], np.ones(3))
+
+    def test_encode_documents_uses_embedding_cache(self, tmp_path, monkeypatch):
+        cache = EmbeddingCache(str(tmp_path / "cache.db"))
+        monkeypatch.setattr(Document, "embedding_cache", cache)
+        first = Email(body="Body", subject="Status", sender="a@example.com", to="b@example.com")
+        Email.encode_documents([first])
+
+        model = Email.get_model()
+        monkeypatch.setattr(model, "encode", lambda *args, **kwargs: pytest.fail("encoded a cached text"))
+        again = Email(body="Body", subject="Status", sender="a@example.com", to="b@example.com")
+        Email.encode_documents([again])
+
+        assert np.allclose(again.to_vectors()["body"], first.to_vectors()["body"])
+        assert cache.stats()["hits"] == 4
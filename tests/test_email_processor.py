@@ -1,13 +1,17 @@
 # tests/test_email_processor.py
 import os
 import sys
+import mailbox
+import threading
 import pytest
 
 backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 sys.path.append(backend_dir)
 
+import email_processor
 from email_processor import EmailProcessor
 from document_store import DocumentStore
+from documents import Email
 
 class TestEmailProcessor:
     def test_process_mbox(self, temp_mbox, tmp_path):
@@ -30,4 +34,185 @@ class TestEmailProcessor:
         processor = EmailProcessor(temp_mbox, store)
         subject = "=?utf-8?q?Test=20Subject?="
         decoded = processor.decode_email_subject(subject)
-        assert isinstance(decoded, str)
\ No newline at end of file
+        assert isinstance(decoded, str)
+
+    def test_incremental_processing(self, temp_mbox, tmp_path):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        processor = EmailProcessor(temp_mbox, store)
+        assert processor.needs_processing()
+        processor.process_mbox()
+        assert not processor.needs_processing()
+
+        with open(temp_mbox, "a") as f:
+            f.write(
+                "\nFrom other@example.com Fri Feb 04 10:00:00 2024\n"
+                "Message-ID: <appended@example.com>\n"
+                "Subject: Appended\nFrom: other@example.com\nTo: recipient@example.com\n\n"
+                "Appended body\n"
+            )
+
+        assert processor.needs_processing()
+        emails = processor.process_mbox()
+        assert [email.data['subject'] for email in emails] == ['Appended']
+        assert "appended@example.com" in store.load_document_ids()
+        assert store.count_documents() == 2
+
+    def test_adopts_legacy_positional_ids(self, temp_mbox, tmp_path):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        processor = EmailProcessor(temp_mbox, store)
+        [message] = mailbox.mbox(temp_mbox)
+        store.save_document("email_0", processor.process_single_email(message))
+
+        assert not processor.needs_processing()
+        assert store.load_document_ids() == [processor.document_id(message)]
+
+        with open(temp_mbox, "a") as f:
+            f.write(
+                "\nFrom other@example.com Fri Feb 04 10:00:00 2024\n"
+                "Message-ID: <appended@example.com>\n"
+                "Subject: Appended\nFrom: other@example.com\nTo: recipient@example.com\n\n"
+                "Appended body\n"
+            )
+        emails = processor.process_mbox()
+        assert [email.data['subject'] for email in emails] == ['Appended']
+        assert store.count_documents() == 2
+
+    def test_same_size_rewrite_restarts_ingestion(self, temp_mbox, tmp_path):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        processor = EmailProcessor(temp_mbox, store)
+        processor.process_mbox()
+        [message] = mailbox.mbox(temp_mbox)
+        store.save_document("email_0", processor.process_single_email(message))
+
+        with open(temp_mbox) as f:
+            content = f.read()
+        with open(temp_mbox, "w") as f:
+            f.write(content.replace("Test Subject", "Best Subject"))
+
+        assert processor.needs_processing()
+        emails = processor.process_mbox()
+        assert [email.data['subject'] for email in emails] == ['Best Subject']
+        assert "email_0" not in store.load_document_ids()
+        assert not processor.needs_processing()
+
+    def test_encoding_failure_skips_only_failing_email(self, tmp_path, monkeypatch):
+        mbox_path = tmp_path / "many.mbox"
+        mbox_path.write_text("".join(
+            f"From sender@example.com Thu Feb 03 10:00:00 2024\n"
+            f"Message-ID: <{i}@example.com>\nSubject: Subject {i}\n"
+            f"From: sender@example.com\nTo: recipient@example.com\n\nBody {i}\n\n"
+            for i in range(4)
+        ))
+        encode_documents = Email.encode_documents.__func__
+
+        def failing_encode(cls, documents, *args, **kwargs):
+            if any(doc.data["body"] == "Body 2" for doc in documents):
+                raise RuntimeError("encoder failed")
+            return encode_documents(cls, documents, *args, **kwargs)
+
+        monkeypatch.setattr(Email, "encode_documents", classmethod(failing_encode))
+        store = DocumentStore(str(tmp_path / "test.db"))
+        emails = EmailProcessor(str(mbox_path), store).process_mbox()
+
+        assert [email.data["subject"] for email in emails] == [
+            "Subject 0", "Subject 1", "Subject 3"
+        ]
+        assert store.count_documents() == 3
+
+    def test_parallel_processing_matches_serial(self, tmp_path):
+        mbox_path = tmp_path / "many.mbox"
+        mbox_path.write_text("".join(
+            f"From sender@example.com Thu Feb 03 10:00:00 2024\n"
+            f"Message-ID: <{i}@example.com>\nSubject: Subject {i}\n"
+            f"From: sender@example.com\nTo: recipient@example.com\n\nBody {i}\n\n"
+            for i in range(10)
+        ))
+        serial = EmailProcessor(str(mbox_path), DocumentStore(str(tmp_path / "serial.db")))
+        parallel = EmailProcessor(
+            str(mbox_path), DocumentStore(str(tmp_path / "parallel.db")),
+            workers=2, queue_size=1,
+        )
+
+        serial_subjects = [email.data['subject'] for email in serial.process_mbox()]
+        parallel_subjects = [email.data['subject'] for email in parallel.process_mbox()]
+        assert parallel_subjects == serial_subjects
+        assert sorted(parallel.doc_store.load_document_ids()) == sorted(
+            f"{i}@example.com" for i in range(10)
+        )
+
+    def test_parallel_processing_with_progress_callback(self, tmp_path):
+        mbox_path = tmp_path / "many.mbox"
+        mbox_path.write_text("".join(
+            f"From sender@example.com Thu Feb 03 10:00:00 2024\n"
+            f"Message-ID: <{i}@example.com>\nSubject: Subject {i}\n"
+            f"From: sender@example.com\nTo: recipient@example.com\n\nBody {i}\n\n"
+            for i in range(20)
+        ))
+
+        class Listener:
+            """Callback owner holding a lock, which cannot be pickled."""
+
+            def __init__(self):
+                self.lock = threading.Lock()
+                self.updates = []
+
+            def update(self, position, total):
+                with self.lock:
+                    self.updates.append((position, total))
+
+        listener = Listener()
+        store = DocumentStore(str(tmp_path / "test.db"))
+        processor = EmailProcessor(
+            str(mbox_path), store, workers=2, progress_callback=listener.update
+        )
+        emails = processor.process_mbox()
+
+        assert len(emails) == 20
+        assert store.count_documents() == 20
+        assert listener.updates[-1] == (20, 20)
+        assert processor.progress_callback == listener.update
+
+    def test_parallel_read_failure_keeps_ingestion_incomplete(self, tmp_path, monkeypatch):
+        mbox_path = tmp_path / "many.mbox"
+        mbox_path.write_text("".join(
+            f"From sender@example.com Thu Feb 03 10:00:00 2024\n"
+            f"Message-ID: <{i}@example.com>\nSubject: Subject {i}\n"
+            f"From: sender@example.com\nTo: recipient@example.com\n\nBody {i}\n\n"
+            for i in range(5)
+        ))
+        get_bytes = mailbox.mbox.get_bytes
+
+        def failing_get_bytes(self, key, *args, **kwargs):
+            if key == 3:
+                raise OSError("read failed")
+            return get_bytes(self, key, *args, **kwargs)
+
+        monkeypatch.setattr(mailbox.mbox, "get_bytes", failing_get_bytes)
+        processor = EmailProcessor(
+            str(mbox_path), DocumentStore(str(tmp_path / "test.db")), workers=2
+        )
+        with pytest.raises(OSError):
+            processor.process_mbox()
+        assert processor.needs_processing()
+
+    def test_parse_worker_skips_stored_ids(self, temp_mbox, tmp_path):
+        processor = EmailProcessor(temp_mbox, DocumentStore(str(tmp_path / "test.db")))
+        raw = (
+            b"Message-ID: <stored@example.com>\nSubject: Stored\n"
+            b"From: sender@example.com\nTo: recipient@example.com\n\nBody\n"
+        )
+        email_processor._init_parse_worker(processor, {"stored@example.com"})
+        assert email_processor._parse_in_worker([(1, raw)]) == [(1, "stored@example.com", None)]
+
+        email_processor._init_parse_worker(processor, set())
+        [(_, doc_id, email)] = email_processor._parse_in_worker([(1, raw)])
+        assert email.data["subject"] == "Stored"
+
+    def test_profiled_ingestion_saves_profile(self, temp_mbox, tmp_path):
+        store = DocumentStore(str(tmp_path / "test.db"))
+        processor = EmailProcessor(temp_mbox, store, profile_dir=str(tmp_path / "profiles"))
+        emails = processor.process_mbox()
+
+        assert len(emails) == 1
+        profiles = list((tmp_path / "profiles").glob("*process_mbox*.prof"))
+        assert len(profiles) == 1
@@ -0,0 +1,41 @@
+# tests/test_embedding_cache.py
+import os
+import sys
+import pytest
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from embedding_cache import EmbeddingCache
+
+class TestEmbeddingCache:
+    def test_round_trip_persists(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        EmbeddingCache(path).put_many({"hello": np.arange(4, dtype=np.float32)})
+
+        cache = EmbeddingCache(path)
+        found = cache.get_many(["hello", "missing"])
+
+        assert np.array_equal(found["hello"], np.arange(4))
+        assert "missing" not in found
+        assert cache.stats()["hit_rate"] == 0.5
+        assert cache.stats()["size"] == 1
+
+    def test_keyed_by_model(self, tmp_path):
+        path = str(tmp_path / "cache.db")
+        EmbeddingCache(path, model="model-a").put_many({"hello": np.ones(4)})
+
+        assert EmbeddingCache(path, model="model-b").get_many(["hello"]) == {}
+        assert "hello" in EmbeddingCache(path, model="model-a").get_many(["hello"])
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = EmbeddingCache(str(tmp_path / "cache.db"), max_entries=2)
+        cache.put_many({"a": np.ones(4)})
+        cache.put_many({"b": np.ones(4)})
+        cache.get_many(["a"])
+        cache.put_many({"c": np.ones(4)})
+
+        assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        assert cache.stats()["size"] == 2
+        assert cache.stats()["evictions"] == 1
@@ -0,0 +1,32 @@
+import os
+import sys
+import pytest
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from encoder import EncoderRegistry, encoders
+from documents import Document
+from query_processor import QueryProcessor
+
+class TestEncoderRegistry:
+    def test_single_shared_model(self):
+        assert Document.get_model() is QueryProcessor.get_model()
+        assert Document.get_model() is encoders.get()
+
+    def test_warmup_sets_ready(self):
+        registry = EncoderRegistry()
+        assert not registry.is_ready()
+
+        thread = registry.warmup()
+        thread.join()
+        assert registry.is_ready()
+        assert registry.error() is None
+
+    def test_register_substitute_model(self):
+        registry = EncoderRegistry()
+        stub = object()
+        registry.register("stub", stub)
+
+        assert registry.is_ready("stub")
+        assert registry.get("stub") is stub
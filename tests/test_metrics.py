@@ -0,0 +1,60 @@
+# tests/test_metrics.py
+import os
+import sys
+import pytest
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from metrics import MetricsRegistry, StageTimer, span
+
+class TestStageTimer:
+    def test_span_records_into_active_timer(self):
+        with span("ignored"):
+            pass
+
+        timer = StageTimer()
+        token = timer.activate()
+        try:
+            with span("encode"):
+                pass
+            with span("score"):
+                pass
+            with span("score"):
+                pass
+        finally:
+            StageTimer.deactivate(token)
+        with span("after"):
+            pass
+
+        assert list(timer.stages) == ["encode", "score"]
+        header = timer.server_timing(total=0.0125)
+        assert header.startswith("encode;dur=")
+        assert header.endswith("total;dur=12.500")
+
+class TestMetricsRegistry:
+    def test_render_prometheus_text(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests").inc(endpoint="/api/search", status="200")
+        registry.gauge("documents", "Documents").set(42)
+        latency = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        latency.observe(0.05, stage="score")
+        latency.observe(0.5, stage="score")
+        latency.observe(5.0, stage="score")
+
+        text = registry.render()
+        assert '# TYPE requests_total counter' in text
+        assert 'requests_total{endpoint="/api/search",status="200"} 1' in text
+        assert 'documents 42' in text
+        assert 'latency_seconds_bucket{stage="score",le="0.1"} 1' in text
+        assert 'latency_seconds_bucket{stage="score",le="1"} 2' in text
+        assert 'latency_seconds_bucket{stage="score",le="+Inf"} 3' in text
+        assert 'latency_seconds_sum{stage="score"} 5.55' in text
+        assert 'latency_seconds_count{stage="score"} 3' in text
+        assert text.endswith("\n")
+
+    def test_rejects_kind_mismatch(self):
+        registry = MetricsRegistry()
+        registry.counter("requests_total", "Requests")
+        with pytest.raises(ValueError):
+            registry.gauge("requests_total", "Requests")
@@ -0,0 +1,44 @@
+# tests/test_profiling.py
+import os
+import sys
+import pstats
+import pytest
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from profiling import profiled, start_profiler, stop_profiler, summarize_profile
+
+def busy_work():
+    return sum(i * i for i in range(10000))
+
+class TestProfiling:
+    def test_profiled_saves_loadable_profile(self, tmp_path):
+        with profiled(str(tmp_path), "/api/search") as profiler:
+            busy_work()
+
+        [path] = tmp_path.glob("*-api-search-*.prof")
+        stats = pstats.Stats(str(path))
+        assert any(func[2] == "busy_work" for func in stats.stats)
+        assert "busy_work" in summarize_profile(profiler)
+
+    def test_disabled_without_directory(self):
+        with profiled(None, "ingest") as profiler:
+            busy_work()
+        assert profiler is None
+
+    def test_one_profiler_at_a_time(self, tmp_path):
+        profiler = start_profiler()
+        assert profiler is not None
+        try:
+            assert start_profiler() is None
+            with profiled(str(tmp_path), "ingest") as nested:
+                busy_work()
+            assert nested is None
+            assert not list(tmp_path.glob("*.prof"))
+        finally:
+            stop_profiler(profiler)
+
+        profiler = start_profiler()
+        assert profiler is not None
+        stop_profiler(profiler)
@@ -0,0 +1,55 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from quantization import QuantizedMatrix
+from query_processor import QueryProcessor
+from corpus import Corpus
+
+@pytest.fixture
+def embedding_matrix():
+    """Fixture providing normalized 384-dimensional vectors."""
+    rng = np.random.default_rng(0)
+    return QueryProcessor.normalize_rows(rng.normal(size=(2000, 384)))
+
+class TestQuantizedMatrix:
+    @pytest.mark.parametrize("precision,ratio", [("int8", 4 * 384 / 388), ("float16", 2)])
+    def test_scores_close_to_exact(self, embedding_matrix, precision, ratio):
+        quantized = QuantizedMatrix.quantize(embedding_matrix, precision, chunk_size=300)
+        query = embedding_matrix[7]
+
+        assert quantized.precision == precision
+        assert embedding_matrix.nbytes / quantized.nbytes == pytest.approx(ratio)
+        assert np.allclose(quantized.scores(query), embedding_matrix @ query, atol=0.01)
+
+        rows = np.array([5, 7, 1999])
+        assert np.allclose(quantized.scores(query, rows), quantized.scores(query)[rows])
+
+    def test_unknown_precision(self, embedding_matrix):
+        with pytest.raises(ValueError):
+            QuantizedMatrix.quantize(embedding_matrix, "int4")
+
+    def test_rerank_matches_exact_top_k(self, embedding_matrix):
+        corpus = Corpus(
+            [str(i) for i in range(len(embedding_matrix))], embedding_matrix, {}, np.zeros(0)
+        )
+        exact = QueryProcessor(corpus)
+        quantized = QueryProcessor(
+            corpus,
+            quantized=QuantizedMatrix.quantize(embedding_matrix, "int8"),
+            rerank_candidates=50,
+        )
+        rng = np.random.default_rng(1)
+        for query in rng.normal(size=(10, 384)):
+            expected = exact.rank(query, top_k=10)
+            indices, scores = quantized.rank(query, top_k=10)
+            assert list(indices) == list(expected[0])
+            assert np.allclose(scores, expected[1], atol=1e-6)
+
+        rows = np.arange(0, 2000, 2)
+        indices, _ = quantized.rank(query, top_k=5, rows=rows)
+        assert list(indices) == list(exact.rank(query, top_k=5, rows=rows)[0])
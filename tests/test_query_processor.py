@@ -7,7 +7,11 @@ import numpy as np
 backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
 sys.path.append(backend_dir)
 
-from query_processor import QueryProcessor
+from query_processor import QueryProcessor, QueryCache, RRF_K
+from documents import Email
+from document_store import DocumentStore
+from corpus import Corpus
+from metrics import StageTimer
 
 class TestQueryProcessor:
     def test_search(self, sample_email):
@@ -28,4 +32,166 @@ class TestQueryProcessor:
         v1 = np.array([1, 0, 0])
         v2 = np.array([0, 1, 0])
         similarity = QueryProcessor.cosine_similarity(v1, v2)
-        assert similarity == 0  # Orthogonal vectors
\ No newline at end of file
+        assert similarity == 0  # Orthogonal vectors
+
+    def test_rank_matches_per_document_scores(self, random_documents):
+        docs = random_documents(20, dim=8, seed=0)
+        rng = np.random.default_rng(100)
+        processor = QueryProcessor(docs)
+        query_vector = rng.normal(size=8)
+
+        indices, scores = processor.rank(query_vector, top_k=5)
+        expected = sorted(
+            range(len(docs)),
+            key=lambda i: processor.compute_similarity(query_vector, docs[i]),
+            reverse=True,
+        )[:5]
+
+        assert list(indices) == expected
+        assert np.allclose(
+            scores, [processor.compute_similarity(query_vector, docs[i]) for i in expected],
+            atol=1e-5,
+        )
+
+    def test_rank_with_field_weights(self, random_documents):
+        docs = random_documents(20, dim=8, seed=1)
+        rng = np.random.default_rng(101)
+        processor = QueryProcessor(docs)
+        query_vector = rng.normal(size=8)
+
+        def expected_score(doc, weights):
+            return sum(
+                weight * processor.cosine_similarity(query_vector, doc._vectors[field])
+                for field, weight in weights.items()
+            ) / sum(weights.values())
+
+        weights = {'field1': 3.0, 'field2': 1.0}
+        indices, scores = processor.rank(query_vector, top_k=5, field_weights=weights)
+        expected = sorted(
+            range(len(docs)), key=lambda i: expected_score(docs[i], weights), reverse=True
+        )[:5]
+        assert list(indices) == expected
+        assert np.allclose(scores, [expected_score(docs[i], weights) for i in expected], atol=1e-5)
+
+        # A single field ranks by that field alone
+        indices, _ = processor.rank(query_vector, field_weights={'field2': 1.0})
+        assert list(indices) == sorted(
+            range(len(docs)), key=lambda i: expected_score(docs[i], {'field2': 1.0}), reverse=True
+        )
+
+        with pytest.raises(ValueError):
+            processor.rank(query_vector, field_weights={'missing': 1.0})
+        with pytest.raises(ValueError):
+            processor.rank(query_vector, field_weights={'field1': 0.0})
+
+    def test_hybrid_and_filtered_modes(self, tmp_path):
+        rng = np.random.default_rng(2)
+        store = DocumentStore(str(tmp_path / "test.db"))
+        subjects = ["ENE deal 4471", "weekly report", "ENE outlook", "lunch"]
+        for i, subject in enumerate(subjects):
+            email = Email(body=f"body {i}", subject=subject, sender="a", to="b")
+            email._vectors = {"subject": rng.normal(size=8), "body": rng.normal(size=8)}
+            store.save_document(f"doc{i}", email)
+        processor = QueryProcessor(Corpus.from_store(store, Email.DEFAULT_FIELD_WEIGHTS))
+        query_vector = rng.normal(size=8)
+        processor.query_cache.put("ene deal", query_vector)
+
+        semantic, _ = processor.rank(query_vector)
+        filtered, scores = processor.search_indices("ene deal", mode="filtered")
+        assert set(filtered) == {0, 2}
+        assert list(filtered) == [row for row in semantic if row in (0, 2)]
+
+        hybrid, fused = processor.search_indices("ene deal", top_k=2, mode="hybrid")
+        lexical = list(processor.lexical_rows("ene deal", 10))
+        assert lexical[0] == 0
+        expected = {
+            row: sum(
+                1 / (RRF_K + 1 + ranking.index(row))
+                for ranking in (lexical, list(semantic)) if row in ranking
+            )
+            for row in range(len(subjects))
+        }
+        assert list(hybrid) == sorted(expected, key=expected.get, reverse=True)[:2]
+        assert np.allclose(fused, [expected[row] for row in hybrid])
+
+        with pytest.raises(ValueError):
+            processor.search_indices("ene deal", mode="unknown")
+
+    def test_filters_restrict_candidates(self):
+        rng = np.random.default_rng(3)
+        docs = []
+        for i in range(10):
+            doc = Email(body="b", subject="s", sender=f"user{i % 2}@enron.com", to="x@enron.com")
+            doc._vectors = {"body": rng.normal(size=8)}
+            docs.append(doc)
+        processor = QueryProcessor(docs)
+        query_vector = rng.normal(size=8)
+        processor.query_cache.put("query", query_vector)
+
+        ranked, scores = processor.rank(query_vector)
+        filters = {"addresses": {"sender": ["user1@enron.com"]}}
+        indices, filtered_scores = processor.search_indices("query", top_k=3, filters=filters)
+
+        assert list(indices) == [row for row in ranked if row % 2 == 1][:3]
+        assert np.allclose(filtered_scores, [scores[list(ranked).index(row)] for row in indices])
+
+    def test_rank_many_matches_rank(self, random_documents):
+        docs = random_documents(30, dim=8, seed=4)
+        rng = np.random.default_rng(104)
+        processor = QueryProcessor(docs)
+        query_matrix = rng.normal(size=(5, 8))
+        rows = np.arange(0, 30, 3)
+
+        # A small score budget forces several query blocks
+        for kwargs in ({}, {'field_weights': {'field2': 1.0}}, {'rows': rows}):
+            batch = processor.rank_many(query_matrix, top_k=4, max_scores=60, **kwargs)
+            assert len(batch) == 5
+            for query_vector, (indices, scores) in zip(query_matrix, batch):
+                expected_indices, expected_scores = processor.rank(query_vector, 4, **kwargs)
+                assert list(indices) == list(expected_indices)
+                assert np.allclose(scores, expected_scores, atol=1e-5)
+
+    def test_encode_queries_batches_and_caches(self, sample_email):
+        processor = QueryProcessor([sample_email])
+        cached = processor.encode_query("first query")
+        batch = processor.encode_queries(["First  Query", "second query", "second query"])
+        assert batch.shape[0] == 3
+        assert np.allclose(batch[0], cached)
+        assert np.allclose(batch[1], batch[2])
+        assert np.allclose(batch[1], processor.get_model().encode("second query"), atol=1e-5)
+
+    def test_search_records_stage_timings(self, sample_email):
+        processor = QueryProcessor([sample_email])
+        timer = StageTimer()
+        token = timer.activate()
+        try:
+            processor.search("test", top_k=1)
+        finally:
+            StageTimer.deactivate(token)
+
+        assert {"encode", "score", "sort"} <= set(timer.stages)
+        assert processor.memory_usage()["matrix"] == processor.doc_matrix.nbytes
+
+    def test_query_cache_reuses_embeddings(self, sample_email):
+        processor = QueryProcessor([sample_email], query_cache=QueryCache(max_size=1))
+        first = processor.encode_query("Test  query")
+        second = processor.encode_query("test query")
+
+        assert second is first
+        assert processor.query_cache.stats()["hits"] == 1
+        processor.encode_query("other")
+        assert processor.query_cache.stats()["size"] == 1
+
+    def test_query_cache_expiry(self):
+        cache = QueryCache(max_size=4, ttl=0)
+        cache.put("key", np.zeros(3))
+        assert cache.get("key") is None
+        assert cache.stats()["misses"] == 1
+
+    def test_snippet_centers_on_query_term(self):
+        text = "filler " * 100 + "the pipeline contract was signed " + "filler " * 100
+        snippet = QueryProcessor.snippet(text, "Pipeline deal", length=60)
+
+        assert "pipeline" in snippet
+        assert snippet.startswith("...") and snippet.endswith("...")
+        assert QueryProcessor.snippet("short body", "query") == "short body"
@@ -0,0 +1,32 @@
+import os
+import sys
+import sqlite3
+import pytest
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from sqlite_vectors import IN_CHUNK_SIZE, TEXT_HASH_SIZE, select_in, text_hash
+
+class TestSqliteVectors:
+    def test_text_hash(self):
+        assert len(text_hash("Status")) == TEXT_HASH_SIZE
+        assert text_hash("Status") == text_hash("Status")
+        assert text_hash("Status") != text_hash("status")
+
+    def test_select_in_spans_chunks(self):
+        conn = sqlite3.connect(":memory:")
+        conn.execute("CREATE TABLE items (kind TEXT, id INTEGER)")
+        count = IN_CHUNK_SIZE * 2 + 10
+        conn.executemany(
+            "INSERT INTO items VALUES (?, ?)",
+            [(kind, i) for i in range(count) for kind in ("a", "b")],
+        )
+        rows = list(select_in(
+            conn,
+            "SELECT id FROM items WHERE kind = ? AND id IN ({placeholders})",
+            list(range(count)),
+            params=["a"],
+        ))
+        assert sorted(row[0] for row in rows) == list(range(count))
+        conn.close()
@@ -0,0 +1,36 @@
+import os
+import sys
+import pytest
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'backend'))
+sys.path.append(backend_dir)
+
+from string_array import StringArray
+
+class TestStringArray:
+    def test_sequence_access(self):
+        array = StringArray.from_strings(["a", "bé", "ccc"])
+        assert len(array) == 3
+        assert array[1] == "bé"
+        assert array[np.int64(2)] == "ccc"
+        assert array[-1] == "ccc"
+        assert array[:2] == ["a", "bé"]
+        assert list(array) == ["a", "bé", "ccc"]
+        assert array == ["a", "bé", "ccc"]
+        assert array != ["a", "bé"]
+
+    def test_positions(self):
+        array = StringArray.from_strings(["a", "b", "d"])
+        assert list(array.positions(["d", "a", "c", "zz"])) == [2, 0, -1, -1]
+        assert list(StringArray.from_strings([]).positions(["a"])) == [-1]
+
+        with pytest.raises(ValueError):
+            StringArray.from_strings(["b", "a"]).positions(["a"])
+
+    def test_memory_mapped(self, tmp_path):
+        path = tmp_path / "ids.npy"
+        np.save(path, StringArray.from_strings(["x", "yz"]).data)
+        array = StringArray(np.load(path, mmap_mode="r"))
+        assert isinstance(array.data, np.memmap)
+        assert array == ["x", "yz"]
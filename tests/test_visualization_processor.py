@@ -24,4 +24,21 @@ class TestVisualizationProcessor:
     def test_get_node_color(self):
         color = VisualizationProcessor.get_node_color(0.5)
         assert color.startswith('rgb(')
-        assert color.endswith(')')
\ No newline at end of file
+        assert color.endswith(')')
+
+    def test_fit_projection(self):
+        rng = np.random.default_rng(0)
+        matrix = rng.normal(size=(50, 8)).astype(np.float32)
+        projection = VisualizationProcessor.fit_projection(matrix, sample_size=20, chunk_size=16)
+
+        assert projection.shape == (50, 2)
+        assert np.array_equal(projection, VisualizationProcessor.fit_projection(matrix, sample_size=20))
+
+    def test_precomputed_embeddings(self, sample_email):
+        doc_scores = [(sample_email, 0.8), (sample_email, 0.6)]
+        embeddings = np.array([[0.0, 1.0], [2.0, 3.0]])
+        processor = VisualizationProcessor(doc_scores, embeddings_2d=embeddings)
+        trace = processor.prepare_visualization_data()['data'][0]
+
+        assert trace['x'] == [0.0, 2.0]
+        assert trace['y'] == [1.0, 3.0]